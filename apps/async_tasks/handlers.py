@@ -162,6 +162,139 @@ class RedisPubSubHandler(BasicHandler):
         self.pubsub_thread = None
 
 
+class PubSubHub:
+    """
+    Process wide pattern subscription shared by all handlers that use the same pattern.
+
+    Single PSUBSCRIBE is issued per pattern and kept by one listener greenlet, messages are routed
+    to client queues through in-process routing table so subscribing a client needs no round trip to redis.
+    Message is decoded once and the same object is put in all client queues of a channel.
+    """
+
+    PUBLISH_MESSAGE_TYPE = 'pmessage'
+    SUBSCRIBE_MESSAGE_TYPE = 'psubscribe'
+    SUBSCRIBE_MAX_TRIES = 10
+    RECONNECT_DELAY = 0.1
+
+    hubs = {}
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.redis_client = redis
+        self.client_data = defaultdict(dict)
+        self.subscribed = Event()
+        self.listener = None
+
+    @classmethod
+    def get(cls, pattern):
+        if pattern not in cls.hubs:
+            cls.hubs[pattern] = cls(pattern)
+        return cls.hubs[pattern]
+
+    def subscribe(self, channel, client_uuid=None, maxsize=None, timeout=settings.DEFAULT_SUBSCRIPTION_TIMEOUT):
+        """
+        Add client queue to routing table of channel. Only the very first subscribe waits for pattern subscription.
+        """
+        queue = Queue(maxsize=maxsize)
+
+        client_uuid = client_uuid or uuid.uuid1()
+        self.client_data[channel][client_uuid] = queue
+        self.ensure_subscribed(timeout)
+        return queue
+
+    def unsubscribe(self, channel, client_uuid=None):
+        if channel not in self.client_data:
+            return
+
+        client_info = self.client_data[channel]
+        if client_uuid is not None:
+            client_info.pop(client_uuid, None)
+        if client_uuid is None or not client_info:
+            del self.client_data[channel]
+
+    def ensure_subscribed(self, timeout):
+        for _ in range(self.SUBSCRIBE_MAX_TRIES):
+            if self.listener is None or self.listener.dead:
+                self.listener = gevent.spawn(self.listen)
+
+            if self.subscribed.wait(timeout):
+                return
+
+            # If subscribe timed out, reset connection
+            self.reset()
+            gevent.sleep(0.1)
+
+        uwsgi.stop()
+        raise RuntimeError('Subscribe failed. Max tries exceeded.')
+
+    def listen(self):
+        """
+        Listen for redis messages and route them, reconnect if connection is lost.
+        """
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                pubsub.psubscribe(self.pattern)
+                for message in pubsub.listen():
+                    self.process_message(message)
+            except Exception as ex:
+                logger.warning('Pattern subscription of %s failed: %r', self.pattern, ex)
+            finally:
+                self.subscribed.clear()
+                pubsub.close()
+            gevent.sleep(self.RECONNECT_DELAY)
+
+    def process_message(self, message):
+        if not message:
+            return
+
+        if message['type'] == self.SUBSCRIBE_MESSAGE_TYPE:
+            self.subscribed.set()
+
+        elif message['type'] == self.PUBLISH_MESSAGE_TYPE:
+            channel = message['channel'].decode()
+            client_info = self.client_data.get(channel)
+            # Skip decoding of messages no one is listening to
+            if not client_info:
+                return
+
+            data = message['data'].decode()
+            to_unsub = []
+            for client_uuid, client_queue in client_info.items():
+                try:
+                    client_queue.put(data, block=False)
+                except Full:
+                    to_unsub.append(client_uuid)
+
+            for unsub_client in to_unsub:
+                self.unsubscribe(channel, client_uuid=unsub_client)
+
+    def reset(self):
+        self.redis_client = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+        if self.listener is not None:
+            gevent.kill(self.listener)
+        self.listener = None
+        self.subscribed.clear()
+
+
+class PatternPubSubHandler(BasicHandler):
+    """
+    Handler that subscribes to channels matching `subscribe_pattern` through shared PubSubHub.
+    """
+
+    subscribe_pattern = None
+
+    @property
+    def hub(self):
+        return PubSubHub.get(self.subscribe_pattern)
+
+    def subscribe(self, channel, client_uuid=None, maxsize=None, timeout=settings.DEFAULT_SUBSCRIPTION_TIMEOUT):
+        return self.hub.subscribe(channel, client_uuid=client_uuid, maxsize=maxsize, timeout=timeout)
+
+    def unsubscribe(self, channel, client_uuid=None):
+        self.hub.unsubscribe(channel, client_uuid=client_uuid)
+
+
 class WebSocketHandler(BasicHandler):
     client = WebSocketClient
     http_error = '{"detail":"Expected WebSocket connection."}'
@@ -5,7 +5,7 @@ from gevent.event import Event
 from gevent.queue import Queue
 from munch import Munch
 
-from apps.async_tasks.handlers import BasicHandler, RedisPubSubHandler, WebSocketHandler
+from apps.async_tasks.handlers import BasicHandler, PubSubHub, RedisPubSubHandler, WebSocketHandler
 from apps.core.exceptions import RequestTimeout
 from apps.core.response import JSONResponse
 
@@ -107,6 +107,51 @@ class TestRedisPubSubHandler(TestCase):
         self.assertTrue(self.handler.pubsub.unsubscribe.called)
 
 
+@mock.patch('apps.async_tasks.handlers.gevent.spawn', mock.Mock())
+class TestPubSubHub(TestCase):
+    def setUp(self):
+        self.hub = PubSubHub('pattern:*')
+        self.hub.subscribed.set()
+
+    @mock.patch('apps.async_tasks.handlers.gevent.spawn')
+    def test_listener_is_shared_by_all_channels(self, spawn_mock):
+        spawn_mock.return_value.dead = False
+        self.hub.subscribe('pattern:1')
+        self.hub.subscribe('pattern:2')
+        self.assertEqual(len(self.hub.client_data), 2)
+        self.assertEqual(spawn_mock.call_count, 1)
+
+    def test_message_is_routed_to_channel_clients(self):
+        queue1 = self.hub.subscribe('pattern:1', client_uuid='id1')
+        queue2 = self.hub.subscribe('pattern:1', client_uuid='id2')
+        queue3 = self.hub.subscribe('pattern:2')
+
+        self.hub.process_message({'type': 'pmessage', 'channel': b'pattern:1', 'data': b'data'})
+        data1, data2 = queue1.get_nowait(), queue2.get_nowait()
+        self.assertEqual(data1, 'data')
+        self.assertIs(data1, data2)
+        self.assertTrue(queue3.empty())
+
+    def test_full_client_is_unsubscribed(self):
+        self.hub.subscribe('pattern:1', maxsize=1)
+        for _ in range(2):
+            self.hub.process_message({'type': 'pmessage', 'channel': b'pattern:1', 'data': b'data'})
+        self.assertNotIn('pattern:1', self.hub.client_data)
+
+    def test_unsubscribe(self):
+        self.hub.subscribe('pattern:1', client_uuid='id1')
+        self.hub.subscribe('pattern:1', client_uuid='id2')
+        self.hub.unsubscribe('pattern:1', 'id1')
+        self.assertEqual(len(self.hub.client_data['pattern:1']), 1)
+        self.hub.unsubscribe('pattern:1', 'id2')
+        self.assertNotIn('pattern:1', self.hub.client_data)
+
+    def test_psubscribe_confirmation_sets_subscribed(self):
+        self.hub.subscribed.clear()
+        self.hub.process_message({'type': 'psubscribe', 'channel': b'pattern:*', 'data': 1})
+        self.assertTrue(self.hub.subscribed.is_set())
+
+
 class TestWebSocketHandler(TestCase):
     def setUp(self):
         self.handler = WebSocketHandler()
@@ -0,0 +1,113 @@
+# coding=UTF8
+import io
+from datetime import date, datetime, time
+
+from django.db import connections
+from psycopg2.extras import Json
+
+COPY_NULL = '\\N'
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\n': '\\n', '\r': '\\r', '\t': '\\t'})
+
+
+def quote_element(text):
+    return '"{}"'.format(text.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def encode_hstore(value):
+    return ', '.join('{}=>{}'.format(quote_element(str(key)), 'NULL' if val is None else quote_element(str(val)))
+                     for key, val in value.items())
+
+
+def encode_array(value):
+    items = []
+    for item in value:
+        if item is None:
+            items.append('NULL')
+        elif isinstance(item, (list, tuple)):
+            items.append(encode_array(item))
+        else:
+            items.append(quote_element(encode_value(item)))
+    return '{%s}' % ','.join(items)
+
+
+def encode_value(value):
+    """
+    Return postgres text representation of a value prepared for database (e.g. by field.get_db_prep_save).
+    """
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return encode_hstore(value)
+    if isinstance(value, (list, tuple)):
+        return encode_array(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '\\x' + bytes(value).hex()
+    if isinstance(value, Json):
+        return value.dumps(value.adapted)
+    return str(value)
+
+
+def encode_copy_row(values):
+    return '\t'.join(COPY_NULL if value is None else encode_value(value).translate(COPY_ESCAPES)
+                     for value in values) + '\n'
+
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Write rows of values prepared for database to a table with a single COPY statement.
+    `table` and `columns` are expected to be already quoted.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(encode_copy_row(row))
+    buffer.seek(0)
+    cursor.copy_expert('COPY {} ({}) FROM STDIN'.format(table, ', '.join(columns)), buffer)
+
+
+def get_db_rows(fields, objects, connection):
+    for obj in objects:
+        yield [field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields]
+
+
+def copy_objects(model, objects, using):
+    """
+    Insert objects with a single COPY statement.
+    Like in bulk_create, model save() is not called and no signals are sent.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    fields = model._meta.local_concrete_fields
+
+    with connection.cursor() as cursor:
+        copy_rows(cursor, qn(model._meta.db_table), [qn(field.column) for field in fields],
+                  get_db_rows(fields, objects, connection))
+
+
+def upsert_objects(model, objects, using):
+    """
+    Insert objects or overwrite existing rows with the same primary key.
+
+    Objects are copied to a temporary staging table and merged into model table with a single
+    INSERT ... ON CONFLICT statement. Like in bulk_create, model save() is not called and no signals are sent.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    meta = model._meta
+    fields = meta.local_concrete_fields
+    table = qn(meta.db_table)
+    staging = qn('_staging_{}'.format(meta.db_table))
+    columns = [qn(field.column) for field in fields]
+    assignments = ', '.join('{column} = EXCLUDED.{column}'.format(column=qn(field.column))
+                            for field in fields if not field.primary_key)
+
+    with connection.cursor() as cursor:
+        # Staging table lives until the end of restore transaction and is reused by subsequent batches
+        cursor.execute('CREATE TEMPORARY TABLE IF NOT EXISTS {} (LIKE {}) ON COMMIT DROP'.format(staging, table))
+        cursor.execute('TRUNCATE {}'.format(staging))
+        copy_rows(cursor, staging, columns, get_db_rows(fields, objects, connection))
+        cursor.execute('INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} '
+                       'ON CONFLICT ({pk}) DO {action}'.format(
+                           table=table, staging=staging, columns=', '.join(columns), pk=qn(meta.pk.column),
+                           action='UPDATE SET {}'.format(assignments) if assignments else 'NOTHING'))
@@ -69,6 +69,11 @@ class Backup(LiveAbstractModel, CreatedUpdatedAtAbstractModel, LabelDescriptionA
         now = timezone.now()
         Backup.objects.filter(pk=self.pk).update(status=status, status_info=status_info, updated_at=now)
 
+    def report_progress(self, progress):
+        self.change_status(self.STATUSES.RUNNING,
+                           'Copied {files_copied} of {files_count} files '
+                           '({copied_size} bytes, {throughput} bytes/s).'.format(**progress))
+
     @property
     def is_partial(self):
         return bool(self.query_args)
@@ -94,6 +99,7 @@ class Backup(LiveAbstractModel, CreatedUpdatedAtAbstractModel, LabelDescriptionA
             else:
                 storage = ZipStorage.open(tmp, 'w', storage_path=os.path.join(self.storage_path, 'files'),
                                           location=settings.LOCATION)
+            storage.progress_callback = self.report_progress
 
             try:
                 default_site.backup_instance(storage, self.instance, self.query_args)
@@ -109,8 +115,12 @@ class Backup(LiveAbstractModel, CreatedUpdatedAtAbstractModel, LabelDescriptionA
                 self.save()
                 self.change_status(self.STATUSES.SUCCESS)
             except SyncanoException as e:
+                storage.cancel()
                 storage.close()
                 self.change_status(self.STATUSES.ERROR, e.detail)
+            except Exception:
+                storage.cancel()
+                raise
 
 
 def restore_filename(restore, filename):
@@ -170,4 +180,6 @@ class Restore(CreatedUpdatedAtAbstractModel, LabelDescriptionAbstractModel):
         storage.close()
 
         InstanceIndicator.refresh(self.target_instance, storage.storage_size)
-        self.change_status(self.STATUSES.SUCCESS)
+        # Restore runs in a single transaction so throughput is only reported once it is done
+        self.change_status(self.STATUSES.SUCCESS,
+                           'Restored {restored_rows} rows ({throughput} rows/s).'.format(**storage.get_restore_stats()))
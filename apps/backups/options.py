@@ -1,13 +1,13 @@
 # coding=UTF8
 
-from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.conf import settings
+from django.db import models, router
 from rest_framework import serializers
 from timezone_utils.fields import TimeZoneField
 
-from apps.core.contextmanagers import ignore_signal
 from apps.core.helpers import camel_to_under
 
+from .bulk import copy_objects, upsert_objects
 from .fields import BinaryField
 
 NOFILES = dict()
@@ -131,25 +131,43 @@ class ModelBackup:
         """
         Save a list of model instances.
         """
-        if not partial:
+        if partial:
+            self.upsert_batch(object_list)
+        elif settings.BACKUPS_RESTORE_WITH_COPY:
+            objects = self.create_objects_without_pk(object_list)
+            copy_objects(self.model, objects, router.db_for_write(self.model))
+        else:
             self.model.objects.bulk_create(object_list)
 
-        else:
+    def create_objects_without_pk(self, object_list):
+        """
+        Create objects that have no primary key yet and return remaining ones.
+        """
+        # Split before creating as bulk_create sets primary keys of created objects
+        new_objects = [obj for obj in object_list if obj.pk is None]
+        if new_objects:
+            remaining_objects = [obj for obj in object_list if obj.pk is not None]
+            self.model.objects.bulk_create(new_objects)
+            return remaining_objects
+        return object_list
+
+    def upsert_batch(self, object_list):
+        """
+        Save a list of model instances overwriting conflicting objects (with the same lookup_field value).
+        """
+        if self.lookup_field != self.model._meta.pk.attname:
+            # take over primary keys of existing objects with the same lookup_field value
+            lookup_values = [getattr(obj, self.lookup_field) for obj in object_list]
+            existing_pks = dict(self.model.objects
+                                .filter(**{'%s__in' % self.lookup_field: lookup_values})
+                                .values_list(self.lookup_field, 'pk'))
             for obj in object_list:
-                # lookup conflicting object
-                # if there is one, overwrite it with existing object.pk
-                # if there is none, obj.pk will become None
-                existing_pk = self.model.objects\
-                    .values_list('pk', flat=True)\
-                    .filter(**{self.lookup_field: getattr(obj, self.lookup_field)})\
-                    .first()
-                if existing_pk:
-                    obj.pk = existing_pk
-                self.update_object(obj)
-
-    def update_object(self, obj):
-        with ignore_signal(post_save, pre_save):
-            obj.save()
+                obj.pk = existing_pks.get(getattr(obj, self.lookup_field), obj.pk)
+
+        object_list = self.create_objects_without_pk(object_list)
+        # when several objects end up with the same pk, the last one wins as it would with consecutive saves
+        objects = list({obj.pk: obj for obj in object_list}.values())
+        upsert_objects(self.model, objects, router.db_for_write(self.model))
 
     def restore(self, storage, partial=False):
         """
@@ -179,11 +197,11 @@ class ModelBackup:
             for value in storage.get_model_storage(self.get_name()):
                 batch.append(self.to_instance(storage, value))
                 if len(batch) > self.BATCH_SIZE:
-                    self.save_batch(batch, partial)
+                    self.restore_batch(storage, batch, partial)
                     batch = []
 
             if batch:
-                self.save_batch(batch, partial)
+                self.restore_batch(storage, batch, partial)
         finally:
             # Enable auto_now* fields
             for field in self.auto_fields:
@@ -193,6 +211,10 @@ class ModelBackup:
                 else:
                     field.auto_now_add = True
 
+    def restore_batch(self, storage, batch, partial):
+        self.save_batch(batch, partial)
+        storage.update_restored_rows(len(batch))
+
     def to_instance(self, storage, representation):
         """
         Return instance of model for given representation. Instance
@@ -18,6 +18,16 @@ from .options import ModelBackup
 
 logger = getLogger(__name__)
 
+# Plain indexes of a table, i.e. excluding primary key and indexes backing constraints
+SECONDARY_INDEXES_SQL = """
+SELECT n.nspname, c.relname, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid)
+"""
+
 
 class BackupSite:
     MIGRATIONS_STORAGE = 'migrations'
@@ -138,6 +148,10 @@ class BackupSite:
         con = connections[db]
 
         stored_targets = self.get_stored_migration_targets(storage)
+        # Backup of current migrations state needs no migrating, create schema like for a new instance
+        # so that it is cloned from template schema
+        if dict(stored_targets) == dict(self.get_instance_migrations(instance)):
+            stored_targets = None
 
         new_instance = Instance(owner=instance.owner,
                                 name="_%s" % generate_key(),
@@ -206,17 +220,49 @@ class BackupSite:
             for line in statements:
                 cursor.execute(line)
 
+    def drop_indexes(self, connection, model):
+        """
+        Drop secondary indexes of model table and return their definitions.
+        """
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(SECONDARY_INDEXES_SQL, [model._meta.db_table])
+            indexes = cursor.fetchall()
+            for schema_name, index_name, _ in indexes:
+                cursor.execute('DROP INDEX {}.{}'.format(qn(schema_name), qn(index_name)))
+        return [definition for _, _, definition in indexes]
+
+    def create_indexes(self, connection, definitions):
+        if not definitions:
+            return
+
+        with connection.cursor() as cursor:
+            # Tables are not visible outside of restore transaction, let postgres build each index with parallel workers
+            cursor.execute('SET LOCAL max_parallel_maintenance_workers = %s', [settings.BACKUPS_RESTORE_INDEX_WORKERS])
+            cursor.execute('SET LOCAL maintenance_work_mem = %s', [settings.BACKUPS_RESTORE_MAINTENANCE_WORK_MEM])
+            for definition in definitions:
+                cursor.execute(definition)
+
     def restore_to_instance(self, storage, instance, models_sorted, apps=None, partial=False):
         db = get_instance_db(instance)
         connection = connections[db]
+        # Load data of a full restore into tables without indexes and build them once it's done
+        defer_indexes = not partial and settings.BACKUPS_RESTORE_WITH_COPY
+        deferred_indexes = []
 
         with instance_context(instance), transaction.atomic(using=db):
             if not partial:
                 self.truncate_models(connection, models_sorted)
 
+            storage.start_restore()
             for model in models_sorted:
+                if defer_indexes:
+                    # Dropped right before loading data as restoring a model may create indexes on other tables
+                    # (e.g. Klass creates indexes on DataObject table)
+                    deferred_indexes += self.drop_indexes(connection, model)
                 self.get_options_for_model(model).restore(storage, partial)
 
+            self.create_indexes(connection, deferred_indexes)
             self.reset_sequences(connection, models_sorted)
 
     @cached_property
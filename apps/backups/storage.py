@@ -2,17 +2,86 @@ import hashlib
 import os
 import shutil
 import tempfile
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import rapidjson as json
+from django.conf import settings
 from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.utils.functional import LazyObject, empty
 
 from apps.core.backends.storage import DefaultStorage
 
 from .exceptions import SizeLimitExceeded
 
 
+def unwrap_storage(storage):
+    while isinstance(storage, LazyObject):
+        if storage._wrapped is empty:
+            storage._setup()
+        storage = storage._wrapped
+    return storage
+
+
+class FileCopier:
+    """
+    Copies files on a bounded pool of worker threads while objects are still being backed up.
+
+    Copy jobs return size of copied file. At most `max_pending` jobs are queued at once so that memory use
+    does not depend on number of files. Errors of jobs are raised in the calling thread.
+    """
+
+    def __init__(self, max_workers, callback=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backup')
+        self.max_pending = max_workers * 2
+        self.pending = deque()
+        self.callback = callback
+        self.count = 0
+        self.copied = 0
+        self.copied_size = 0
+        self.started_at = time.time()
+
+    def submit(self, func, *args):
+        self.count += 1
+        self.pending.append(self.executor.submit(func, *args))
+        while self.pending and (len(self.pending) >= self.max_pending or self.pending[0].done()):
+            self._collect(self.pending.popleft())
+
+    def _collect(self, future):
+        try:
+            size = future.result()
+        except Exception:
+            self.cancel()
+            raise
+
+        self.copied += 1
+        self.copied_size += size
+        if self.callback:
+            self.callback(size)
+
+    def get_progress(self):
+        duration = time.time() - self.started_at
+        return {
+            'files_count': self.count,
+            'files_copied': self.copied,
+            'copied_size': self.copied_size,
+            'throughput': int(self.copied_size / duration) if duration else 0,
+        }
+
+    def wait(self):
+        while self.pending:
+            self._collect(self.pending.popleft())
+        self.executor.shutdown()
+
+    def cancel(self):
+        while self.pending:
+            self.pending.popleft().cancel()
+        self.executor.shutdown()
+
+
 class BaseStorage:
     LIST_LIMIT = 16
     ARCHIVE_SIZE_LIMIT = None
@@ -22,6 +91,10 @@ class BaseStorage:
         self.details = defaultdict(dict)
         self.size = 0
         self.storage_size = 0
+        self.progress_callback = None
+        self.progress_reported_at = time.time()
+        self.restored_rows = 0
+        self.restore_started_at = None
 
     def update_size(self, file_size=0):
         if file_size:
@@ -33,6 +106,35 @@ class BaseStorage:
     def update_storage_size(self, file_size):
         self.storage_size += file_size
 
+    def get_progress(self):
+        return None
+
+    def start_restore(self):
+        self.restored_rows = 0
+        self.restore_started_at = time.time()
+
+    def update_restored_rows(self, count):
+        self.restored_rows += count
+
+    def get_restore_stats(self):
+        elapsed = time.time() - self.restore_started_at
+        return {'restored_rows': self.restored_rows,
+                'throughput': int(self.restored_rows / elapsed) if elapsed else 0}
+
+    def report_progress(self, force=False):
+        """
+        Pass progress of files copying to `progress_callback`, at most once per BACKUPS_PROGRESS_INTERVAL.
+        """
+        now = time.time()
+        if self.progress_callback is None or not force and \
+                now - self.progress_reported_at < settings.BACKUPS_PROGRESS_INTERVAL:
+            return
+
+        progress = self.get_progress()
+        if progress is not None:
+            self.progress_reported_at = now
+            self.progress_callback(progress)
+
     def update_meta(self, obj, options):
         class_name = options.get_name()
 
@@ -59,6 +161,18 @@ class BaseStorage:
     def _append(self, obj):
         raise NotImplementedError  # noqa
 
+    def add_file(self, name, source_storage=None):
+        """
+        Add file from source storage (default storage by default) and return its name in backup.
+        """
+        return self._add_file(name, source_storage or default_storage)
+
+    def _add_file(self, name, source_storage):
+        raise NotImplementedError  # noqa
+
+    def cancel(self):
+        pass
+
 
 class DictStorage(BaseStorage, dict):
     FILE_STORAGE_KEY = '__FILES__'
@@ -79,9 +193,10 @@ class DictStorage(BaseStorage, dict):
     def _append(self, obj):
         self[self.current_model].append(obj)
 
-    def add_file(self, file):
-        extension = os.path.splitext(file.name)[1]
-        self[self.FILE_STORAGE_KEY].append(file.read())
+    def _add_file(self, name, source_storage):
+        extension = os.path.splitext(name)[1]
+        with source_storage.open(name) as file:
+            self[self.FILE_STORAGE_KEY].append(file.read())
         idx = len(self[self.FILE_STORAGE_KEY]) - 1
         if extension:
             return "%d%s" % (idx, extension)
@@ -138,16 +253,12 @@ class SolutionZipStorage(BaseStorage):
             dest_name = "%s%s" % (dest_name, extension)
         return dest_name
 
-    def add_file(self, file):
-        zip_name = "FILES/%s" % self._generate_file_name(file.name)
-        self.update_size(file.size)
-        if os.path.exists(file.name):
-            self.zipfile.write(file.name, zip_name)
-        else:
-            # write to temp file
-            with tempfile.NamedTemporaryFile(prefix='backup') as local_file:
-                shutil.copyfileobj(file, local_file)
-                self.zipfile.write(local_file.name, zip_name)
+    def _add_file(self, name, source_storage):
+        zip_name = "FILES/%s" % self._generate_file_name(name)
+        self.update_size(source_storage.size(name))
+        # Stream file directly into archive
+        with source_storage.open(name) as file, self.zipfile.open(zip_name, 'w') as zip_file:
+            shutil.copyfileobj(file, zip_file)
         return zip_name
 
     def get_file(self, name):
@@ -197,12 +308,48 @@ class ZipStorage(SolutionZipStorage):
     def __init__(self, zipfile, storage_path, location):
         self.storage = DefaultStorage.create_storage(location)
         self.storage_path = storage_path
+        self.copier = None
         super().__init__(zipfile)
 
-    def add_file(self, file):
-        dest = os.path.join(self.storage_path, self._generate_file_name(file.name))
-        self.update_size(file.size)
-        return self.storage.save(dest, file)
+    def _add_file(self, name, source_storage):
+        if self.copier is None:
+            self.copier = FileCopier(settings.BACKUPS_FILE_COPY_CONCURRENCY, callback=self._file_copied)
+
+        file_size = source_storage.size(name)
+        self.update_size(file_size)
+        # Name is returned before file is copied so it has to be the one that storage is going to use
+        dest = self.storage.get_available_name(os.path.join(self.storage_path, self._generate_file_name(name)))
+        self.copier.submit(self._copy_file, name, source_storage, dest, file_size)
+        return dest
+
+    def _copy_file(self, name, source_storage, dest, file_size):
+        if unwrap_storage(source_storage) is self.storage:
+            # Server side copy when files are kept in the same storage
+            copied_name = self.storage.copy(name, dest)
+        else:
+            with source_storage.open(name) as file:
+                copied_name = self.storage.save(dest, file)
+
+        if copied_name != dest:
+            raise RuntimeError('File {} was copied to {} instead of {}.'.format(name, copied_name, dest))
+        return file_size
+
+    def _file_copied(self, file_size):
+        self.report_progress()
+
+    def get_progress(self):
+        if self.copier is not None:
+            return self.copier.get_progress()
 
     def get_file(self, name):
         return self.storage.open(name)
+
+    def cancel(self):
+        if self.copier is not None:
+            self.copier.cancel()
+
+    def close(self):
+        if self.copier is not None:
+            self.copier.wait()
+            self.report_progress(force=True)
+        super().close()
@@ -1,13 +1,19 @@
 # coding=UTF8
 import json
+import os
+import tempfile
 from unittest import mock
 from zipfile import ZipFile
 
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.db import transaction
 from django.test import TestCase, TransactionTestCase, override_settings
 from django_dynamic_fixture import G, N
 
 from apps.codeboxes.models import CodeBox
+from apps.core.backends.storage import FileSystemStorage
 from apps.core.tests.mixins import CleanupTestCaseMixin
 from apps.data.models import Klass
 from apps.instances.contextmanagers import instance_context
@@ -16,6 +22,7 @@ from apps.instances.models import Instance
 from ..exceptions import EmptyBackupException
 from ..models import Backup
 from ..site import default_site
+from ..storage import FileCopier, ZipStorage
 from .helpers import largish_test_data
 
 
@@ -67,6 +74,21 @@ class BackupTestCase(CleanupTestCaseMixin, TestCase):
         self.assertIn('hosting', backup.details)
         self.assertIn('hosting_file', backup.details)
 
+    @override_settings(BACKUPS_PROGRESS_INTERVAL=0)
+    def test_full_backup_copies_files_in_parallel(self):
+        backup = G(Backup, instance=self.instance)
+        with mock.patch.object(FileSystemStorage, 'copy', autospec=True, side_effect=FileSystemStorage.copy) \
+                as copy_mock, mock.patch('apps.backups.models.Backup.report_progress') as progress_mock:
+            backup.run()
+
+        # Files of default storage are copied with storage copy
+        self.assertTrue(copy_mock.called)
+        self.assertTrue(all(call[0][2].startswith(backup.storage_path) for call in copy_mock.call_args_list))
+        progress = progress_mock.call_args[0][0]
+        self.assertGreater(progress['files_count'], 0)
+        self.assertEqual(progress['files_copied'], progress['files_count'])
+        self.assertEqual(progress['copied_size'], backup.size - backup.archive.size)
+
     def test_partial_backup(self):
         with instance_context(self.instance):
             klass = Klass.objects.first()
@@ -92,6 +114,54 @@ class BackupTestCase(CleanupTestCaseMixin, TestCase):
         self.assertEqual(backup.status, Backup.STATUSES.ERROR)
 
 
+class FileCopierTestCase(TestCase):
+    def test_copying_files(self):
+        copied = []
+        copier = FileCopier(2, callback=copied.append)
+        for i in range(10):
+            copier.submit(lambda size: size, i)
+            self.assertLessEqual(len(copier.pending), copier.max_pending)
+        copier.wait()
+
+        self.assertEqual(sorted(copied), list(range(10)))
+        self.assertEqual(copier.get_progress()['copied_size'], 45)
+
+    def test_copy_error_is_raised(self):
+        copier = FileCopier(2)
+        copier.submit(mock.Mock(side_effect=IOError))
+        with self.assertRaises(IOError):
+            copier.wait()
+
+
+class ZipStorageTestCase(TestCase):
+    storage_path = 'zip-storage-test'
+
+    def test_added_file_name_is_the_copied_one(self):
+        source_name = default_storage.save(os.path.join(self.storage_path, 'source.txt'), ContentFile(b'source'))
+
+        with tempfile.TemporaryFile() as tmp:
+            storage = ZipStorage.open(tmp, 'w', storage_path=os.path.join(self.storage_path, 'files'),
+                                      location=settings.LOCATION)
+            storage.start_model('test')
+            # Occupy the name that is going to be generated for the file
+            taken_name = storage.storage.save(
+                os.path.join(self.storage_path, 'files', storage._generate_file_name(source_name)),
+                ContentFile(b'taken'))
+            storage.file_counter = 0
+
+            name = storage.add_file(source_name)
+            storage.end_model()
+            storage.close()
+
+        self.assertNotEqual(name, taken_name)
+        with storage.get_file(name) as copied_file:
+            self.assertEqual(copied_file.read(), b'source')
+        self.assertEqual(storage.storage_size, len(b'source'))
+
+    def tearDown(self):
+        FileSystemStorage().delete_files(self.storage_path)
+
+
 class BackupDeleteTestCase(CleanupTestCaseMixin, TransactionTestCase):
     fixtures = ['core_data.json', ]
 
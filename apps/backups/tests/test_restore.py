@@ -1,18 +1,21 @@
 
+import datetime
 from unittest import mock
 
-from django.db import transaction
-from django.test import TransactionTestCase, override_settings
-from django_dynamic_fixture import G
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings, tag
+from django_dynamic_fixture import G, N
 
 from apps.admins.models import Admin
 from apps.backups import default_site
 from apps.channels.models import Channel
-from apps.core.tests.mixins import CleanupTestCaseMixin
-from apps.data.models import Klass
+from apps.core.tests.mixins import BenchmarkMixin, CleanupTestCaseMixin
+from apps.data.models import DataObject, Klass
 from apps.instances.contextmanagers import instance_context
+from apps.instances.helpers import get_instance_db
 from apps.instances.models import Instance
 
+from ..bulk import encode_copy_row
 from ..models import Backup, Restore
 from ..storage import DictStorage
 from .helpers import compare_instances, largish_test_data
@@ -74,6 +77,56 @@ class RestoreTestCase(CleanupTestCaseMixin, TransactionTestCase):
             self.assertEqual(new_klass.objects_count, objects_count)
             self.assertEqual(new_klass.existing_indexes, backup_klass.existing_indexes)
 
+        restore = Restore.objects.get(backup=backup)
+        self.assertEqual(restore.status, Restore.STATUSES.SUCCESS)
+        self.assertRegex(restore.status_info, r'^Restored \d+ rows \(\d+ rows/s\)\.$')
+
+    def test_partial_restore_overwrites_existing_objects(self):
+        admin = G(Admin, is_active=True)
+        instance = G(Instance, owner=admin)
+
+        with instance_context(instance):
+            options = default_site.get_options_for_model(Channel)
+            channels = [G(Channel, name='channel%d' % i, description='backup')
+                        for i in range(3)]
+            channels_count = Channel.objects.count()
+
+            storage = DictStorage('DUMMY')
+            storage.start_model(options.get_name())
+            options.backup(storage)
+            storage.end_model()
+
+            Channel.objects.filter(pk=channels[0].pk).update(description='changed')
+            Channel.objects.filter(pk=channels[1].pk).delete()
+            # Object with the same name but different pk is overwritten as well
+            Channel.objects.filter(pk=channels[2].pk).update(id=channels[2].pk + 100)
+
+            with transaction.atomic():
+                storage.start_restore()
+                options.restore(storage, partial=True)
+
+            self.assertEqual(Channel.objects.count(), channels_count)
+            self.assertEqual(storage.restored_rows, channels_count)
+            for channel in channels:
+                self.assertEqual(Channel.objects.get(name=channel.name).description, 'backup')
+            self.assertEqual(Channel.objects.get(name=channels[2].name).pk, channels[2].pk + 100)
+
+    def test_objects_created_without_pk_are_not_returned(self):
+        admin = G(Admin, is_active=True)
+        instance = G(Instance, owner=admin)
+
+        with instance_context(instance):
+            options = default_site.get_options_for_model(Channel)
+            existing_channel = G(Channel, name='existing')
+            new_channel = N(Channel, name='new', id=None)
+
+            with transaction.atomic():
+                remaining = options.create_objects_without_pk([existing_channel, new_channel])
+
+            self.assertEqual(remaining, [existing_channel])
+            self.assertIsNotNone(new_channel.pk)
+            self.assertTrue(Channel.objects.filter(name='new').exists())
+
     def test_old_data_restore(self):
         from .old_instance import data
         storage = DictStorage('DUMMY')
@@ -130,3 +183,74 @@ class RestoreTestCase(CleanupTestCaseMixin, TransactionTestCase):
         self.assertEqual(restore1.status, Restore.STATUSES.SCHEDULED)
         self.assertEqual(restore2.status, Restore.STATUSES.ABORTED)
         self.assertEqual(restore2.status_info, 'Restore already scheduled on specified instance.')
+
+    def get_indexes(self, instance):
+        with connections[get_instance_db(instance)].cursor() as cursor:
+            cursor.execute('SELECT tablename, indexname FROM pg_indexes WHERE schemaname = %s', [instance.schema_name])
+            return set(cursor.fetchall())
+
+    def backup_and_restore(self):
+        with transaction.atomic():
+            instance = largish_test_data()
+        new_instance = G(Instance, owner=instance.owner)
+
+        storage = DictStorage('DUMMY')
+        default_site.backup_instance(storage, instance)
+        default_site.restore_to_new_schema(storage, new_instance)
+        new_instance.refresh_from_db()
+        return instance, new_instance
+
+    @mock.patch('apps.backups.options.ModelBackup.BATCH_SIZE', 5)
+    def test_full_restore_recreates_indexes(self):
+        instance, new_instance = self.backup_and_restore()
+        self.assertEqual(*compare_instances(instance, new_instance))
+        self.assertEqual(self.get_indexes(new_instance), self.get_indexes(instance))
+
+    @override_settings(BACKUPS_RESTORE_WITH_COPY=False)
+    @mock.patch('apps.backups.options.ModelBackup.BATCH_SIZE', 5)
+    def test_full_restore_without_copy(self):
+        instance, new_instance = self.backup_and_restore()
+        self.assertEqual(*compare_instances(instance, new_instance))
+
+
+@tag('benchmark')
+@override_settings(MIGRATION_MODULES={}, MIGRATION_CACHE=False)
+class BenchmarkRestore(BenchmarkMixin, CleanupTestCaseMixin, TransactionTestCase):
+    fixtures = ['core_data.json', ]
+    # Scale up (e.g. to 5M rows) when benchmarking against a local postgres
+    count = 100000
+    chunk_size = 10000
+
+    def create_data_objects(self, instance):
+        with instance_context(instance):
+            klass = G(Klass, name='benchmark', schema=[{'name': 'string', 'type': 'string', 'filter_index': True},
+                                                       {'name': 'int', 'type': 'integer', 'order_index': True}])
+            DataObject.load_klass(klass)
+            for offset in range(0, self.count, self.chunk_size):
+                DataObject.objects.bulk_create([DataObject(_klass=klass, string='string %d' % i, int=i)
+                                                for i in range(offset, min(offset + self.chunk_size, self.count))])
+
+    def test_full_restore(self):
+        admin = G(Admin, is_active=True)
+        instance = G(Instance, name='benchmark', owner=admin)
+        self.create_data_objects(instance)
+
+        for use_copy in (False, True):
+            storage = DictStorage('DUMMY')
+            default_site.backup_instance(storage, instance)
+            target_instance = G(Instance, owner=admin)
+
+            label = 'full restore ({})'.format('copy' if use_copy else 'bulk_create')
+            with override_settings(BACKUPS_RESTORE_WITH_COPY=use_copy), \
+                    self.measure(label, unit='rows') as result:
+                default_site.restore_to_new_schema(storage, target_instance)
+                result.count = storage.restored_rows
+
+
+class CopyEncodingTestCase(SimpleTestCase):
+    def test_encode_copy_row(self):
+        row = [1, None, True, 'a\tb\nc\\', datetime.date(2018, 1, 2), [1, None, 'x"y'], {'key': 'va"l', 'none': None},
+               b'\x01\xff']
+        self.assertEqual(encode_copy_row(row),
+                         '1\t\\N\tt\ta\\tb\\nc\\\\\t2018-01-02\t{"1",NULL,"x\\\\"y"}\t'
+                         '"key"=>"va\\\\"l", "none"=>NULL\t\\\\x01ff\n')
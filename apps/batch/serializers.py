@@ -14,3 +14,4 @@ class BatchRequestSerializer(serializers.Serializer):
 
 class BatchSerializer(serializers.Serializer):
     requests = BatchRequestSerializer(many=True)
+    parallel = serializers.BooleanField(default=False)
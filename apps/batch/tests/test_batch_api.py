@@ -1,4 +1,6 @@
 import json
+from concurrent.futures import Future
+from unittest import mock
 
 from django.conf import settings
 from django.test import override_settings
@@ -15,6 +17,21 @@ from apps.instances.models import Instance
 from apps.users.models import User
 
 
+class InlineExecutor:
+    """
+    Executor processing submitted sub-requests in place so that they share test transaction.
+    """
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, request, **kwargs):
+        self.submitted.append(request.path_info)
+        future = Future()
+        future.set_result(func(request, **kwargs))
+        return future
+
+
 class TestBatchesAPI(CleanupTestCaseMixin, APITestCase):
     def setUp(self):
         self.admin = G(Admin, is_active=True)
@@ -125,3 +142,43 @@ class TestBatchesAPI(CleanupTestCaseMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data[0]['code'], status.HTTP_405_METHOD_NOT_ALLOWED)
         self.assertEqual(response.data[0]['content'], {'detail': 'Batching not allowed.'})
+
+    def test_batch_reports_duration(self):
+        data = {'requests': [{'method': 'GET', 'path': '/v1/instances/%s/' % self.instance.name}]}
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data[0]['duration'], 0)
+
+    def test_parallel_batch(self):
+        klass = G(Klass, name='test', schema=[{'name': 'a', 'type': 'string'}])
+        instance_path = '/v1/instances/%s/' % self.instance.name
+        classes_path = '/v1/instances/%s/classes/' % self.instance.name
+        objects_path = '/v1/instances/%s/classes/%s/objects/' % (self.instance.name, klass.name)
+        data = {'parallel': True,
+                'requests': [{'method': 'GET', 'path': instance_path},
+                             {'method': 'POST', 'path': objects_path, 'body': {'a': 'test'}},
+                             {'method': 'GET', 'path': classes_path},
+                             {'method': 'GET', 'path': objects_path}]}
+        executor = InlineExecutor()
+
+        # Connections are not closed as sub-requests are processed in test transaction
+        with mock.patch('apps.batch.views.get_executor', mock.Mock(return_value=executor)), \
+                mock.patch('apps.batch.utils.close_old_connections'):
+            response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Data objects views load class schema process wide so they are never processed concurrently
+        self.assertEqual(executor.submitted, [instance_path, classes_path])
+        self.assertEqual([item['code'] for item in response.data],
+                         [status.HTTP_200_OK, status.HTTP_201_CREATED, status.HTTP_200_OK, status.HTTP_200_OK])
+        self.assertEqual(response.data[0]['content']['name'], self.instance.name)
+        self.assertEqual(response.data[3]['content']['objects'][0]['a'], 'test')
+
+    @override_settings(BATCH_CONCURRENCY=1)
+    def test_parallel_batch_without_concurrency(self):
+        data = {'parallel': True, 'requests': [{'method': 'GET', 'path': '/v1/instances/%s/' % self.instance.name}]}
+
+        with mock.patch('apps.batch.views.get_executor') as executor_mock:
+            response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['code'], status.HTTP_200_OK)
+        self.assertFalse(executor_mock.called)
@@ -1,14 +1,23 @@
 # coding=UTF8
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import rapidjson as json
 from django.conf import settings
+from django.db import close_old_connections
 from django.http import HttpResponseServerError
 from django.test.client import FakePayload, RequestFactory
 from django.urls import Resolver404, resolve
 
+from apps.core.helpers import get_prefetch_cache, get_request_cache
+from apps.instances.helpers import set_current_instance
+
 IGNORE_BODY_METHODS = ('GET', 'DELETE')
 AUTH_KEYS = ('user', 'auth', 'auth_user', 'staff_user', 'instance')
 HEADERS_TO_INCLUDE = ("HTTP_USER_AGENT", "HTTP_COOKIE")
 
+_executor = None
+
 
 class BatchRequestFactory(RequestFactory):
     """
@@ -46,6 +55,60 @@ class BatchRequestFactory(RequestFactory):
         return environ
 
 
+def get_executor():
+    """
+    Process wide pool shared by all batch requests so that number of concurrent sub-requests
+    (and database connections they hold) stays bounded.
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.BATCH_CONCURRENCY, thread_name_prefix='batch')
+    return _executor
+
+
+def is_concurrent_request(request):
+    """
+    Check if sub-request is read-only and its view does not depend on process wide state
+    so that it can be processed concurrently with other such sub-requests.
+    """
+    if request.method != 'GET':
+        return False
+
+    try:
+        resolver_match = resolve(request.path_info)
+    except Resolver404:
+        return True
+    view_class = getattr(resolver_match.func, 'cls', None)
+    return view_class is not None and getattr(view_class, 'batch_concurrent', True)
+
+
+def get_timed_response(request, **additional_kwargs):
+    start = time.perf_counter()
+    response, response_len = get_response(request, **additional_kwargs)
+    response['duration'] = round((time.perf_counter() - start) * 1000, 3)
+    return response, response_len
+
+
+def clear_thread_request_data():
+    get_request_cache().clear()
+    get_prefetch_cache().clear()
+    set_current_instance(None)
+
+
+def get_concurrent_response(request, **additional_kwargs):
+    """
+    Process sub-request in a pool thread. Request-local state of the thread (request cache, prefetch cache,
+    current instance) is cleared before and after, database connections are handled as on request end.
+    """
+    clear_thread_request_data()
+    try:
+        return get_timed_response(request, **additional_kwargs)
+    finally:
+        clear_thread_request_data()
+        close_old_connections()
+
+
 def get_response(request, **additional_kwargs):
     """
     Given a WSGI request, makes a call to a corresponding view
@@ -55,7 +118,7 @@ def get_response(request, **additional_kwargs):
     try:
         resolver_match = resolve(request.path_info)
     except Resolver404:
-        return {'code': 404, 'content': 'Invalid endpoint specified.'}
+        return {'code': 404, 'content': 'Invalid endpoint specified.'}, 0
 
     request.resolver_match = resolver_match
     view, args, kwargs = resolver_match
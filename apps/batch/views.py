@@ -7,7 +7,13 @@ from rest_framework.response import Response
 from apps.apikeys.permissions import IsApiKeyAccess
 from apps.batch.exceptions import BatchLimitExceeded
 from apps.batch.serializers import BatchSerializer
-from apps.batch.utils import get_response, get_wsgi_request_object
+from apps.batch.utils import (
+    get_concurrent_response,
+    get_executor,
+    get_timed_response,
+    get_wsgi_request_object,
+    is_concurrent_request
+)
 from apps.billing.permissions import OwnerInGoodStanding
 from apps.instances.mixins import InstanceBasedMixin
 
@@ -27,6 +33,29 @@ class BatchView(InstanceBasedMixin,
     def create_headers(self, request):
         return {'X_BATCHING': '1'}
 
+    def process_concurrently(self, wsgi_requests, **kwargs):
+        """
+        Process consecutive read-only sub-requests concurrently on a pool. Any other sub-request waits
+        for the ones declared before it and is processed in place, so declared order of writes is kept.
+        """
+        executor = get_executor()
+        results = [None] * len(wsgi_requests)
+        pending = {}
+
+        for i, wsgi_request in enumerate(wsgi_requests):
+            if is_concurrent_request(wsgi_request):
+                pending[i] = executor.submit(get_concurrent_response, wsgi_request, **kwargs)
+                continue
+
+            for j, future in pending.items():
+                results[j] = future.result()
+            pending = {}
+            results[i] = get_timed_response(wsgi_request, **kwargs)
+
+        for j, future in pending.items():
+            results[j] = future.result()
+        return results
+
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
 
@@ -38,16 +67,23 @@ class BatchView(InstanceBasedMixin,
                 raise BatchLimitExceeded(batch_limit)
 
             headers = self.create_headers(request)
-            max_response_size = settings.MAX_RESPONSE_SIZE
+            wsgi_requests = [get_wsgi_request_object(request._request,
+                                                     method=data['method'],
+                                                     url=data['path'],
+                                                     headers=headers,
+                                                     body=data['body'])
+                             for data in requests_data]
+
+            if serializer.validated_data['parallel'] and settings.BATCH_CONCURRENCY > 1:
+                results = self.process_concurrently(wsgi_requests, instance=request.instance)
+            else:
+                results = [get_timed_response(wsgi_request, instance=request.instance)
+                           for wsgi_request in wsgi_requests]
 
+            # Account response size in declared order so that it does not depend on completion order
+            max_response_size = settings.MAX_RESPONSE_SIZE
             responses = []
-            for data in requests_data:
-                wsgi_request = get_wsgi_request_object(request._request,
-                                                       method=data['method'],
-                                                       url=data['path'],
-                                                       headers=headers,
-                                                       body=data['body'])
-                response, response_len = get_response(wsgi_request, instance=request.instance)
+            for response, response_len in results:
                 if 'content' in response:
                     max_response_size -= response_len
                     max_response_size = max(max_response_size, 0)
@@ -228,7 +228,9 @@ class Discount(models.Model):
 
 
 class Transaction(models.Model):
-    SOURCES = HourAggregate.SOURCES
+    class SOURCES(MetaEnum):
+        API_CALL = 'api', 'api call'
+        CODEBOX_TIME = 'cbx', 'script execution time'
 
     admin = models.ForeignKey('admins.Admin', related_name='transactions', on_delete=models.CASCADE)
     instance_id = models.IntegerField()
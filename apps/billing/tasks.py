@@ -23,7 +23,7 @@ from .exceptions import InvoiceNotReady
 from .models import Invoice, InvoiceItem, PricingPlan, Profile, Subscription, Transaction, stripe
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
-BILLABLE_METRICS_SOURCES = (HourAggregate.SOURCES.API_CALL, HourAggregate.SOURCES.CODEBOX_TIME)
+BILLABLE_METRICS_SOURCES = HourAggregate.BILLABLE_SOURCES
 
 
 @register_task
@@ -9,8 +9,8 @@ from gevent.queue import Empty
 from munch import Munch
 from rest_framework import exceptions, status
 
-from apps.async_tasks.handlers import RedisPubSubHandler, WebSocketHandler
-from apps.channels.models import Change
+from apps.async_tasks.handlers import PatternPubSubHandler, WebSocketHandler
+from apps.channels.models import Change, Channel
 from apps.channels.v1.serializers import ChangeSerializer
 from apps.core.helpers import generate_key
 from apps.core.response import JSONResponse
@@ -26,7 +26,9 @@ CHANGE_ID_REGEX = re.compile(r'"id":\s*(\d+)')
 logger = logging.getLogger(__name__)
 
 
-class ChannelHandler(RedisPubSubHandler):
+class ChannelHandler(PatternPubSubHandler):
+    subscribe_pattern = Channel.STREAM_CHANNEL_TEMPLATE.split('{', 1)[0] + '*'
+
     @staticmethod
     def extract_change_id(change):
         result = CHANGE_ID_REGEX.search(change)
@@ -47,11 +49,9 @@ class ChannelHandler(RedisPubSubHandler):
             start_time = time.time()
             data_counter = maxsize
 
-            for change in self.get_change_from_database(environ, last_id, limit=maxsize):
+            for data in self.get_change_from_database(environ, last_id, limit=maxsize):
                 data_counter -= 1
-                last_id = change.id
-                data = ChangeSerializer(change, excluded_fields=('links', 'room',)).data
-                data = json.dumps(data)
+                last_id = self.extract_change_id(data)
                 yield data
 
             for ret in self.process_queue(queue, start_time, last_id, data_counter):
@@ -76,9 +76,13 @@ class ChannelHandler(RedisPubSubHandler):
             # End of results
             return
 
+    @staticmethod
+    def serialize_change(change):
+        return json.dumps(ChangeSerializer(change, excluded_fields=('links', 'room',)).data)
+
     def get_change_from_database(self, environ, last_id, limit=1):
         """
-        Process change from database.
+        Process change from database. Changes are yielded in their serialized form.
         """
         if last_id is None:
             return
@@ -87,8 +91,9 @@ class ChannelHandler(RedisPubSubHandler):
         instance_pk = int(environ['INSTANCE_PK'])
         channel_room = environ.get('CHANNEL_ROOM')
 
-        change_list = Change.list(min_pk=last_id + 1, ordering='asc', limit=limit,
-                                  channel=Munch(id=channel_pk), instance=Munch(id=instance_pk), room=channel_room)
+        change_list = Change.list_raw(self.serialize_change, min_pk=last_id + 1, ordering='asc', limit=limit,
+                                      channel=Munch(id=channel_pk), instance=Munch(id=instance_pk),
+                                      room=channel_room)
         for change in change_list:
             yield change
 
@@ -104,7 +109,7 @@ class ChannelPollHandler(ChannelHandler):
         return response
 
 
-class ChannelWSHandler(ChannelHandler, WebSocketHandler, RedisPubSubHandler):
+class ChannelWSHandler(ChannelHandler, WebSocketHandler):
     max_queue_size = 100
     discard_read_data = True
 
@@ -13,7 +13,7 @@ from apps.core.abstract_models import (
     TrackChangesAbstractModel
 )
 from apps.core.fields import DictionaryField, StrippedSlugField
-from apps.core.helpers import Cached, MetaIntEnum, redis
+from apps.core.helpers import Cached, MetaIntEnum
 from apps.core.permissions import API_PERMISSIONS, FULL_PERMISSIONS, Permission
 from apps.instances.helpers import get_current_instance
 from apps.redis_storage import fields as redis_fields
@@ -33,7 +33,6 @@ class Channel(AclAbstractModel, DescriptionAbstractModel, CacheableAbstractModel
     DEFAULT_NAME = 'default'
     EVENTLOG_NAME = 'eventlog'
 
-    PUBLISH_LOCK_KEY_TEMPLATE = 'lock:channel:publish:{instance_pk}:{channel_id}'
     STREAM_CHANNEL_TEMPLATE = 'stream:channel:{instance_pk}:{channel_id}'
 
     # v1 permission config
@@ -99,23 +98,17 @@ class Channel(AclAbstractModel, DescriptionAbstractModel, CacheableAbstractModel
     def __str__(self):
         return 'Channel[name=%s]' % self.name
 
-    def get_publish_lock_key(self, room):
-        return create_room_key(template=Channel.PUBLISH_LOCK_KEY_TEMPLATE, channel_id=self.id, channel_room=room)
-
     def get_stream_channel_name(self, room):
         return create_room_key(template=Channel.STREAM_CHANNEL_TEMPLATE, channel_id=self.id, channel_room=room)
 
     def create_change(self, room=None, **kwargs):
         from apps.channels.v1.serializers import ChangeSerializer
 
-        lock_key = self.get_publish_lock_key(room)
-        with redis.lock(lock_key, timeout=settings.LOCK_TIMEOUT, sleep=0.01):
-            change = Change.create(channel=self, room=room, **kwargs)
+        def serialize(change):
+            return json.dumps(ChangeSerializer(change, excluded_fields=('links',)).data)
 
-            message = ChangeSerializer(change, excluded_fields=('links',)).data
-            message = json.dumps(message)
-            redis.publish(self.get_stream_channel_name(room), message)
-            return change
+        return Change.create_and_publish(self.get_stream_channel_name(room), serialize,
+                                         channel=self, room=room, **kwargs)
 
     @classmethod
     def get_default(cls):
@@ -146,6 +139,7 @@ class Change(RedisModel):
     ttl = {Channel.EVENTLOG_NAME: settings.CODEBOX_TRACE_TTL, 'default': settings.CHANGES_TTL}
     trimmed_ttl = {Channel.EVENTLOG_NAME: settings.CODEBOX_TRACE_TRIMMED_TTL, 'default': settings.CHANGES_TRIMMED_TTL}
     tenant_model = True
+    raw_field = 'raw'
 
     created_at = redis_fields.DatetimeField(auto_now_add=True)
     action = redis_fields.IntegerField(default=ACTIONS.CUSTOM)
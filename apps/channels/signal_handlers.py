@@ -3,7 +3,7 @@ from django.dispatch import receiver
 
 from apps.channels.helpers import create_author_dict
 from apps.channels.models import Change, Channel
-from apps.core.signals import apiview_view_processed, post_tenant_migrate
+from apps.core.signals import apiview_bulk_processed, apiview_view_processed, post_tenant_migrate
 from apps.data.models import DataObject
 
 
@@ -33,6 +33,37 @@ def data_apiview_processed_handler(sender, view, instance, action, **kwargs):
                           action=action)
 
 
+@receiver(apiview_bulk_processed, sender=DataObject, dispatch_uid='channels_data_apiview_bulk_processed_handler')
+def data_apiview_bulk_processed_handler(sender, view, instances, action, **kwargs):
+    instances = [instance for instance in instances if instance.channel_id is not None]
+    if not instances:
+        return
+
+    action = Change.ACTIONS(action).value
+    request = view.request
+    author = create_author_dict(request)
+    metadata = {'type': 'object', 'class': view.klass.name}
+    checked_channels = set()
+
+    for instance in instances:
+        channel = instance.channel
+        if channel.pk not in checked_channels:
+            view.check_channel_permission(request, channel)
+            checked_channels.add(channel.pk)
+
+        changes = getattr(instance, 'changes', None)
+        if changes is not None:
+            changes.add('id')
+
+        payload = view.serializer_class(instance, fields=changes,
+                                        excluded_fields=('links', 'channel', 'channel_room')).data
+        channel.create_change(room=instance.channel_room,
+                              author=author,
+                              metadata=metadata,
+                              payload=payload,
+                              action=action)
+
+
 @receiver(post_tenant_migrate, dispatch_uid='create_default_channels_after_tenant_migrate')
 def create_default_channels_after_tenant_migrate(sender, tenant, created, partial, **kwargs):
     if not created:
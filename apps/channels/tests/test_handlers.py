@@ -4,6 +4,7 @@ from django.http.response import HttpResponseBase
 from django.test import TestCase, override_settings
 from gevent import queue
 
+from apps.async_tasks.handlers import PubSubHub
 from apps.channels.handlers import ChannelHandler, ChannelPollHandler, ChannelWSHandler
 from apps.core.helpers import generate_key
 from apps.core.tests.mixins import CleanupTestCaseMixin
@@ -15,6 +16,7 @@ class TestChannelHandlerSubscription(CleanupTestCaseMixin, TestCase):
 
     @mock.patch('apps.async_tasks.handlers.gevent.spawn', mock.MagicMock())
     @mock.patch('apps.async_tasks.handlers.redis', mock.MagicMock())
+    @mock.patch.dict(PubSubHub.hubs, clear=True)
     @mock.patch('apps.channels.handlers.ChannelHandler.get_change_from_database', mock.Mock(return_value=[]))
     def subscribe_to_channel(self, last_id=1, mock_args=None, maxsize=1):
         if not mock_args:
@@ -34,6 +36,10 @@ class TestChannelHandlerSubscription(CleanupTestCaseMixin, TestCase):
             self.assertEqual(event_mock.call_count, 3)
             self.assertEqual(result, [])
 
+    def test_subscription_is_shared(self):
+        self.assertEqual(ChannelHandler.subscribe_pattern, 'stream:channel:*')
+        self.assertIs(ChannelPollHandler().hub, ChannelWSHandler().hub)
+
     def test_timeout_on_getting_results_returns_empty_string(self):
         with mock.patch('apps.async_tasks.handlers.Queue') as queue_mock:
             queue_mock().get = mock.Mock(side_effect=queue.Empty)
@@ -1,9 +1,13 @@
+import collections
 import logging
 import os
+import queue
 import shutil
 import socket
 import subprocess
 import tempfile
+import threading
+import time
 
 from django.conf import settings
 from docker.errors import APIError
@@ -16,15 +20,229 @@ from .runtimes import IMAGE_GID, IMAGE_UID, RUNTIMES
 
 logger = logging.getLogger(__name__)
 
+EXIT_CODE_MARKER = '--exit-code:'
+
+
+class ContainerPool:
+    """
+    Pool of warm containers shared by runtimes with the same pool key (runtime alias or image).
+
+    Containers are checked out on request path and checked in dirty. Cleanup, wrapper re-exec, health checks
+    and refills are processed by a background refiller thread so that the next run does not wait for them.
+    `stats` keep track of checkouts, cold starts (checkouts that had to create a container in place)
+    and total checkout wait time.
+    """
+
+    def __init__(self, runtime_name, size):
+        self.runtime_name = runtime_name
+        self.size = size
+        self.idle = queue.Queue()
+        self.jobs = queue.Queue()
+        self.containers = {}
+        # Number of containers that are being created or cleaned up and will end up in idle queue
+        self.pending = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.stats = collections.Counter()
+        self.refiller = None
+
+    def checkout(self):
+        start = time.monotonic()
+        container_data = self._get_idle(block=False)
+        if container_data is None and self.pending > 0:
+            container_data = self._get_idle(timeout=settings.CODEBOX_CONTAINER_POOL_CHECKOUT_TIMEOUT)
+
+        if container_data is None:
+            self.stats['cold_starts'] += 1
+            container_data = self.create()
+            self.fill()
+
+        self.stats['checkouts'] += 1
+        self.stats['checkout_wait'] += time.monotonic() - start
+        return container_data
+
+    def checkin(self, container_data):
+        self._add_pending()
+        self.submit(self._cleanup, container_data)
+
+    def discard(self, container_data):
+        self.submit(self._discard, container_data)
+
+    def fill(self):
+        with self.lock:
+            missing = self.size - len(self.containers) - self.pending
+            self.pending += max(missing, 0)
+
+        for _ in range(missing):
+            self.submit(self._create)
+
+    def create(self):
+        container_data = ContainerManager.prepare_container(self.runtime_name)
+        with self.lock:
+            self.containers[container_data['id']] = container_data
+        self.stats['created'] += 1
+        return container_data
+
+    def dispose(self, container_data):
+        with self.lock:
+            self.containers.pop(container_data['id'], None)
+        ContainerManager.dispose_container(container_data)
+        self.stats['disposed'] += 1
+
+    def is_healthy(self, container_data):
+        sock = container_data.get('wrapper_socket')
+        if sock is not None and sock.fileno() == -1:
+            return False
+
+        try:
+            return docker_client.api.inspect_container(container_data['id'])['State']['Running']
+        except (APIError, Timeout):
+            return False
+
+    def health_check(self):
+        for _ in range(self.idle.qsize()):
+            container_data = self._get_idle(block=False)
+            if container_data is None:
+                break
+
+            if self.is_healthy(container_data):
+                self.idle.put(container_data)
+            else:
+                logger.warning("Docker container %s is unhealthy, replacing it.", container_data['id'])
+                self.stats['unhealthy'] += 1
+                self._discard(container_data)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats.update(size=self.size, idle=self.idle.qsize(), total=len(self.containers))
+        if self.stats['checkouts']:
+            stats['avg_checkout_wait'] = self.stats['checkout_wait'] / self.stats['checkouts']
+        return stats
+
+    def submit(self, func, *args):
+        if not settings.CODEBOX_CONTAINER_POOL_ASYNC:
+            func(*args)
+            return
+
+        self.ensure_refiller()
+        self.jobs.put((func, args))
+
+    def ensure_refiller(self):
+        # Start refiller lazily, thread does not survive fork so it needs to be restarted in worker process
+        if self.refiller is None or not self.refiller.is_alive():
+            self.refiller = threading.Thread(target=self.run_refiller, daemon=True)
+            self.refiller.start()
+
+    def run_refiller(self):
+        while True:
+            try:
+                job = self.jobs.get(timeout=settings.CODEBOX_CONTAINER_POOL_HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                job = (self.health_check, ())
+
+            if job is None:
+                return
+
+            func, args = job
+            try:
+                func(*args)
+            except Exception:
+                logger.warning("Container pool job for %s failed.", self.runtime_name, exc_info=1)
+
+    def close(self, timeout=30):
+        self.closed = True
+        if self.refiller is not None and self.refiller.is_alive():
+            self.jobs.put(None)
+            self.refiller.join(timeout)
+
+        with self.lock:
+            containers = list(self.containers.values())
+        for container_data in containers:
+            self.dispose(container_data)
+
+    def _get_idle(self, block=True, timeout=None):
+        try:
+            return self.idle.get(block=block, timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _add_pending(self, value=1):
+        with self.lock:
+            self.pending += value
+
+    def _release(self, container_data):
+        # Put container back into idle queue unless pool got closed or it is a surplus from a cold start
+        if self.closed or len(self.containers) > self.size:
+            self.dispose(container_data)
+        else:
+            self.idle.put(container_data)
+
+    def _create(self):
+        try:
+            container_data = self.create()
+        except Exception:
+            logger.warning("Couldn't prepare container for %s.", self.runtime_name, exc_info=1)
+        else:
+            self._release(container_data)
+        finally:
+            self._add_pending(-1)
+
+    def _cleanup(self, container_data):
+        try:
+            ContainerManager.cleanup_container(container_data, self.runtime_name)
+            healthy = self.is_healthy(container_data)
+        except Exception:
+            logger.warning("Cleanup wasn't fully successful, deleting container and recreating it.", exc_info=1)
+            healthy = False
+
+        try:
+            if healthy:
+                self._release(container_data)
+            else:
+                self._discard(container_data)
+        finally:
+            self._add_pending(-1)
+
+    def _discard(self, container_data):
+        self.dispose(container_data)
+        if not self.closed:
+            self.fill()
+
 
 class ContainerManager:
     local_cache = get_local_cache()
 
     @classmethod
-    def get_container_cache(cls):
-        if not hasattr(cls.local_cache, 'container_cache'):
-            cls.local_cache.container_cache = {}
-        return cls.local_cache.container_cache
+    def get_container_pools(cls):
+        if not hasattr(cls.local_cache, 'container_pools'):
+            cls.local_cache.container_pools = {}
+        return cls.local_cache.container_pools
+
+    @classmethod
+    def get_pool_key(cls, runtime_name):
+        runtime = RUNTIMES[runtime_name]
+        if runtime.get('wrapper'):
+            return runtime.get('alias', runtime_name)
+        return runtime['image']
+
+    @classmethod
+    def get_pool_size(cls, pool_key):
+        return max(runtime.get('pool_size', settings.CODEBOX_CONTAINER_POOL_SIZE)
+                   for runtime_name, runtime in RUNTIMES.items()
+                   if cls.get_pool_key(runtime_name) == pool_key)
+
+    @classmethod
+    def get_pool(cls, runtime_name):
+        container_pools = cls.get_container_pools()
+        pool_key = cls.get_pool_key(runtime_name)
+
+        if pool_key not in container_pools:
+            container_pools[pool_key] = ContainerPool(runtime_name, cls.get_pool_size(pool_key))
+        return container_pools[pool_key]
+
+    @classmethod
+    def get_pool_stats(cls):
+        return {pool_key: pool.get_stats() for pool_key, pool in cls.get_container_pools().items()}
 
     @classmethod
     def prepare_container(cls, runtime_name):
@@ -46,16 +264,21 @@ class ContainerManager:
 
     @classmethod
     def get_container(cls, runtime_name):
-        container_cache = cls.get_container_cache()
-        runtime = RUNTIMES[runtime_name]
-        if runtime.get('wrapper'):
-            cache_key = runtime.get('alias', runtime_name)
-        else:
-            cache_key = runtime['image']
+        return cls.get_pool(runtime_name).checkout()
+
+    @classmethod
+    def release_container(cls, container_data, runtime_name):
+        """
+        Return used container to the pool. It is cleaned up in the background before it is reused.
+        """
+        cls.get_pool(runtime_name).checkin(container_data)
 
-        if cache_key not in container_cache:
-            container_cache[cache_key] = cls.prepare_container(runtime_name)
-        return container_cache[cache_key]
+    @classmethod
+    def discard_container(cls, container_data, runtime_name):
+        """
+        Dispose of container that cannot be reused. Pool is refilled in the background.
+        """
+        cls.get_pool(runtime_name).discard(container_data)
 
     @classmethod
     def _create_container_directories(cls):
@@ -80,11 +303,20 @@ class ContainerManager:
                 shutil.rmtree(tmp_dir, ignore_errors=True)
             raise
 
+    @classmethod
+    def wrap_command(cls, cmd):
+        """
+        Wrap command so that non-zero exit code is reported on exec socket. When streaming results,
+        it is written at the end of stderr stream, otherwise it is the only output as streams are saved in /tmp.
+        """
+        if settings.CODEBOX_RESULT_STREAMING:
+            return "sh -c '{cmd} || printf \"\\n{marker}%d\" $? >&2'".format(cmd=cmd, marker=EXIT_CODE_MARKER)
+        return "sh -c '{cmd} > /tmp/stdout 2> /tmp/stderr || echo $?'".format(cmd=cmd)
+
     @classmethod
     def _prepare_wrapper(cls, container_data, runtime):
         cmd = runtime['command'].format(source=runtime['wrapper_source'].lstrip())
-        cmd = "sh -c '{cmd} > /tmp/stdout 2> /tmp/stderr || echo $?'".format(
-            cmd=cmd)
+        cmd = cls.wrap_command(cmd)
         execute = docker_client.api.exec_create(container_data['id'], cmd, stdin=True)
         sock = docker_client.api.exec_start(execute['Id'], socket=True)
         if hasattr(sock, '_sock'):
@@ -167,11 +399,11 @@ class ContainerManager:
     @classmethod
     def prepare_all_containers(cls):
         for runtime_name in RUNTIMES:
-            cls.get_container(runtime_name)
+            cls.get_pool(runtime_name).fill()
 
     @classmethod
     def dispose_all_containers(cls):
-        container_cache = cls.get_container_cache()
-        for container_data in container_cache.values():
-            cls.dispose_container(container_data)
-        container_cache.clear()
+        container_pools = cls.get_container_pools()
+        for pool in container_pools.values():
+            pool.close()
+        container_pools.clear()
@@ -3,16 +3,17 @@ import datetime
 import logging
 import os
 import socket
+import struct
 import time
 
 import rapidjson as json
 from django.conf import settings
 from django.utils.encoding import force_bytes
 from docker.errors import APIError
-from docker.utils.socket import frames_iter
+from docker.utils.socket import SocketError, frames_iter, read_exactly
 from requests.exceptions import ConnectionError, Timeout
 
-from apps.codeboxes.container_manager import ContainerManager
+from apps.codeboxes.container_manager import EXIT_CODE_MARKER, ContainerManager
 from apps.core.exceptions import SyncanoException
 from apps.core.helpers import docker_client, redis
 from apps.response_templates.models import ResponseTemplate
@@ -23,6 +24,24 @@ from .runtimes import RUNTIMES
 
 logger = logging.getLogger(__name__)
 
+STDOUT = 1
+STDERR = 2
+
+
+def iter_exec_frames(exec_socket):
+    """
+    Iterate over multiplexed docker exec socket and yield (stream, data) tuples.
+    """
+    while True:
+        try:
+            header = read_exactly(exec_socket, 8)
+        except SocketError:
+            return
+
+        stream, length = struct.unpack('>BxxxL', header)
+        if length:
+            yield stream, read_exactly(exec_socket, length)
+
 
 class CodeBoxRunner:
     """
@@ -146,32 +165,27 @@ class CodeBoxRunner:
         return self.container_manager.get_container(runtime_name)
 
     def cleanup_container(self, runtime_name, container_data):
-        try:
-            self.container_manager.cleanup_container(container_data, runtime_name)
-        except Exception:
-            self.logger.warning("Cleanup wasn't fully successful, deleting container and recreating it.", exc_info=1)
-            self.dispose_container(runtime_name, container_data)
+        self.container_manager.release_container(container_data, runtime_name)
 
     def dispose_container(self, runtime_name, container_data):
-        self.container_manager.dispose_container(container_data)
-        self.container_manager.prepare_container(runtime_name)
+        self.container_manager.discard_container(container_data, runtime_name)
 
     def execute_script(self, container_data, command, timeout):
         """
         Wait for script to stop and get it's results
         """
         try:
-            cmd = "sh -c 'timeout -s INT -k {force_timeout} {timeout} " \
-                  "{command} " \
-                  "> /tmp/stdout 2> /tmp/stderr || echo $?'".format(timeout=timeout,
-                                                                    force_timeout=timeout + 3,  # send kill after +3s
-                                                                    command=command)
+            cmd = "timeout -s INT -k {force_timeout} {timeout} {command}".format(
+                timeout=timeout,
+                force_timeout=timeout + 3,  # send kill after +3s
+                command=command)
+            cmd = self.container_manager.wrap_command(cmd)
 
             execute = docker_client.api.exec_create(container_data['id'], cmd)
             exec_socket = docker_client.api.exec_start(execute['Id'], socket=True)
             if hasattr(exec_socket, '_sock'):
                 exec_socket = exec_socket._sock
-            return self.handle_exec_socket(exec_socket, timeout)
+            return self.handle_exec(exec_socket, timeout)
         except (ConnectionError, APIError, socket.timeout, Timeout, ValueError) as e:
             self.logger.warning("Couldn't exec on container, %s.", container_data['id'], exc_info=1)
             raise CannotExecContainer(str(e))
@@ -189,26 +203,35 @@ class CodeBoxRunner:
         try:
             exec_socket.sendall(force_bytes(context))
             exec_socket.sendall(b'\n')
-            return self.handle_exec_socket(exec_socket, timeout)
+            return self.handle_exec(exec_socket, timeout)
         except (ConnectionError, APIError, socket.timeout, ValueError, IOError) as e:
             self.logger.warning("Couldn't handle wrapper socket on container, %s.", container_data['id'], exc_info=1)
             raise ScriptWrapperError(str(e))
 
+    def handle_exec(self, exec_socket, timeout):
+        """
+        Returns tuple of status and (stdout, stderr) tuple if result was streamed over exec socket or None otherwise.
+        """
+        if settings.CODEBOX_RESULT_STREAMING:
+            return self.handle_exec_stream(exec_socket, timeout)
+        return self.handle_exec_socket(exec_socket, timeout), None
+
+    @staticmethod
+    def get_exit_status(exit_code):
+        if exit_code == 0:
+            return Trace.STATUS_CHOICES.SUCCESS
+        if exit_code == 124:
+            # timeout command returns with 124 exit code when time out occurs
+            return Trace.STATUS_CHOICES.TIMEOUT
+        return Trace.STATUS_CHOICES.FAILURE
+
     def handle_exec_socket(self, exec_socket, timeout):
         try:
             # exec_start does not support timeout normally so we need to process timeout on raw socket.
             # As we are already running timeout script inside container, add some grace period (5s) to socket timeout.
             exec_socket.settimeout(timeout + 5)
             exec_result = b''.join(frames_iter(exec_socket))
-            exit_code = int(exec_result) if exec_result else 0
-
-            if exit_code == 0:
-                status = Trace.STATUS_CHOICES.SUCCESS
-            elif exit_code == 124:
-                # timeout command returns with 124 exit code when time out occurs
-                status = Trace.STATUS_CHOICES.TIMEOUT
-            else:
-                status = Trace.STATUS_CHOICES.FAILURE
+            status = self.get_exit_status(int(exec_result) if exec_result else 0)
         except socket.timeout:
             status = Trace.STATUS_CHOICES.TIMEOUT
         finally:
@@ -216,6 +239,53 @@ class CodeBoxRunner:
 
         return status
 
+    def handle_exec_stream(self, exec_socket, timeout):
+        """
+        Collect stdout and stderr from multiplexed exec socket as it arrives.
+        Reading stops as soon as output exceeds result size limit.
+        """
+        max_stream_length = settings.CODEBOX_RESULT_SIZE_LIMIT
+        # Leave some room for exit code that is written at the end of stderr
+        max_length = max_stream_length + len(EXIT_CODE_MARKER) + 8
+        streams = {STDOUT: bytearray(), STDERR: bytearray()}
+        length = 0
+        exceeded = False
+
+        try:
+            exec_socket.settimeout(timeout + 5)
+            for stream, data in iter_exec_frames(exec_socket):
+                if stream not in streams:
+                    continue
+                streams[stream] += data
+                length += len(data)
+                if length > max_length:
+                    exceeded = True
+                    break
+        except socket.timeout:
+            status = Trace.STATUS_CHOICES.TIMEOUT
+        else:
+            status = None
+        finally:
+            exec_socket.close()
+
+        stdout, stderr = bytes(streams[STDOUT]), bytes(streams[STDERR])
+        marker = b'\n' + force_bytes(EXIT_CODE_MARKER)
+        pos = stderr.rfind(marker)
+        exit_code = 0
+        if pos != -1:
+            try:
+                exit_code = int(stderr[pos + len(marker):])
+            except ValueError:
+                exit_code = 1
+            stderr = stderr[:pos]
+
+        if status is None:
+            status = Trace.STATUS_CHOICES.FAILURE if exceeded else self.get_exit_status(exit_code)
+
+        stdout = stdout[:max_stream_length]
+        stderr = stderr[:max_stream_length - len(stdout)]
+        return status, (stdout.decode(errors='replace'), stderr.decode(errors='replace'))
+
     def process(self, container_data, runtime_name, run_spec):
         """
         Prepare source code script, start it and collect results.
@@ -237,17 +307,21 @@ class CodeBoxRunner:
             f.write(user_source)
 
         if run_as_wrapper:
-            status = self.execute_wrapper(container_data, context={'ARGS': run_spec['additional_args'],
-                                                                   'CONFIG': run_spec['config'],
-                                                                   'META': run_spec['meta'],
-                                                                   '_OUTPUT_SEPARATOR': '"{}"'.format(separator)},
-                                          timeout=run_spec['timeout'])
+            status, streams = self.execute_wrapper(container_data,
+                                                   context={'ARGS': run_spec['additional_args'],
+                                                            'CONFIG': run_spec['config'],
+                                                            'META': run_spec['meta'],
+                                                            '_OUTPUT_SEPARATOR': '"{}"'.format(separator)},
+                                                   timeout=run_spec['timeout'])
         else:
             source_on_container = os.path.join(settings.CODEBOX_MOUNTED_SOURCE_DIRECTORY, source_name)
             command = runtime['command'].format(source_file=source_on_container)
 
-            status = self.execute_script(container_data, command, timeout=run_spec['timeout'])
-        return status, self.process_result(container_data, separator)
+            status, streams = self.execute_script(container_data, command, timeout=run_spec['timeout'])
+
+        if streams is None:
+            return status, self.process_result(container_data, separator)
+        return status, self.parse_result(*streams, separator=separator)
 
     def process_result(self, container_data, separator):
         max_stream_length = settings.CODEBOX_RESULT_SIZE_LIMIT
@@ -256,8 +330,11 @@ class CodeBoxRunner:
 
         max_stream_length -= len(stdout)
         with open(os.path.join(container_data['tmp_dir'], 'stderr')) as f:
-            stderr = f.read(max_stream_length).rstrip('\n')
+            stderr = f.read(max_stream_length)
+        return self.parse_result(stdout, stderr, separator)
 
+    def parse_result(self, stdout, stderr, separator):
+        stderr = stderr.rstrip('\n')
         result = {
             'stderr': stderr
         }
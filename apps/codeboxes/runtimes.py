@@ -308,6 +308,7 @@ RUNTIMES = {
     'nodejs_library_v1.0': {
         'image': IMAGE,
         'wrapper': True,
+        'pool_size': 3,
         'command': "node-lib1.0 -e '\\''{source}'\\''",
         'wrapper_source': NODEJS_WRAPPER_SOURCE_LIB,
         'file_ext': 'js',
@@ -324,6 +325,7 @@ RUNTIMES = {
     'nodejs_v6': {
         'image': IMAGE,
         'wrapper': True,
+        'pool_size': 2,
         'command': "node -e '\\''{source}'\\''",
         'wrapper_source': NODEJS_WRAPPER_SOURCE,
         'file_ext': 'js',
@@ -356,6 +358,7 @@ RUNTIMES = {
     'python_library_v5.0': {
         'image': IMAGE,
         'wrapper': True,
+        'pool_size': 2,
         'command': "python27-lib5.0 -u -c '\\''{source}'\\''",
         'wrapper_source': PYTHON_WRAPPER_SOURCE,
         'file_ext': 'py',
@@ -9,6 +9,7 @@ from django.db import router, transaction
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_text
 from munch import Munch
 from opencensus.ext.grpc import client_interceptor
 from settings.celeryconf import app, register_task
@@ -33,6 +34,7 @@ from apps.core.helpers import (
 from apps.core.mixins import TaskLockMixin
 from apps.instances.helpers import set_current_instance
 from apps.instances.models import Instance, InstanceIndicator
+from apps.sockets.cache import EndpointResultCache
 from apps.sockets.models import Socket, SocketEnvironment
 
 from .models import CodeBox, CodeBoxSchedule, CodeBoxTrace, ScheduleTrace, Trace
@@ -50,6 +52,60 @@ SPEC_TEMPLATE = 'codebox:spec:{instance_pk}:{incentive_pk}:{spec_id}'
 SPEC_TIMEOUT = 30 * 60  # 30 minutes
 GRPC_RUN_TIMEOUT = 10
 
+# Push spec to queue unless queue limit is exceeded.
+# KEYS: queue, concurrency counter
+# ARGV: queue limit, queue timeout, concurrency limit, spec key
+# Returns -1 if queue is full, otherwise 1 if there is a free slot for a runner to pick the spec up and 0 if not.
+ENQUEUE_SPEC_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return -1
+end
+redis.call('RPUSH', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+
+if tonumber(redis.call('GET', KEYS[2]) or 0) < tonumber(ARGV[3]) then
+    return 1
+end
+return 0
+"""
+enqueue_spec_script = redis.register_script(ENQUEUE_SPEC_SCRIPT)
+
+# Acquire concurrency slot and pop next spec, priority queue first.
+# Slot is only taken when there is a spec to process.
+# KEYS: concurrency counter, priority queue, queue
+# ARGV: concurrency limit, counter timeout
+# Returns spec key and queue it was popped from or nil.
+ACQUIRE_SPEC_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or 0) >= tonumber(ARGV[1]) then
+    return nil
+end
+
+for i = 2, 3 do
+    local spec_key = redis.call('LPOP', KEYS[i])
+    if spec_key then
+        redis.call('INCR', KEYS[1])
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+        return {spec_key, KEYS[i]}
+    end
+end
+return nil
+"""
+acquire_spec_script = redis.register_script(ACQUIRE_SPEC_SCRIPT)
+
+# Release concurrency slot.
+# KEYS: concurrency counter, priority queue, queue
+# ARGV: counter timeout
+# Returns number of specs still waiting in queues.
+RELEASE_SLOT_SCRIPT = """
+if redis.call('DECR', KEYS[1]) <= 0 then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return redis.call('LLEN', KEYS[2]) + redis.call('LLEN', KEYS[3])
+"""
+release_slot_script = redis.register_script(RELEASE_SLOT_SCRIPT)
+
 
 def _get_instance(instance_pk):
     try:
@@ -63,45 +119,45 @@ class CodeBoxRunTask(app.Task):
     default_retry_delay = 1
 
     def run(self, instance_pk, concurrency_limit):
-        limit_key = CODEBOX_COUNTER_TEMPLATE.format(instance=instance_pk)
+        keys = [CODEBOX_COUNTER_TEMPLATE.format(instance=instance_pk),
+                QUEUE_PRIORITY_TEMPLATE.format(instance=instance_pk),
+                QUEUE_TEMPLATE.format(instance=instance_pk)]
+
+        # Keep processing specs while there is a free slot. Runners that finish their spec pick up the rest
+        # of the queue so there is no need to requeue itself, unless max specs per task is exceeded.
+        for _ in range(settings.CODEBOX_RUNNER_MAX_SPECS_PER_TASK):
+            spec = self.acquire(keys, limit=concurrency_limit)
+            if spec is None:
+                return
 
-        # Check counter if I can run
-        if not self.can_run(limit_key, limit=concurrency_limit):
-            return
+            spec_key, queue = spec
+            retry_later = True
+            try:
+                retry_later = self.process_spec(spec_key, queue)
+            finally:
+                has_more = self.release(keys)
+                # If spec was put back or processing failed, pick up the rest of the queue after a delay
+                # so that the same spec is not retried right away.
+                if has_more and retry_later:
+                    self.apply_async(args=(instance_pk, concurrency_limit), countdown=self.default_retry_delay)
+
+            if not has_more or retry_later:
+                return
 
-        priority_queue = QUEUE_PRIORITY_TEMPLATE.format(instance=instance_pk)
-        normal_queue = QUEUE_TEMPLATE.format(instance=instance_pk)
-        queue = priority_queue
+        self.delay(instance_pk, concurrency_limit)
 
-        try:
-            spec_key = redis.lpop(queue)
-            if spec_key is None:
-                queue = normal_queue
-                spec_key = redis.lpop(queue)
-
-            if spec_key is not None:
-                self.process_spec(spec_key, queue)
-        finally:
-            self.cleanup(limit_key)
-            if redis.llen(priority_queue) > 0 or redis.llen(normal_queue) > 0:
-                # Requeue itself if needed
-                self.delay(instance_pk, concurrency_limit)
-
-    def can_run(self, limit_key, limit):
-        if redis.incr(limit_key) > limit:
-            redis.decr(limit_key)
-            return False
-        else:
-            redis.expire(limit_key, CODEBOX_COUNTER_TIMEOUT)
-        return True
+    def acquire(self, keys, limit):
+        spec = acquire_spec_script(keys=keys, args=(limit, CODEBOX_COUNTER_TIMEOUT))
+        if spec is not None:
+            return [force_text(v) for v in spec]
 
-    def cleanup(self, limit_key):
-        if redis.decr(limit_key) < 0:
-            redis.delete(limit_key)
-        else:
-            redis.expire(limit_key, CODEBOX_COUNTER_TIMEOUT)
+    def release(self, keys):
+        return release_slot_script(keys=keys, args=(CODEBOX_COUNTER_TIMEOUT,)) > 0
 
     def process_spec(self, spec_key, queue=None):
+        """
+        Run spec stored under spec_key. Returns True if spec was put back to the queue.
+        """
         logger = self.get_logger()
         runner = CodeBoxRunner(logger=logger)
 
@@ -133,15 +189,78 @@ class CodeBoxRunTask(app.Task):
                 self.get_logger().exception(exc)
             if queue is not None:
                 redis.lpush(queue, spec_key)
+                return True
         except Exception as exc:
             self.get_logger().exception(exc)
         else:
             redis.delete(spec_key)
 
 
-class BaseIncentiveTask(app.Task):
-    default_retry_delay = 1
+class GrpcRunnerMixin:
     grpc_run_retries = 5
+    runner = None
+
+    @classmethod
+    def create_grpc_request(cls, instance_pk, spec, files, source_hash, entrypoint,
+                            environment_hash='', environment_url='', output_limit=None):
+        return broker_pb2.SimpleRunRequest(
+            meta={
+                'files': files,
+                'environment_url': environment_url,
+                'trace': json.dumps(spec['trace']).encode(),
+                'trace_id': spec['trace']['id'],
+            },
+            lb_meta={
+                'concurrency_key': str(instance_pk),
+                'concurrency_limit': spec['run']['concurrency_limit'],
+            },
+            script_meta={
+                'runtime': spec['run']['runtime_name'],
+                'source_hash': source_hash,
+                'user_id': str(instance_pk),
+                'environment': environment_hash,
+                'options': {
+                    'entrypoint': entrypoint,
+                    'output_limit': output_limit or settings.CODEBOX_RESULT_SIZE_LIMIT,
+                    'timeout': int(spec['run']['timeout'] * 1000),
+                    'async': spec['run']['async'],
+                    'mcpu': spec['run']['mcpu'],
+                    'args': spec['run']['additional_args'].encode(),
+                    'config': spec['run']['config'].encode(),
+                    'meta': spec['run']['meta'].encode(),
+                },
+            },
+        )
+
+    def run_grpc(self, req):
+        logger = self.get_logger()
+
+        if self.runner is None:
+            tracer_interceptor = client_interceptor.OpenCensusClientInterceptor(
+                get_current_tracer(),
+                host_port=settings.CODEBOX_BROKER_GRPC)
+            channel = grpc.insecure_channel(settings.CODEBOX_BROKER_GRPC)
+            channel = grpc.intercept_channel(channel, tracer_interceptor)
+            self.runner = broker_pb2_grpc.ScriptRunnerStub(channel)
+
+        # Retry grpc Run if needed.
+        for i in range(self.grpc_run_retries + 1):
+            try:
+                response = self.runner.SimpleRun(req, timeout=GRPC_RUN_TIMEOUT)
+                for _ in response:
+                    # Drain response so it is processed and not queued
+                    pass
+                return
+            except Exception:
+                if i + 1 > self.grpc_run_retries:
+                    raise
+                logger.warning("gRPC run failed, retrying (try #%d out of %d)", i + 1, self.grpc_run_retries,
+                               exc_info=1)
+                time.sleep(1)
+
+
+class BaseIncentiveTask(GrpcRunnerMixin, app.Task):
+    default_retry_delay = 1
     incentive_class = None
     trace_type = None
     trace_class = None
@@ -149,8 +268,6 @@ class BaseIncentiveTask(app.Task):
     max_timeout = settings.CODEBOX_MAX_TIMEOUT
     default_timeout = settings.CODEBOX_DEFAULT_TIMEOUT
 
-    runner = None
-
     trace_type_map = {}
 
     def __new__(cls, *args, **kwargs):
@@ -270,17 +387,7 @@ class BaseIncentiveTask(app.Task):
         })
 
     def process_grpc(self, instance, incentive, spec):
-        logger = self.get_logger()
-
-        if self.runner is None:
-            tracer_interceptor = client_interceptor.OpenCensusClientInterceptor(
-                get_current_tracer(),
-                host_port=settings.CODEBOX_BROKER_GRPC)
-            channel = grpc.insecure_channel(settings.CODEBOX_BROKER_GRPC)
-            channel = grpc.intercept_channel(channel, tracer_interceptor)
-            self.runner = broker_pb2_grpc.ScriptRunnerStub(channel)
         socket = incentive.socket
-
         entrypoint = socket.get_local_path(incentive.codebox.path)
 
         # Add environment
@@ -297,51 +404,25 @@ class BaseIncentiveTask(app.Task):
             environment_hash = environment.get_hash()
             environment_url = environment.get_url()
 
-        req = broker_pb2.SimpleRunRequest(
-            meta={
-                'files': socket.get_files(),
-                'environment_url': environment_url,
-                'trace': json.dumps(spec['trace']).encode(),
-                'trace_id': spec['trace']['id'],
-            },
-            lb_meta={
-                'concurrency_key': str(instance.pk),
-                'concurrency_limit': spec['run']['concurrency_limit'],
-            },
-            script_meta={
-                'runtime': spec['run']['runtime_name'],
-                'source_hash': socket.get_hash(),
-                'user_id': str(instance.pk),
-                'environment': environment_hash,
-                'options': {
-                    'entrypoint': entrypoint,
-                    'output_limit': settings.CODEBOX_RESULT_SIZE_LIMIT,
-                    'timeout': int(spec['run']['timeout'] * 1000),
-                    'async': spec['run']['async'],
-                    'mcpu': spec['run']['mcpu'],
-                    'args': spec['run']['additional_args'].encode(),
-                    'config': spec['run']['config'].encode(),
-                    'meta': spec['run']['meta'].encode(),
-                },
-            },
-        )
-
-        # Retry grpc Run if needed.
-        for i in range(self.grpc_run_retries + 1):
-            try:
-                response = self.runner.SimpleRun(req, timeout=GRPC_RUN_TIMEOUT)
-                for _ in response:
-                    # Drain response so it is processed and not queued
-                    pass
-                return
-            except Exception:
-                if i + 1 > self.grpc_run_retries:
-                    raise
-                logger.warning("gRPC run failed, retrying (try #%d out of %d)", i + 1, self.grpc_run_retries,
-                               exc_info=1)
-                time.sleep(1)
+        self.run_grpc(self.create_grpc_request(instance.pk, spec, socket.get_files(), socket.get_hash(), entrypoint,
+                                               environment_hash, environment_url))
 
     def process(self, instance_pk, incentive_pk, **kwargs):
+        prepared = self.prepare_run(instance_pk, incentive_pk, **kwargs)
+        if prepared is None:
+            return
+
+        instance, incentive, spec = prepared
+        if self.is_grpc_run(incentive):
+            self.process_grpc(instance, incentive, spec)
+            return
+        self.enqueue_run(instance, incentive, spec)
+
+    def prepare_run(self, instance_pk, incentive_pk, **kwargs):
+        """
+        Load instance and incentive and create run spec.
+        Returns None if incentive cannot be run.
+        """
         logger = self.get_logger()
         instance = _get_instance(instance_pk)
         if instance is None:
@@ -367,28 +448,40 @@ class BaseIncentiveTask(app.Task):
             return
 
         logger.info('Running %s for %s.', incentive, instance)
+        return instance, incentive, spec
+
+    def is_grpc_run(self, incentive):
+        return incentive.socket is not None and incentive.socket.is_new_format
+
+    def enqueue_run(self, instance, incentive, spec):
+        """
+        Publish spec and push it onto per instance runner queue.
+        """
+        spec_key = self.publish_codebox_spec(instance.pk, incentive.pk, spec)
+        if not self.enqueue_spec(instance.pk, spec_key, spec['run']['concurrency_limit'],
+                                 priority=self.is_incentive_priority(instance, incentive)):
+            self.block_run('Blocked %s for %s, queue limit exceeded.',
+                           incentive, instance, spec)
 
-        if incentive.socket is not None and incentive.socket.is_new_format:
-            self.process_grpc(instance, incentive, spec)
-            return
-
-        spec_key = self.publish_codebox_spec(instance_pk, incentive_pk, spec)
-        if self.is_incentive_priority(instance, incentive):
+    def enqueue_spec(self, instance_pk, spec_key, concurrency_limit, priority=False):
+        """
+        Push published spec onto per instance runner queue. Returns False if queue limit is exceeded.
+        """
+        if priority:
             queue = QUEUE_PRIORITY_TEMPLATE.format(instance=instance_pk)
         else:
             queue = QUEUE_TEMPLATE.format(instance=instance_pk)
 
-        concurrency_limit = spec['run']['concurrency_limit']
-        if redis.llen(queue) >= settings.CODEBOX_QUEUE_LIMIT_PER_RUNNER * concurrency_limit:
-            self.block_run('Blocked %s for %s, queue limit exceeded.',
-                           incentive, instance, spec)
-            return
-
-        redis.rpush(queue, spec_key)
-        redis.expire(queue, QUEUE_TIMEOUT)
+        queued = enqueue_spec_script(keys=[queue, CODEBOX_COUNTER_TEMPLATE.format(instance=instance_pk)],
+                                     args=(settings.CODEBOX_QUEUE_LIMIT_PER_RUNNER * concurrency_limit,
+                                           QUEUE_TIMEOUT, concurrency_limit, spec_key))
+        if queued < 0:
+            return False
 
-        # Wake up codebox runner
-        CodeBoxRunTask.delay(instance_pk=instance.pk, concurrency_limit=concurrency_limit)
+        # Wake up codebox runner if there is a free slot, otherwise one of running ones will pick it up
+        if queued:
+            CodeBoxRunTask.delay(instance_pk=instance_pk, concurrency_limit=concurrency_limit)
+        return True
 
 
 @register_task
@@ -576,6 +669,10 @@ class SaveTraceTask(TraceBaseTask):
                               action=Change.ACTIONS.CUSTOM)
 
     def run(self, trace_spec, result_info):
+        # Pass result to endpoint cache first so that requests waiting for it get it as soon as possible
+        if 'cache' in trace_spec:
+            EndpointResultCache.fill(trace_spec['cache'], result_info)
+
         instance = self._get_instance(trace_spec)
         if not instance:
             return
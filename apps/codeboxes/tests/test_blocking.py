@@ -14,7 +14,7 @@ from apps.instances.helpers import set_current_instance
 from apps.instances.models import Instance
 
 from ..models import CodeBox, CodeBoxTrace
-from ..tasks import CODEBOX_COUNTER_TEMPLATE, CodeBoxRunTask, CodeBoxTask
+from ..tasks import CODEBOX_COUNTER_TEMPLATE, QUEUE_TEMPLATE, CodeBoxRunTask, CodeBoxTask
 
 KEY = CODEBOX_COUNTER_TEMPLATE
 
@@ -47,8 +47,8 @@ class TestBlockingCodeBoxes(CleanupTestCaseMixin, TestCase):
         self.admin.billing_profile.save()
         G(Invoice, admin=self.admin, period=Invoice.current_period(), amount=Decimal(99))
 
-    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock())
-    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.cleanup', mock.Mock())
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock(return_value=None))
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.release', mock.Mock(return_value=False))
     def test_if_codebox_run_increments_instance_counter(self):
         self.assertIsNone(redis.get(self.codebox_limit_key))
 
@@ -57,12 +57,64 @@ class TestBlockingCodeBoxes(CleanupTestCaseMixin, TestCase):
 
         self.assertEqual(redis.get(self.codebox_limit_key), b'1')
 
-    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock())
-    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.can_run', mock.Mock())
-    def test_if_executed_codebox_decrements_instance_counter(self):
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock(return_value=None))
+    def test_if_executed_codebox_releases_its_slot(self):
+        # Slot taken by another runner is kept
         self.assertEqual(redis.incr(self.codebox_limit_key), 1)
         CodeBoxTask.delay(**self.run_kwargs)
-        self.assertEqual(redis.get(self.codebox_limit_key), b'0')
+        self.assertEqual(redis.get(self.codebox_limit_key), b'1')
+        self.assertEqual(CodeBoxRunTask.process_spec.call_count, 1)
+
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock(return_value=True))
+    def test_requeued_spec_is_retried_later(self):
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay'):
+            CodeBoxTask.delay(**self.run_kwargs)
+        # Simulate process_spec putting spec back to queue
+        redis.rpush(QUEUE_TEMPLATE.format(instance=self.instance.pk), 'spec')
+
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.apply_async') as apply_mock:
+            CodeBoxRunTask.run(self.instance.pk, 1)
+        self.assertEqual(CodeBoxRunTask.process_spec.call_count, 1)
+        self.assertEqual(apply_mock.call_args[1]['countdown'], CodeBoxRunTask.default_retry_delay)
+        self.assertIsNone(redis.get(self.codebox_limit_key))
+
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock(side_effect=ValueError))
+    def test_failed_spec_processing_retries_rest_of_queue(self):
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay'):
+            for _ in range(2):
+                CodeBoxTask.delay(**self.run_kwargs)
+
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.apply_async') as apply_mock:
+            with self.assertRaises(ValueError):
+                CodeBoxRunTask.run(self.instance.pk, 1)
+        self.assertTrue(apply_mock.called)
+        self.assertEqual(redis.llen(QUEUE_TEMPLATE.format(instance=self.instance.pk)), 1)
+        self.assertIsNone(redis.get(self.codebox_limit_key))
+
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock(return_value=None))
+    def test_if_reached_concurrency_limit_keeps_spec_queued(self):
+        redis.set(self.codebox_limit_key, settings.BILLING_CONCURRENT_CODEBOXES['builder'])
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay') as delay_mock:
+            CodeBoxTask.delay(**self.run_kwargs)
+        self.assertFalse(delay_mock.called)
+
+        CodeBoxRunTask.delay(self.instance.pk, settings.BILLING_CONCURRENT_CODEBOXES['builder'])
+        self.assertFalse(CodeBoxRunTask.process_spec.called)
+        self.assertEqual(redis.llen(QUEUE_TEMPLATE.format(instance=self.instance.pk)), 1)
+
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.process_spec', mock.Mock(return_value=None))
+    def test_runner_processes_all_queued_specs_in_one_task(self):
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay') as delay_mock:
+            for _ in range(3):
+                CodeBoxTask.delay(**self.run_kwargs)
+            self.assertEqual(delay_mock.call_count, 3)
+
+        with mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay') as delay_mock:
+            CodeBoxRunTask.delay(self.instance.pk, 1)
+            self.assertFalse(delay_mock.called)
+
+        self.assertEqual(CodeBoxRunTask.process_spec.call_count, 3)
+        self.assertIsNone(redis.get(self.codebox_limit_key))
 
     @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay', mock.Mock())
     @override_settings(CODEBOX_QUEUE_LIMIT_PER_RUNNER=1)
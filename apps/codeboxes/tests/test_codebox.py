@@ -1,10 +1,12 @@
 # coding=UTF8
 import json
 import random
+import socket
+import struct
 from unittest import mock
 
 from django.conf import settings
-from django.test import TestCase, tag
+from django.test import TestCase, override_settings, tag
 from django_dynamic_fixture import G
 from requests import Timeout
 
@@ -15,10 +17,10 @@ from apps.instances.helpers import set_current_instance
 from apps.instances.models import Instance
 from apps.sockets.models import Socket
 
-from ..container_manager import ContainerManager
+from ..container_manager import EXIT_CODE_MARKER, ContainerManager, ContainerPool
 from ..exceptions import CannotCreateContainer
 from ..models import CodeBox, CodeBoxTrace
-from ..runner import CodeBoxRunner
+from ..runner import STDERR, STDOUT, CodeBoxRunner
 from ..runtimes import LATEST_NODEJS_LIB_RUNTIME, LATEST_NODEJS_RUNTIME, LATEST_PYTHON_RUNTIME
 
 
@@ -282,6 +284,96 @@ class TestContainerManager(CodeBoxCleanupTestMixin, TestCase):
         self.assertRaises(CannotCreateContainer, self.container_manager.prepare_container, LATEST_PYTHON_RUNTIME)
 
 
+@mock.patch('apps.codeboxes.container_manager.docker_client.api.inspect_container',
+            mock.Mock(return_value={'State': {'Running': True}}))
+@mock.patch('apps.codeboxes.container_manager.ContainerManager.cleanup_container', mock.Mock())
+class TestContainerPool(TestCase):
+    def setUp(self):
+        self.ids = iter(range(1000))
+        self.prepare_mock = mock.patch('apps.codeboxes.container_manager.ContainerManager.prepare_container',
+                                       side_effect=lambda runtime_name: {'id': next(self.ids)}).start()
+        self.dispose_mock = mock.patch('apps.codeboxes.container_manager.ContainerManager.dispose_container').start()
+        self.addCleanup(mock.patch.stopall)
+        self.pool = ContainerPool(LATEST_PYTHON_RUNTIME, size=1)
+
+    def test_checkout_reuses_cleaned_up_container(self):
+        container_data = self.pool.checkout()
+        self.pool.checkin(container_data)
+        self.assertEqual(self.pool.checkout(), container_data)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['cold_starts'], 1)
+        self.assertEqual(self.prepare_mock.call_count, 1)
+
+    def test_unhealthy_container_is_replaced(self):
+        container_data = self.pool.checkout()
+        with mock.patch('apps.codeboxes.container_manager.docker_client.api.inspect_container',
+                        return_value={'State': {'Running': False}}):
+            self.pool.checkin(container_data)
+
+        self.dispose_mock.assert_called_once_with(container_data)
+        self.assertNotEqual(self.pool.checkout(), container_data)
+        self.assertEqual(self.pool.get_stats()['cold_starts'], 1)
+
+    def test_surplus_containers_are_disposed_on_checkin(self):
+        containers = [self.pool.checkout(), self.pool.checkout()]
+        for container_data in containers:
+            self.pool.checkin(container_data)
+
+        self.assertEqual(self.dispose_mock.call_count, 1)
+        self.assertEqual(self.pool.get_stats()['total'], 1)
+
+    @override_settings(CODEBOX_CONTAINER_POOL_ASYNC=True)
+    def test_checkout_waits_for_background_refill(self):
+        self.addCleanup(self.pool.close)
+        self.pool.fill()
+        container_data = self.pool.checkout()
+        self.pool.checkin(container_data)
+        self.assertEqual(self.pool.checkout(), container_data)
+        self.assertEqual(self.pool.get_stats()['cold_starts'], 0)
+
+
+class TestExecStream(TestCase):
+    def setUp(self):
+        self.runner = CodeBoxRunner()
+        self.exec_socket, self.container_socket = socket.socketpair()
+        self.addCleanup(self.container_socket.close)
+
+    def send(self, *frames):
+        for stream, data in frames:
+            self.container_socket.sendall(struct.pack('>BxxxL', stream, len(data)) + data)
+        self.container_socket.shutdown(socket.SHUT_WR)
+
+    def test_collecting_streams(self):
+        self.send((STDOUT, b'hello '), (STDERR, b'oops\n'), (STDOUT, b'world'))
+        status, (stdout, stderr) = self.runner.handle_exec_stream(self.exec_socket, timeout=1)
+        self.assertEqual(status, CodeBoxTrace.STATUS_CHOICES.SUCCESS)
+        self.assertEqual(stdout, 'hello world')
+        self.assertEqual(stderr, 'oops\n')
+
+    def test_exit_code_is_read_from_stderr(self):
+        self.send((STDERR, b'timeout'), (STDERR, b'\n' + EXIT_CODE_MARKER.encode() + b'124'))
+        status, (stdout, stderr) = self.runner.handle_exec_stream(self.exec_socket, timeout=1)
+        self.assertEqual(status, CodeBoxTrace.STATUS_CHOICES.TIMEOUT)
+        self.assertEqual(stderr, 'timeout')
+
+    @override_settings(CODEBOX_RESULT_SIZE_LIMIT=10)
+    def test_reading_stops_on_exceeded_size_limit(self):
+        self.send((STDOUT, b'a' * 5), (STDOUT, b'b' * 100), (STDERR, b'never read'))
+        status, (stdout, stderr) = self.runner.handle_exec_stream(self.exec_socket, timeout=1)
+        self.assertEqual(status, CodeBoxTrace.STATUS_CHOICES.FAILURE)
+        self.assertEqual(stdout, 'aaaaabbbbb')
+        self.assertEqual(stderr, '')
+
+    def test_parsing_streamed_response(self):
+        separator = '--separator--'
+        stdout = 'log\n{}\n[201, "text/plain", "content", {{}}]\n'.format(separator)
+        result = self.runner.parse_result(stdout, '', separator=separator)
+        self.assertEqual(result['stdout'], 'log')
+        self.assertEqual(result['response'], {'status': 201, 'content_type': 'text/plain', 'content': 'content'})
+
+
 @tag('legacy_codebox')
 class TestInstanceConfigInCodeBox(CodeBoxCleanupTestMixin, TestCase):
     def setUp(self):
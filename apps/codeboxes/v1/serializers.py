@@ -8,7 +8,7 @@ from apps.codeboxes.helpers import create_crontab
 from apps.codeboxes.models import CodeBox, CodeBoxSchedule
 from apps.codeboxes.runtimes import RUNTIME_CHOICES
 from apps.core.field_serializers import JSONField
-from apps.core.mixins.serializers import CleanValidateMixin, DynamicFieldsMixin, HyperlinkedMixin
+from apps.core.mixins.serializers import CleanValidateMixin, CSerializerMixin, DynamicFieldsMixin, HyperlinkedMixin
 from apps.core.validators import DjangoValidator, PayloadValidator, validate_config
 
 CODEBOX_RESULT_PLACEHOLDER = {'__error__': 'Result is too big to show in trace.'}
@@ -50,7 +50,7 @@ class CodeBoxRunSerializer(serializers.Serializer):
     payload = JSONField(validators=[PayloadValidator()], default={})
 
 
-class TraceSerializer(DynamicFieldsMixin, HyperlinkedMixin, serializers.Serializer):
+class TraceSerializer(DynamicFieldsMixin, HyperlinkedMixin, CSerializerMixin, serializers.Serializer):
     id = serializers.IntegerField()
     status = serializers.CharField()
     executed_at = serializers.DateTimeField()
@@ -4,10 +4,10 @@ from rest_framework import serializers
 from apps.codeboxes.v1 import serializers as v1_serializers
 from apps.codeboxes.v1_1 import serializers as v1_1_serializers
 from apps.core.field_serializers import JSONField
-from apps.core.mixins.serializers import DynamicFieldsMixin, HyperlinkedMixin
+from apps.core.mixins.serializers import CSerializerMixin, DynamicFieldsMixin, HyperlinkedMixin
 
 
-class TraceSerializer(DynamicFieldsMixin, HyperlinkedMixin, serializers.Serializer):
+class TraceSerializer(DynamicFieldsMixin, HyperlinkedMixin, CSerializerMixin, serializers.Serializer):
     id = serializers.IntegerField()
     status = serializers.CharField()
     executed_at = serializers.DateTimeField()
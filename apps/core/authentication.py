@@ -30,25 +30,65 @@ class ApiKeyAuthentication(authentication.BaseAuthentication):
                 pass
 
         # Check if it is in POST (to avoid preflight)
-        if isinstance(request.data, dict):
-            return request.data.get('_api_key')
+        data = getattr(request, 'data', None)
+        if isinstance(data, dict):
+            return data.get('_api_key')
 
     @classmethod
     def get_user_key(cls, request):
         user_key = request.META.get('HTTP_X_USER_KEY') or request.GET.get('user_key') or request.GET.get('userkey')
         # Check if it is in POST (to avoid preflight)
-        if not user_key and isinstance(request.data, dict):
-            return request.data.get('_user_key')
+        data = getattr(request, 'data', None)
+        if not user_key and isinstance(data, dict):
+            return data.get('_user_key')
         return user_key
 
     @classmethod
     def get_staff_key(cls, request):
         return request.META.get('HTTP_X_STAFF_KEY') or request.GET.get('staff_key', request.GET.get('staffkey'))
 
+    @classmethod
+    def get_admin_lookup(cls, api_key):
+        return Cached(Admin, kwargs={'key': api_key})
+
+    @classmethod
+    def get_auth_lookup(cls, api_key, instance):
+        lookup_kwargs = {'key': api_key}
+        if instance:
+            lookup_kwargs['instance'] = instance
+        return Cached(ApiKey, kwargs=lookup_kwargs)
+
+    @classmethod
+    def get_auth_user_lookup(cls, user_key):
+        return Cached(User, kwargs=dict(key=user_key))
+
+    @classmethod
+    def get_lookups(cls, request, instance):
+        """
+        Get Cached lookups that authentication of request is going to need so that they can be prefetched at once.
+        """
+        lookups = []
+        api_key = cls.get_api_key(request)
+        if not api_key or not API_KEY_REGEX.match(api_key):
+            return lookups
+
+        if check_parity(api_key):
+            lookups.append(cls.get_admin_lookup(api_key))
+        else:
+            lookups.append(cls.get_auth_lookup(api_key, instance))
+            user_key = cls.get_user_key(request)
+            if user_key and get_current_instance():
+                lookups.append(cls.get_auth_user_lookup(user_key))
+
+        staff_key = cls.get_staff_key(request)
+        if staff_key and API_KEY_REGEX.match(staff_key) and check_parity(staff_key):
+            lookups.append(cls.get_admin_lookup(staff_key))
+        return lookups
+
     @classmethod
     def get_admin_by_key(cls, api_key):
         try:
-            return Cached(Admin, kwargs={'key': api_key}).get()
+            return cls.get_admin_lookup(api_key).get()
         except Admin.DoesNotExist:
             raise exceptions.AuthenticationFailed('No such API Key.')
 
@@ -68,12 +108,8 @@ class ApiKeyAuthentication(authentication.BaseAuthentication):
 
     @classmethod
     def get_auth(cls, api_key, instance):
-        lookup_kwargs = {'key': api_key}
-        if instance:
-            lookup_kwargs['instance'] = instance
-
         try:
-            return Cached(ApiKey, kwargs=lookup_kwargs).get()
+            return cls.get_auth_lookup(api_key, instance).get()
         except ApiKey.DoesNotExist:
             raise exceptions.AuthenticationFailed('No such API Key.')
 
@@ -83,7 +119,7 @@ class ApiKeyAuthentication(authentication.BaseAuthentication):
 
         if user_key:
             try:
-                return Cached(User, kwargs=dict(key=user_key)).get()
+                return cls.get_auth_user_lookup(user_key).get()
             except User.DoesNotExist:
                 pass
 
@@ -100,6 +136,9 @@ class ApiKeyAuthentication(authentication.BaseAuthentication):
         request._request.auth_user = None
 
         if api_key:
+            # Warm up all lookups in one go, this is a noop if they were already prefetched for current request
+            Cached.prefetch(self.get_lookups(request, instance))
+
             if not API_KEY_REGEX.match(api_key):
                 # Verify if we're dealing with a token
                 admin = self.get_admin_from_token(api_key, instance)
@@ -52,9 +52,8 @@ class FileSystemStorage(StorageWithTransactionSupportMixin, storage.FileSystemSt
         super().__init__(**settings)
 
     def copy(self, src_name, dest_name):
-        self.save(dest_name, self.open(src_name))
-
-        return dest_name
+        with self.open(src_name) as src_file:
+            return self.save(dest_name, src_file)
 
     def size(self, name):
         filename = os.path.join(self.location, name)
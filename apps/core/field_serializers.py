@@ -1,5 +1,9 @@
 # coding=UTF8
+from urllib.parse import quote
+
 import rapidjson as json
+from django.urls import NoReverseMatch
+from django.utils.http import RFC3986_SUBDELIMS
 from rest_framework import serializers
 from rest_framework.fields import empty
 from rest_framework.reverse import reverse
@@ -57,8 +61,12 @@ class HyperlinkedField(serializers.ReadOnlyField):
     type_name = 'HyperlinkedField'
     type_label = 'links'
 
+    # Placeholder args used for link templates, digits only so that they match typical url patterns
+    template_arg = '9{}9031337'
+
     def __init__(self, hyperlinks, *args, **kwargs):
         self.hyperlinks = hyperlinks
+        self._link_templates = {}
         super().__init__(*args, **kwargs)
 
     def get_field_info(self, field_info):
@@ -95,10 +103,39 @@ class HyperlinkedField(serializers.ReadOnlyField):
             view_args = view_args or []
             args = [self._get_attr(value, arg) for arg in view_args]
             if all(args):
-                links[name] = reverse(view_name, args=args, request=self.context.get('request'))
+                links[name] = self._reverse(view_name, args)
 
         return self.to_representation(links)
 
+    def _reverse(self, view_name, args):
+        """
+        Reverse link using template built once per view name, so that urls are not resolved for every object.
+        Falls back to regular reverse if template cannot be built.
+        """
+
+        key = (view_name, len(args))
+        if key not in self._link_templates:
+            self._link_templates[key] = self._get_link_template(view_name, len(args))
+
+        template = self._link_templates[key]
+        if template is None:
+            return reverse(view_name, args=args, request=self.context.get('request'))
+        return template.format(*[quote(str(arg), safe=RFC3986_SUBDELIMS + '/~:@') for arg in args])
+
+    def _get_link_template(self, view_name, args_count):
+        placeholders = [self.template_arg.format(i) for i in range(args_count)]
+        try:
+            url = reverse(view_name, args=placeholders, request=self.context.get('request'))
+        except NoReverseMatch:
+            return None
+
+        template = url.replace('{', '{{').replace('}', '}}')
+        for i, placeholder in enumerate(placeholders):
+            if template.count(placeholder) != 1:
+                return None
+            template = template.replace(placeholder, '{%d}' % i)
+        return template
+
     def _get_attr(self, obj, name):
         """
         This method will try to get attribute from either object or view.
@@ -126,18 +126,24 @@ class HStoreVirtualMixin(virtual.HStoreVirtualMixin):
         hstore_dictionary[self.source] = value
 
     def contribute_to_class(self, cls, name):
-        if self.choices:
-            setattr(cls, 'get_%s_display' % self.name,
-                    curry(cls._get_FIELD_display, field=self))
+        self.bind_to_class(cls, name)
+        self.attach_to_class(cls)
+        # add field to class
+        cls._meta.add_field(self, private=True)
+
+    def bind_to_class(self, cls, name):
         self.attname = name
         self.name = name
         self.model = cls
         # setting column as none will tell django to not consider this a concrete field
         self.column = None
+
+    def attach_to_class(self, cls):
+        if self.choices:
+            setattr(cls, 'get_%s_display' % self.name,
+                    curry(cls._get_FIELD_display, field=self))
         # Connect myself as the descriptor for this field
-        setattr(cls, name, self)
-        # add field to class
-        cls._meta.add_field(self, private=True)
+        setattr(cls, self.name, self)
 
 
 class HStoreDict(hstore_dict.HStoreDict):
@@ -154,26 +160,70 @@ class HStoreDescriptor(hstore_descriptors.HStoreDescriptor):
     _DictClass = HStoreDict
 
 
+class CompiledSchema:
+    """
+    Hstore virtual fields created out of schema once, so that they can be loaded on a model
+    without recreating them.
+    """
+
+    def __init__(self, hstore_field, schema):
+        self.schema = schema or None
+        self.schema_mode = bool(schema)
+        self.descriptor = HStoreDescriptor(hstore_field, schema_mode=self.schema_mode)
+        self.virtual_fields = {}
+        # Model specific data that is to be computed on first load
+        self.model_data = None
+
+        if not self.schema_mode:
+            return
+
+        hstore_field._validate_schema(schema)
+        for field in schema:
+            source = field.get('source', field['name'])
+            virtual_field = create_hstore_virtual_field(field['class'],
+                                                        field.get('kwargs', {}),
+                                                        field['name'],
+                                                        source,
+                                                        hstore_field.name)
+            virtual_field.bind_to_class(hstore_field.model, field['name'])
+            self.virtual_fields[source] = virtual_field
+
+
 class DictionaryField(hstore.DictionaryField):
+    compiled_schema = None
+
+    def compile_schema(self, schema):
+        return CompiledSchema(self, schema)
+
     def reload_schema(self, schema):
         """
         Reload schema arbitrarily at run-time
         """
-        if schema:
-            self._validate_schema(schema)
-            self.schema = schema
-            self.schema_mode = True
-            self.editable = False
-        else:
-            self.schema = None
-            self.schema_mode = False
-            self.editable = True
+        self.load_compiled_schema(self.compile_schema(schema))
+
+    def load_compiled_schema(self, compiled_schema):
+        """
+        Load precompiled schema on model class. Noop if it is already loaded.
+        """
+        if self.compiled_schema is compiled_schema:
+            return
+
+        cls = self.model
+        self.schema = compiled_schema.schema
+        self.schema_mode = compiled_schema.schema_mode
+        self.editable = not compiled_schema.schema_mode
         # remove any existing virtual field
         self._remove_hstore_virtual_fields()
         # set new descriptor on model class
-        setattr(self.model, self.name, HStoreDescriptor(self, schema_mode=self.schema_mode))
-        # create virtual fields
-        self._create_hstore_virtual_fields(self.model, self.name)
+        setattr(cls, self.name, compiled_schema.descriptor)
+        # attach virtual fields
+        if compiled_schema.schema_mode:
+            for field in compiled_schema.virtual_fields.values():
+                field.attach_to_class(cls)
+                cls._meta.private_fields.append(field)
+            cls._hstore_virtual_fields = compiled_schema.virtual_fields
+        cls._meta._expire_cache(reverse=False)
+        self.compiled_schema = compiled_schema
 
     def pre_save(self, model_instance, add):
         if hasattr(model_instance, '_hstore_virtual_fields'):
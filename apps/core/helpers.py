@@ -27,7 +27,7 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.cache.backends.locmem import LocMemCache
 from django.core.exceptions import EmptyResultSet
-from django.db import DEFAULT_DB_ALIAS, IntegrityError, models, router, transaction
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, models, router, transaction
 from django.db.models import AutoField
 from django.db.transaction import get_connection
 from django.urls import resolve
@@ -61,6 +61,8 @@ else:
 DEFAULT_CACHE_KEY_TEMPLATE = '{schema}:cache:py:%d:{lookup_key}:{kwargs_key}' % settings.CACHE_VERSION
 MODEL_VERSION_CACHE_KEY_TEMPLATE = '{schema}:cache:m:%d:{lookup_key}:{pk}:version' % settings.CACHE_VERSION
 FUNC_VERSION_CACHE_KEY_TEMPLATE = '0:cache:f:%d:{lookup_key}:{version_key}:version' % settings.CACHE_VERSION
+CACHE_INVALIDATION_CHANNEL = '0:cache:invalidate:%d' % settings.CACHE_VERSION
+COUNT_ESTIMATE_CACHE_KEY_TEMPLATE = '{schema}:cache:ce:%d:{hash}' % settings.CACHE_VERSION
 
 ALL_CONTROL_CHARACTERS = dict.fromkeys(range(33))
 
@@ -98,13 +100,13 @@ def get_request_cache():
     return LOCAL_STORAGE.request_cache
 
 
-def get_schema_cache():
+def get_prefetch_cache():
     """
-    Schema cache to be cleared before every request/task.
+    Prefetch cache holds values resolved by `Cached.prefetch`. It is to be cleared before every request/task.
     """
-    if not hasattr(LOCAL_STORAGE, 'schema_cache'):
-        LOCAL_STORAGE.schema_cache = dict()
-    return LOCAL_STORAGE.schema_cache
+    if not hasattr(LOCAL_STORAGE, 'prefetch_cache'):
+        LOCAL_STORAGE.prefetch_cache = dict()
+    return LOCAL_STORAGE.prefetch_cache
 
 
 _tracer_sampler = None
@@ -220,6 +222,174 @@ def add_post_transaction_error_operation(func, *args, **kwargs):
         get_last_transaction_block_list(using).append((False, func, args, kwargs))
 
 
+class VersionLeaseStore:
+    """
+    Process wide store of cache versions that are trusted for `LOCAL_CACHE_VERSION_LEASE` seconds
+    so that local cache hits do not need to check version in redis.
+
+    Version changes are broadcasted through redis pub/sub and evicted by a listener thread in every process.
+    Leases are not handed out until listener's subscription is confirmed. Lease is reserved before version is read
+    from redis so that eviction received while reading cancels it. Expired leases are purged at most once
+    per lease time so that only recently read versions are kept.
+    """
+
+    RECONNECT_DELAY = 1
+
+    def __init__(self):
+        self.leases = {}
+        self.stats = collections.Counter()
+        self.connected = False
+        self.pid = None
+        self.purge_at = 0
+        self.lock = threading.Lock()
+
+    @property
+    def lease_time(self):
+        return settings.LOCAL_CACHE_VERSION_LEASE
+
+    def get(self, version_key):
+        """
+        Return tuple of (version, ok). Version may be None when version key is not set.
+        """
+        if not self.lease_time:
+            return None, False
+
+        self.ensure_listener()
+        lease = self.leases.get(version_key)
+        if lease is None or lease[1] < time.monotonic():
+            self.stats['miss'] += 1
+            return None, False
+
+        self.stats['hit'] += 1
+        return lease[0], True
+
+    def reserve(self, version_key):
+        """
+        Reserve a lease before reading version from redis. Returns a token to pass to `set` or None.
+        """
+        if not self.lease_time or not self.connected:
+            return None
+
+        token = object()
+        with self.lock:
+            self.purge_expired()
+            # Expired until set, dropped by eviction in the meantime
+            self.leases[version_key] = (None, 0, token)
+        return token
+
+    def purge_expired(self):
+        # Called with lock held
+        now = time.monotonic()
+        if now < self.purge_at:
+            return
+
+        self.purge_at = now + self.lease_time
+        for version_key in [key for key, lease in self.leases.items() if lease[1] < now]:
+            del self.leases[version_key]
+
+    def set(self, version_key, version, token):
+        if token is None:
+            return
+
+        with self.lock:
+            lease = self.leases.get(version_key)
+            if lease is not None and lease[2] is token and self.connected:
+                self.leases[version_key] = (version, time.monotonic() + self.lease_time, token)
+
+    def evict(self, version_key):
+        with self.lock:
+            self.leases.pop(version_key, None)
+
+    def clear(self):
+        with self.lock:
+            self.connected = False
+            self.leases.clear()
+
+    def ensure_listener(self):
+        # Start listener lazily in every (forked) worker process
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+
+        with self.lock:
+            if self.pid == pid:
+                return
+            self.pid = pid
+            self.connected = False
+            self.leases.clear()
+        threading.Thread(target=self.listen, daemon=True).start()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = redis.pubsub()
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        self.connected = True
+                    elif message['type'] == 'message':
+                        self.evict(force_text(message['data']))
+            except Exception:
+                pass
+            finally:
+                self.clear()
+            time.sleep(self.RECONNECT_DELAY)
+
+
+version_leases = VersionLeaseStore()
+
+
+def set_cache_version(version_key, timeout):
+    """
+    Set new random version value so that old cache is correctly recognized even if race condition happens.
+    Change is broadcasted so that version leases are evicted in all processes.
+    """
+    version_leases.evict(version_key)
+    pipe = redis.pipeline(transaction=False)
+    pipe.set(version_key, generate_key(), ex=timeout)
+    pipe.publish(CACHE_INVALIDATION_CHANNEL, version_key)
+    pipe.execute()
+
+
+class LRUCache:
+    """
+    Process wide, thread safe cache of bounded size that discards least recently used items first.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                self.data.move_to_end(key)
+                return self.data[key]
+            except KeyError:
+                return default
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+        return value
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
 def get_lock_registry():
     if not hasattr(LOCAL_STORAGE, 'lock_registry'):
         LOCAL_STORAGE.lock_registry = collections.defaultdict(int)
@@ -346,12 +516,14 @@ class Cached:
 
         return value
 
-    def get(self):
+    def _lookup(self):
         # Check local storage on versioned data
         if self.is_versioned():
             cached_value, version, ok = self._get_cached_value(self._get_cache_storage(local=True))
-            if ok and self._check_version(cached_value, version):
-                return cached_value
+            if ok:
+                if self._check_version(cached_value, version, use_lease=True):
+                    return cached_value, True
+                version_leases.stats['stale'] += 1
 
         # Check global storage
         cached_value, version, ok = self._get_cached_value(self._get_cache_storage())
@@ -359,15 +531,121 @@ class Cached:
             if self.is_versioned():
                 if self._check_version(cached_value, version):
                     self.set_local(cached_value)
-                    return cached_value
+                    return cached_value, True
             else:
-                return cached_value
+                return cached_value, True
+        return None, False
+
+    def get(self):
+        prefetched = get_prefetch_cache().pop(self.cache_key, None)
+        if prefetched is not None:
+            cached_value, ok, self.version = prefetched
+        else:
+            cached_value, ok = self._lookup()
+
+        if ok:
+            return cached_value
 
         # Compute value
         cached_value = self._compute_value()
         self.set(cached_value)
         return cached_value
 
+    @classmethod
+    def get_many(cls, cached_list):
+        """
+        Resolve several Cached objects with as few redis round trips as possible. Only misses are computed.
+        """
+        cls.prefetch(cached_list)
+        return [cached.get() for cached in cached_list]
+
+    @classmethod
+    def prefetch(cls, cached_list):
+        """
+        Warm up several Cached objects at once so that subsequent `get()` of the same lookups
+        (within current request/task) do not need to query redis.
+
+        Versions of local hits and values of local misses are fetched with a single MGET.
+        Versions of global hits (that depend on cached object) require one more MGET.
+        """
+        prefetch_cache = get_prefetch_cache()
+        local_hits, global_lookups = cls._prefetch_local(cached_list, prefetch_cache)
+
+        value_keys = [cached.cache_key for cached in global_lookups]
+        version_keys = [cached.get_version_key(cached_value) for cached, cached_value, _ in local_hits]
+        if not value_keys and not version_keys:
+            return
+        lease_tokens = [version_leases.reserve(version_key) for version_key in version_keys]
+        results = redis.mget(value_keys + version_keys)
+
+        for version_key, lease_token, current_version in zip(version_keys, lease_tokens, results[len(value_keys):]):
+            version_leases.set(version_key, current_version, lease_token)
+        cls._resolve_versions(local_hits, results[len(value_keys):], prefetch_cache, local=True)
+
+        global_hits = cls._prefetch_global(global_lookups, results[:len(value_keys)], prefetch_cache)
+        if global_hits:
+            current_versions = redis.mget([cached.get_version_key(cached_value)
+                                           for cached, cached_value, _ in global_hits])
+            cls._resolve_versions(global_hits, current_versions, prefetch_cache)
+
+    @classmethod
+    def _prefetch_local(cls, cached_list, prefetch_cache):
+        """
+        Resolve local hits with a valid version lease. Returns list of (cached, value, version) of remaining local hits
+        and list of lookups that need to check global storage.
+        """
+        local_hits = []
+        global_lookups = []
+
+        for cached in cached_list:
+            if cached.cache_key in prefetch_cache:
+                continue
+
+            if cached.is_versioned():
+                cached_value, version, ok = cached._get_cached_value(cached._get_cache_storage(local=True))
+                if ok:
+                    current_version, leased = version_leases.get(cached.get_version_key(cached_value))
+                    if not leased:
+                        local_hits.append((cached, cached_value, version))
+                        continue
+                    if cached._compare_version(current_version, version):
+                        prefetch_cache[cached.cache_key] = (cached_value, True, cached.version)
+                        continue
+                    version_leases.stats['stale'] += 1
+            global_lookups.append(cached)
+        return local_hits, global_lookups
+
+    @classmethod
+    def _prefetch_global(cls, global_lookups, raw_values, prefetch_cache):
+        """
+        Resolve values fetched from global storage. Returns list of (cached, value, version) of versioned hits.
+        """
+        global_hits = []
+        for cached, raw_value in zip(global_lookups, raw_values):
+            if raw_value is None:
+                prefetch_cache[cached.cache_key] = (None, False, cached.version)
+                continue
+
+            cached_value, version = cache.client.decode(raw_value)
+            if cached.is_versioned():
+                global_hits.append((cached, cached_value, version))
+            else:
+                prefetch_cache[cached.cache_key] = (cached_value, True, cached.version)
+        return global_hits
+
+    @classmethod
+    def _resolve_versions(cls, hits, current_versions, prefetch_cache, local=False):
+        for (cached, cached_value, version), current_version in zip(hits, current_versions):
+            if cached._compare_version(current_version, version):
+                if not local:
+                    cached.set_local(cached_value)
+                prefetch_cache[cached.cache_key] = (cached_value, True, cached.version)
+            elif local:
+                # On a stale local hit, leave it to regular `get()` to fall back to global storage
+                version_leases.stats['stale'] += 1
+            else:
+                prefetch_cache[cached.cache_key] = (None, False, cached.version)
+
     def set(self, value):
         cache_storage = self._get_cache_storage()
 
@@ -393,11 +671,9 @@ class Cached:
 
     def invalidate(self, object=None, immediate=None):
         if object is not None and self.type == 'model' or self.version_key is not None:
-            # Set new random version value so that old cache is correctly recognized even if race condition happens.
-            # This way invalidates all cached fields at once.
+            # Set new version value. This way invalidates all cached fields at once.
             version_key = self.get_version_key(object)
-            self._queue_func(immediate, redis.set, name=version_key, value=generate_key(),
-                             ex=self.timeout + 300)
+            self._queue_func(immediate, set_cache_version, version_key=version_key, timeout=self.timeout + 300)
 
             if getattr(object, 'SYNC_INVALIDATION', False) and len(settings.LOCATIONS) > 1:
                 from apps.core.tasks import SyncInvalidationTask
@@ -422,8 +698,19 @@ class Cached:
         else:
             add_post_transaction_success_operation(function, **kwargs)
 
-    def _check_version(self, obj, version):
-        current_version = redis.get(self.get_version_key(obj))
+    def _check_version(self, obj, version, use_lease=False):
+        version_key = self.get_version_key(obj)
+        current_version, leased = None, False
+        if use_lease:
+            current_version, leased = version_leases.get(version_key)
+
+        if not leased:
+            lease_token = version_leases.reserve(version_key)
+            current_version = redis.get(version_key)
+            version_leases.set(version_key, current_version, lease_token)
+        return self._compare_version(current_version, version)
+
+    def _compare_version(self, current_version, version):
         if current_version:
             # Save current version as a new one, so it is used for `set`
             self.version = current_version
@@ -561,21 +848,73 @@ def evaluate_promises(data):
     return str(data) if isinstance(data, Promise) else data
 
 
-def get_count_estimate_from_queryset(queryset, real_limit=1000):
-    return get_count_estimate_from_query(queryset.query, real_limit=real_limit, using=queryset.db)
+def get_count_estimate_from_queryset(queryset, real_limit=1000, cache_timeout=None):
+    return get_count_estimate_from_query(queryset.query, real_limit=real_limit, using=queryset.db,
+                                         cache_timeout=cache_timeout)
 
 
-def get_count_estimate_from_query(query, real_limit=1000, using=None):
+def get_count_estimate_from_query(query, real_limit=1000, using=None, cache_timeout=None):
+    """
+    Estimate count of query results. With cache_timeout, result is cached per current schema and query hash.
+    """
     compiler = query.get_compiler(using)
     try:
         sql, params = compiler.as_sql()
     except EmptyResultSet:
         return 0
     cursor = compiler.connection.cursor()
-    sql = cursor.mogrify(sql, params)
-    sql = force_text(sql).replace("'", "''")
-    cursor.execute("SELECT count_estimate('%s', %d)" % (sql, real_limit))
-    return cursor.fetchone()[0]
+    sql = force_text(cursor.mogrify(sql, params))
+
+    if cache_timeout:
+        from apps.instances.helpers import get_current_instance
+
+        instance = get_current_instance()
+        cache_key = COUNT_ESTIMATE_CACHE_KEY_TEMPLATE.format(
+            schema=instance.id if instance else 0,
+            hash=sha1('{}:{}'.format(real_limit, sql).encode()).hexdigest())
+        count = redis.get(cache_key)
+        if count is not None:
+            return int(count)
+
+    cursor.execute("SELECT count_estimate('%s', %d)" % (sql.replace("'", "''"), real_limit))
+    count = cursor.fetchone()[0]
+    if cache_timeout:
+        redis.set(cache_key, count, ex=cache_timeout)
+    return count
+
+
+def bulk_update(model, objects, fields, using=None):
+    """
+    Update fields of given objects with a single UPDATE ... FROM (VALUES ...) statement.
+    Field pre_save is called for every object so that e.g. auto_now fields behave like in a regular save.
+    """
+    if not objects:
+        return
+
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    meta = model._meta
+    pk_field = meta.pk
+    fields = [meta.get_field(name) for name in fields]
+
+    row_sql = '({})'.format(', '.join(
+        '%s::{}'.format(field.rel_db_type(connection) if field.primary_key else field.db_type(connection))
+        for field in [pk_field] + fields))
+    params = []
+    for obj in objects:
+        params.append(obj.pk)
+        params += [field.get_db_prep_save(field.pre_save(obj, False), connection) for field in fields]
+
+    sql = 'UPDATE {table} SET {assignments} FROM (VALUES {rows}) AS v ({columns}) WHERE {table}.{pk} = v.{pk}'.format(
+        table=qn(meta.db_table),
+        assignments=', '.join('{column} = v.{column}'.format(column=qn(field.column)) for field in fields),
+        rows=', '.join([row_sql] * len(objects)),
+        columns=', '.join(qn(field.column) for field in [pk_field] + fields),
+        pk=qn(pk_field.column))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
 
 
 def camel_to_under(name):
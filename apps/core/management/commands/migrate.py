@@ -21,6 +21,8 @@ from apps.instances.helpers import (
     get_instance_db,
     get_public_schema_name,
     get_tenant_model,
+    get_unassigned_tenant,
+    is_unassigned_schema_name,
     schema_exists,
     set_current_instance
 )
@@ -145,6 +147,11 @@ class Command(BaseCommand):
 
     def migrate_tenant_apps(self, schema_name=None):
         apps = self.tenant_apps or self.installed_apps
+        if schema_name and is_unassigned_schema_name(schema_name):
+            # Spare and template schemas do not belong to any instance
+            self._migrate_tenants([get_unassigned_tenant(schema_name)], apps)
+            return
+
         tenants = get_tenant_model().objects.filter(location=settings.LOCATION)
 
         if schema_name:
@@ -13,8 +13,8 @@ from opencensus.ext.django.middleware import _get_current_tracer, utils
 from raven.contrib.django.resolver import RouteResolver
 
 from apps.core.helpers import (
+    get_prefetch_cache,
     get_request_cache,
-    get_schema_cache,
     get_tracer_exporter,
     get_tracer_propagator,
     get_tracer_sampler
@@ -27,7 +27,7 @@ logger = logging.getLogger(__name__)
 
 def clear_request_data():
     get_request_cache().clear()
-    get_schema_cache().clear()
+    get_prefetch_cache().clear()
     set_current_instance(None)
     DataObject.loaded_klass = None
 
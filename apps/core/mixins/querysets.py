@@ -23,5 +23,6 @@ class CountEstimateQuerySetMixin:
             sql = sql.replace("'", "''")
         return self.extra(select={param: b"count_estimate(%s, %d)" % (sql, real_limit)})
 
-    def count_estimate(self, real_limit=1000):
-        return get_count_estimate_from_query(self.query, using=self.db, real_limit=real_limit)
+    def count_estimate(self, real_limit=1000, cache_timeout=None):
+        return get_count_estimate_from_query(self.query, using=self.db, real_limit=real_limit,
+                                             cache_timeout=cache_timeout)
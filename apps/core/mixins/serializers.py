@@ -4,13 +4,14 @@ from functools import partial
 from django.conf import settings
 from django.utils.functional import cached_property
 from rest_framework import serializers
-from rest_framework.fields import empty, get_attribute
+from rest_framework.fields import SkipField, empty, get_attribute
 from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 
 import serializer
 from apps.core.exceptions import RevisionMismatch
-from apps.core.field_serializers import AclField, HyperlinkedField, JSONField
+from apps.core.field_serializers import AclField, DisplayedChoiceField, HyperlinkedField, JSONField
 from apps.core.helpers import get_from_request_query_params, revalidate_integrityerror
 from apps.core.validators import validate_metadata
 
@@ -118,7 +119,39 @@ class DynamicFieldsMixin:
         return fields
 
 
+BOOLEAN_REPRESENTATIONS = {True: True, False: False,
+                           't': True, 'True': True, '1': True,
+                           'f': False, 'False': False, '0': False}
+
+
 class CSerializerMixin:
+    """
+    Serializes data with C `serializer` extension.
+
+    Readable fields are compiled once per serializer into specs that tell the extension how to read and format
+    the value, so that plain model attributes, hstore virtual fields, datetimes and typed values (e.g. references)
+    are serialized without calling field methods. Other fields or values that do not match expected type
+    fall back to field's `get_attribute` and `to_representation`.
+
+    Serializers without `Meta.model` are expected to serialize plain attributes only.
+    """
+
+    # Converters of raw hstore values per field class, used when field does not define `hstore_converter`.
+    hstore_converters = (
+        (serializers.IntegerField, int),
+        (serializers.FloatField, float),
+        (serializers.CharField, None),
+        (serializers.BooleanField, BOOLEAN_REPRESENTATIONS),
+        (serializers.NullBooleanField, BOOLEAN_REPRESENTATIONS),
+    )
+    # Expected types of model attributes per field class, None passes value as is.
+    attribute_types = (
+        (serializers.IntegerField, int),
+        (serializers.CharField, str),
+        (serializers.BooleanField, bool),
+        (serializers.ReadOnlyField, None),
+    )
+
     def to_representation(self, value):
         """
         Returns the serialized data on the serializer.
@@ -131,10 +164,96 @@ class CSerializerMixin:
                 if accepted_renderer and not isinstance(accepted_renderer, BrowsableAPIRenderer):
                     # Do not use cserializer on browsable api renderer as it messes up html forms.
                     # Why? DRF to_native returns a MUCH slower magic dict filled with meta crap and ponies.
-                    return serializer.serialize(value, self._readable_fields)
+                    return serializer.serialize_compiled(value, self._cserializer_fields, SkipField)
 
         return super().to_representation(value)
 
+    @cached_property
+    def _cserializer_fields(self):
+        model = getattr(getattr(self, 'Meta', None), 'model', None)
+        hstore_fields = {field.name: field for field in getattr(model, '_hstore_virtual_fields', {}).values()}
+
+        if model is None:
+            model_attrs = None
+        elif hasattr(model, '_meta'):
+            model_attrs = {field.name: field.attname for field in model._meta.concrete_fields}
+        else:
+            # Redis model
+            model_attrs = {field: field for field in model.fields}
+
+        return tuple(self._compile_cserializer_field(field, hstore_fields, model_attrs)
+                     for field in self._readable_fields)
+
+    def _compile_cserializer_field(self, field, hstore_fields, model_attrs):
+        """
+        Returns spec tuple of (field_name, field, source, source_arg, converter, output, output_arg).
+        """
+
+        spec = (field.field_name, field, serializer.SOURCE_FIELD, None, None, serializer.OUTPUT_VALUE, None)
+        if len(field.source_attrs) != 1:
+            return spec
+        source = field.source_attrs[0]
+
+        if type(field).to_representation is serializers.PrimaryKeyRelatedField.to_representation:
+            if field.pk_field is None and field.use_pk_only_optimization() and model_attrs and source in model_attrs:
+                return spec[:2] + (serializer.SOURCE_ATTR, model_attrs[source], int, serializer.OUTPUT_VALUE, None)
+            return spec
+
+        output = self._get_cserializer_output(field)
+        if output is None or type(field).get_attribute is not serializers.Field.get_attribute:
+            return spec
+
+        if source in hstore_fields:
+            virtual_field = hstore_fields[source]
+            converter = getattr(field, 'hstore_converter', empty)
+            if converter is empty and output[0] == serializer.OUTPUT_VALUE:
+                converter = self._get_cserializer_converter(field, self.hstore_converters)
+            source, source_arg = serializer.SOURCE_HSTORE, (virtual_field.hstore_field_name, virtual_field.source)
+        elif model_attrs is None or source in model_attrs:
+            converter = self._get_cserializer_attribute_converter(field, output[0])
+            source, source_arg = serializer.SOURCE_ATTR, source
+        else:
+            return spec
+
+        if converter is empty:
+            return spec
+        return spec[:2] + (source, source_arg, converter) + output
+
+    def _get_cserializer_output(self, field):
+        """
+        Returns (output, output_arg) tuple or None if field's output is not supported.
+        """
+
+        as_dict = getattr(field, 'as_dict', None)
+        if isinstance(field, serializers.DateTimeField):
+            if getattr(field, 'format', api_settings.DATETIME_FORMAT) != settings.DATETIME_FORMAT or \
+                    not as_dict and type(field).to_representation is not serializers.DateTimeField.to_representation:
+                return None
+            return serializer.OUTPUT_DATETIME, {'type': as_dict} if as_dict else None
+
+        if as_dict:
+            if not hasattr(field, 'target'):
+                return None
+            return serializer.OUTPUT_TYPED, {'type': as_dict, 'target': field.target}
+        return serializer.OUTPUT_VALUE, None
+
+    def _get_cserializer_attribute_converter(self, field, output):
+        if output == serializer.OUTPUT_DATETIME:
+            return None
+        if output != serializer.OUTPUT_VALUE:
+            # Typed values are only kept in hstore
+            return empty
+
+        if type(field).to_representation is DisplayedChoiceField.to_representation:
+            return {value: display for value, display in field.choices.items()}
+        return self._get_cserializer_converter(field, self.attribute_types)
+
+    def _get_cserializer_converter(self, field, converters):
+        for field_class, converter in converters:
+            if type(field).to_representation is field_class.to_representation:
+                return converter
+        return empty
+
 
 class HyperlinkedMixin:
     """
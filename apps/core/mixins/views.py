@@ -3,9 +3,10 @@ from abc import ABC, abstractproperty
 from functools import partial
 
 import django_filters
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import router, transaction
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from django.views.generic import View
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, serializers, status
@@ -20,6 +21,7 @@ from apps.core.abstract_models import CacheableAbstractModel
 from apps.core.decorators import force_atomic
 from apps.core.exceptions import ModelNotFound, RequestLimitExceeded
 from apps.core.helpers import Cached, revalidate_integrityerror, validate_field
+from apps.core.renderers import JSONRenderer, StreamedList
 from apps.core.serializers import EndpointAclSerializer, NewNameSerializer
 from apps.core.signals import apiview_finalize_response, apiview_view_processed
 from apps.instances.helpers import get_instance_db
@@ -45,6 +47,47 @@ class SignalSenderModelMixin:
         return super().finalize_response(request, response, *args, **kwargs)
 
 
+class StreamingListMixin:
+    """
+    Streams large list pages instead of rendering whole response in memory at once.
+    List view is expected to pass serializer through `get_list_data`.
+    """
+
+    max_page_size = settings.STREAMING_LIST_MAX_PAGE_SIZE
+    streaming_list_key = 'objects'
+
+    def is_streaming_allowed(self, request):
+        # Batch and internal sub-requests (run_api_view) consume response data so they are never streamed
+        resolver_match = request._request.resolver_match
+        if request._request.META.get('X_BATCHING') == '1' or resolver_match is None \
+                or getattr(resolver_match.func, 'cls', None) is not type(self):
+            return False
+
+        renderer = getattr(request, 'accepted_renderer', None)
+        return type(renderer) is JSONRenderer and not renderer.get_indent(request.accepted_media_type, {})
+
+    def get_list_data(self, serializer):
+        if len(serializer.instance) >= settings.STREAMING_LIST_MIN_SIZE and self.is_streaming_allowed(self.request):
+            return StreamedList(serializer)
+        return serializer.data
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if isinstance(response, Response) and isinstance(response.data, dict) \
+                and isinstance(response.data.get(self.streaming_list_key), StreamedList):
+            renderer = response.accepted_renderer
+            streaming_response = StreamingHttpResponse(
+                renderer.render_stream(response.data, self.streaming_list_key, settings.STREAMING_LIST_CHUNK_SIZE),
+                status=response.status_code,
+                content_type='{}; charset={}'.format(renderer.media_type, renderer.charset))
+            for header, value in response.items():
+                if header != 'Content-Type':
+                    streaming_response[header] = value
+            return streaming_response
+        return response
+
+
 class AtomicMixin:
     def dispatch(self, request, *args, **kwargs):
         """
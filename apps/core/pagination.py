@@ -5,7 +5,9 @@ from datetime import datetime
 import rapidjson as json
 from django.conf import settings
 from django.db import connection
-from django.db.models import FieldDoesNotExist, Q
+from django.db.models import FieldDoesNotExist
+from django.db.models.expressions import Expression, OrderBy
+from django.db.models.sql.where import AND, ExtraWhere
 from django.template import loader
 from rest_framework.pagination import BasePagination, _positive_int
 from rest_framework.response import Response
@@ -14,6 +16,7 @@ from urlobject import URLObject
 
 from apps.core.exceptions import MalformedPageParameter, OrderByIncorrect
 from apps.core.helpers import get_from_request_query_params, validate_field
+from apps.data.helpers import get_order_index_expression
 
 Cursor = namedtuple('Cursor', ['direction', 'last_pk'])
 
@@ -71,7 +74,7 @@ class StandardPagination(BasePagination):
             self.object_list = []
             return self.object_list
 
-        object_list = list(queryset[:page_size])
+        object_list = self.get_object_list(queryset, page_size)
         has_more = len(object_list) >= page_size
 
         if reverse:
@@ -86,6 +89,9 @@ class StandardPagination(BasePagination):
 
         return self.object_list
 
+    def get_object_list(self, queryset, page_size):
+        return list(queryset[:page_size])
+
     def _process_object_pagination(self, queryset, cursor):
         # Ordering
         ordering = 'pk' if self.order_asc else '-pk'
@@ -243,6 +249,62 @@ class StandardPagination(BasePagination):
 OrderedCursor = namedtuple('Cursor', ['direction', 'last_pk', 'last_value'])
 
 
+class RawOrderExpression(Expression):
+    """
+    SQL expression rendered verbatim - unlike RawSQL it is not wrapped in additional parentheses.
+    """
+
+    def __init__(self, sql):
+        super().__init__()
+        self.sql = sql
+
+    def as_sql(self, compiler, connection):
+        return self.sql, []
+
+
+class KeysetQuery:
+    """
+    Builds ORDER BY and WHERE clauses of keyset pagination over (order expression, pk) pair.
+
+    Order expression is used verbatim in all clauses so for virtual fields it is the same as key expression
+    of order index. Cursor is applied with row value comparison that is used as index condition,
+    so that index is scanned starting at cursor position and deep pages are as cheap as the first one.
+    """
+
+    def __init__(self, model, expression):
+        qn = connection.ops.quote_name
+        self.expression = expression
+        self.pk_column = '{table}.{column}'.format(table=qn(model._meta.db_table), column=qn(model._meta.pk.column))
+
+    def order_by(self, queryset, descending=False):
+        return queryset.order_by(OrderBy(RawOrderExpression(self.expression), descending=descending),
+                                 OrderBy(RawOrderExpression(self.pk_column), descending=descending))
+
+    def where(self, queryset, sql, params=()):
+        queryset = queryset.all()
+        sql = sql.format(expression=self.expression, pk=self.pk_column)
+        queryset.query.where.add(ExtraWhere([sql], params), AND)
+        return queryset
+
+    def after(self, queryset, last_value, last_pk):
+        return self.where(queryset, '({expression}, {pk}) > (%s, %s)', (last_value, last_pk))
+
+    def before(self, queryset, last_value, last_pk):
+        return self.where(queryset, '({expression}, {pk}) < (%s, %s)', (last_value, last_pk))
+
+    def nulls(self, queryset):
+        return self.where(queryset, '{expression} IS NULL')
+
+    def not_nulls(self, queryset):
+        return self.where(queryset, '{expression} IS NOT NULL')
+
+    def nulls_after(self, queryset, last_pk):
+        return self.where(queryset, '{expression} IS NULL AND {pk} > %s', (last_pk,))
+
+    def nulls_before(self, queryset, last_pk):
+        return self.where(queryset, '{expression} IS NULL AND {pk} < %s', (last_pk,))
+
+
 class OrderedPagination(StandardPagination):
     """
     You can define additional orderable_fields that should be supported on a view.
@@ -270,6 +332,7 @@ class OrderedPagination(StandardPagination):
     def _process_object_pagination(self, queryset, cursor):
         self.order_by = get_from_request_query_params(self.request, self.ordering_param)
         self.order_by_field = None
+        self.tail_queryset = None
 
         if self.order_by is not None:
             return self._process_ordered_pagination(queryset, cursor)
@@ -279,15 +342,21 @@ class OrderedPagination(StandardPagination):
             return self._process_paginated_queryset(queryset, cursor)
         return queryset, False
 
+    def get_object_list(self, queryset, page_size):
+        object_list = super().get_object_list(queryset, page_size)
+
+        # Rows on the other side of nulls boundary are fetched with separate index scan
+        if self.tail_queryset is not None and len(object_list) < page_size:
+            object_list += super().get_object_list(self.tail_queryset, page_size - len(object_list))
+        return object_list
+
     def _process_ordered_pagination(self, queryset, cursor):
         # For order_by use keyset (seek method) pagination
         order_asc = self.order_asc = True
-        order_by = order_by_field = self.order_by
-        pk_order = 'pk'
+        order_by_field = self.order_by
 
-        if order_by.startswith('-'):
-            pk_order = '-pk'
-            order_by_field = order_by[1:]
+        if order_by_field.startswith('-'):
+            order_by_field = order_by_field[1:]
             order_asc = self.order_asc = False
 
         self.order_by_field = order_by_field
@@ -300,14 +369,7 @@ class OrderedPagination(StandardPagination):
 
         if order_field.column is None:
             # We're dealing with a virtual field (hstore based) so we need to check if it is indexed
-            order_field_column = self._get_virtual_field_column(order_field)
-            field_order = 'order_field'
-            if not order_asc:
-                field_order = '-order_field'
-
-            queryset = queryset.extra(
-                select={'order_field': order_field_column},
-                order_by=[field_order, pk_order])
+            order_expression = self._get_virtual_field_expression(order_field)
         else:
             # If we're not dealing with a virtual field, we can do it in a more sane way
             if order_by_field not in self.order_fields:
@@ -318,25 +380,26 @@ class OrderedPagination(StandardPagination):
                 return super()._process_object_pagination(queryset, cursor)
 
             qn = connection.ops.quote_name
-            queryset = queryset.order_by(order_by, pk_order)
-            order_field_column = '{table}.{column}'.format(table=qn(queryset.model._meta.db_table),
-                                                           column=qn(order_field.column))
+            order_expression = '{table}.{column}'.format(table=qn(queryset.model._meta.db_table),
+                                                         column=qn(order_field.column))
+
+        keyset = KeysetQuery(queryset.model, order_expression)
+        queryset = keyset.order_by(queryset, descending=not order_asc)
 
         if cursor.direction is not None:
             return self._process_ordered_paginated_queryset(queryset,
                                                             cursor,
                                                             order_field=order_field,
-                                                            column=order_field_column,
+                                                            keyset=keyset,
                                                             is_ascending=order_asc)
 
         return queryset, False
 
-    def _process_ordered_paginated_queryset(self, queryset, cursor, order_field, column,
-                                            is_ascending):
+    def _process_ordered_paginated_queryset(self, queryset, cursor, order_field, keyset, is_ascending):
         reverse = False
         forward = bool(cursor.direction)
         last_pk = cursor.last_pk
-        qn = connection.ops.quote_name
+        tail_queryset = None
 
         # Validate field value
         last_value = self.validate_field_value(order_field, cursor.last_value)
@@ -346,49 +409,45 @@ class OrderedPagination(StandardPagination):
             forward = not forward
 
         if last_pk:
-            pk_field = queryset.model._meta.pk.name
-
-            # To support nullable values, we need to change the query based on last_value being null or not
+            # Nulls are sorted last. Row value comparison never matches them, so when cursor is on the other side
+            # of nulls boundary, they are fetched separately after rows matching cursor are exhausted.
             if forward:
                 # Ascending
                 if last_value is None:
                     # Nulls Last, so if we got null value, find more nulls that have higher pk
-                    queryset = queryset.filter(
-                        Q(**{'{field}__isnull'.format(field=order_field.name): True}) & Q(pk__gt=last_pk))
+                    queryset = keyset.nulls_after(queryset, last_pk)
                 else:
-                    # Null value not yet reached, look for null values or with higher pair
-                    where_sql = '{order_field} IS NULL ' \
-                                'OR ({order_field}, {table}.{pk_field}) > (%s, %s)'
-                    where_sql = where_sql.format(table=qn(queryset.model._meta.db_table), order_field=column,
-                                                 pk_field=qn(pk_field))
-                    queryset = queryset.extra(where=[where_sql], params=[last_value, last_pk])
+                    # Null value not yet reached, look for higher pairs and then for null values
+                    tail_queryset = keyset.nulls(queryset)
+                    queryset = keyset.after(queryset, last_value, last_pk)
             else:
                 # Descending
                 if last_value is None:
-                    # Null value reached, look for values that are not null or other nulls with lower pk
-                    queryset = queryset.filter(
-                        Q(**{'{field}__isnull'.format(field=order_field.name): False}) |
-                        (Q(pk__lt=last_pk) & Q(**{'{field}__isnull'.format(field=order_field.name): True})))
+                    # Null value reached, look for other nulls with lower pk and then for values that are not null
+                    tail_queryset = keyset.not_nulls(queryset)
+                    queryset = keyset.nulls_before(queryset, last_pk)
                 else:
                     # Last value was not null, so proceed normally
-                    where_sql = '({order_field}, {table}.{pk_field}) < (%s, %s)'.format(
-                        table=qn(queryset.model._meta.db_table), order_field=column, pk_field=qn(pk_field))
-                    queryset = queryset.extra(where=[where_sql], params=[last_value, last_pk])
+                    queryset = keyset.before(queryset, last_value, last_pk)
 
         # To maintain proper order and expected results, double reverse if needed
         if is_ascending != forward:
             reverse = True
             queryset = queryset.reverse()
+            if tail_queryset is not None:
+                tail_queryset = tail_queryset.reverse()
+
+        self.tail_queryset = tail_queryset
         return queryset, reverse
 
-    def _get_virtual_field_column(self, order_field):
+    def _get_virtual_field_expression(self, order_field):
         if not order_field.order_index:
             raise OrderByIncorrect('Cannot use specified order_by field. Set required index on schema first.')
 
         # Sadly virtual field needs to have .column set to None to prevent Django from going crazy
-        # we need to get the column on our own and order by .extra
+        # we need to get the column on our own and use it in the same form as it is used in order index
         column = order_field.db_field(connection.ops.quote_name, connection)
-        return column
+        return get_order_index_expression(column)
 
     def get_next_cursor(self):
         if self.has_next is False:
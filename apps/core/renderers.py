@@ -41,6 +41,44 @@ class JSONRenderer(_JSONRenderer):
 
         return ret.encode()
 
+    def render_stream(self, data, list_key, chunk_size):
+        """
+        Render `data` into JSON incrementally. Lazy list under `list_key` is written first and encoded
+        in chunks of `chunk_size` objects, remaining keys (e.g. pagination links) are written at the end.
+        """
+        yield '{{{}:['.format(json.dumps(list_key)).encode()
+
+        separator = ''
+        for chunk in data[list_key].iter_chunks(chunk_size):
+            if chunk:
+                ret = json.dumps(evaluate_promises(chunk), ensure_ascii=self.ensure_ascii, number_mode=json.NM_NATIVE)
+                yield (separator + ret[1:-1]).encode()
+                separator = ','
+
+        data = {key: value for key, value in data.items() if key != list_key}
+        if data:
+            ret = json.dumps(evaluate_promises(data), ensure_ascii=self.ensure_ascii, number_mode=json.NM_NATIVE)
+            yield ('],' + ret[1:]).encode()
+        else:
+            yield b']}'
+
+
+class StreamedList:
+    """
+    List serializer data that is serialized lazily in chunks while response is being streamed.
+    """
+
+    def __init__(self, serializer):
+        self.serializer = serializer
+
+    def __len__(self):
+        return len(self.serializer.instance)
+
+    def iter_chunks(self, chunk_size):
+        instances = self.serializer.instance
+        for i in range(0, len(instances), chunk_size):
+            yield self.serializer.to_representation(instances[i:i + chunk_size])
+
 
 class PDFRenderer(BaseRenderer):
     media_type = 'application/pdf'
@@ -10,4 +10,5 @@ post_tenant_migrate = Signal(providing_args=['tenant', 'verbosity', 'using', 'cr
 post_full_migrate = Signal(providing_args=['verbosity', 'using'])
 
 apiview_view_processed = Signal(providing_args=['view', 'instance', 'action'])
+apiview_bulk_processed = Signal(providing_args=['view', 'instances', 'action'])
 apiview_finalize_response = Signal(providing_args=['view', 'request', 'response'])
@@ -1,12 +1,20 @@
 # coding=UTF8
+import logging
 import os
 import shutil
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
 
 from django.core.cache import cache
 from django.core.files.storage import default_storage
 
 from apps.core.helpers import get_local_cache
 from apps.core.middleware import clear_request_data
+from apps.data.models import compiled_schema_cache
+from apps.hosting.models import router_cache
+
+benchmark_logger = logging.getLogger('benchmark')
 
 
 def create_storage_path(prefix='test'):
@@ -18,6 +26,8 @@ class CleanupTestCaseMixin:
         cache.clear()
         clear_request_data()
         get_local_cache().clear()
+        compiled_schema_cache.clear()
+        router_cache.clear()
         default_storage.location = create_storage_path()
         super()._pre_setup()
 
@@ -26,3 +36,28 @@ class CleanupTestCaseMixin:
         if os.path.exists(storage_path):
             shutil.rmtree(storage_path)
         super()._post_teardown()
+
+
+class BenchmarkMixin:
+    """
+    Helpers for test cases tagged with 'benchmark'. Results are reported through 'benchmark' logger.
+    """
+
+    @contextmanager
+    def measure(self, label, count=None, unit='calls'):
+        """
+        Report time spent in a block along with throughput if `count` of processed units is passed.
+        Count can also be set on yielded result when it is only known at the end of a block.
+        """
+        result = SimpleNamespace(count=count, elapsed=None)
+        start = time.perf_counter()
+        yield result
+        result.elapsed = time.perf_counter() - start
+
+        if result.count is None:
+            self.report(label, '%.1fms', result.elapsed * 1000)
+        else:
+            self.report(label, '%.1fms, %.1f %s/s', result.elapsed * 1000, result.count / result.elapsed, unit)
+
+    def report(self, label, msg, *args):
+        benchmark_logger.info('%s: ' + msg, label, *args)
@@ -1,11 +1,12 @@
 # coding=UTF8
+import os
 from unittest import mock
 
 from django.db import models
 from django.test import TestCase, override_settings
 from django_dynamic_fixture import G
 
-from apps.core.helpers import Cached
+from apps.core.helpers import Cached, version_leases
 from apps.core.tests.mixins import CleanupTestCaseMixin
 
 from ..abstract_models import CacheableAbstractModel
@@ -57,3 +58,94 @@ class TestCacheableModel(CleanupTestCaseMixin, TestCase):
         self.assertTrue(task_mock.delay.called)
         version_key = Cached(CacheableSyncModel).get_version_key(obj)
         task_mock.delay.assert_called_with(version_key)
+
+    def test_get_many(self):
+        obj1 = G(CacheableModel, value='first')
+        obj2 = G(CacheableModel, value='second')
+        missing_pk = obj2.pk + 1
+
+        values = Cached.get_many([Cached(CacheableModel, kwargs={'pk': obj1.pk}),
+                                  Cached(CacheableModel, kwargs={'pk': obj2.pk})])
+        self.assertEqual([obj.value for obj in values], ['first', 'second'])
+
+        obj2.value = 'new'
+        obj2.save()
+        values = Cached.get_many([Cached(CacheableModel, kwargs={'pk': obj1.pk}),
+                                  Cached(CacheableModel, kwargs={'pk': obj2.pk})])
+        self.assertEqual([obj.value for obj in values], ['first', 'new'])
+
+        self.assertRaises(CacheableModel.DoesNotExist, Cached.get_many,
+                          [Cached(CacheableModel, kwargs={'pk': missing_pk})])
+
+    def test_prefetch_uses_single_round_trip_for_local_hits(self):
+        obj1 = G(CacheableModel, value='first')
+        obj2 = G(CacheableModel, value='second')
+        Cached(CacheableModel, kwargs={'pk': obj1.pk}).get()
+        Cached(CacheableModel, kwargs={'pk': obj2.pk}).get()
+
+        with mock.patch('apps.core.helpers.redis.get') as get_mock, \
+                mock.patch('apps.core.helpers.redis.mget', return_value=[None, None]) as mget_mock:
+            Cached.prefetch([Cached(CacheableModel, kwargs={'pk': obj1.pk}),
+                             Cached(CacheableModel, kwargs={'pk': obj2.pk})])
+            self.assertEqual(Cached(CacheableModel, kwargs={'pk': obj1.pk}).get().value, 'first')
+            self.assertEqual(Cached(CacheableModel, kwargs={'pk': obj2.pk}).get().value, 'second')
+
+        self.assertEqual(mget_mock.call_count, 1)
+        self.assertFalse(get_mock.called)
+
+    @override_settings(LOCAL_CACHE_VERSION_LEASE=60)
+    def test_version_lease(self):
+        obj = G(CacheableModel, value='initial')
+
+        with mock.patch.object(version_leases, 'leases', {}), \
+                mock.patch.object(version_leases, 'stats', version_leases.stats.copy()), \
+                mock.patch.object(version_leases, 'connected', True), \
+                mock.patch.object(version_leases, 'pid', os.getpid()):
+            for _ in range(2):
+                Cached(CacheableModel, kwargs={'pk': obj.pk}).get()
+
+            with mock.patch('apps.core.helpers.redis.get') as get_mock:
+                self.assertEqual(Cached(CacheableModel, kwargs={'pk': obj.pk}).get().value, 'initial')
+            self.assertFalse(get_mock.called)
+            self.assertEqual(version_leases.stats['hit'], 1)
+
+            obj.value = 'new'
+            obj.save()
+            self.assertEqual(Cached(CacheableModel, kwargs={'pk': obj.pk}).get().value, 'new')
+            self.assertEqual(version_leases.stats['stale'], 1)
+
+    @override_settings(LOCAL_CACHE_VERSION_LEASE=60)
+    def test_version_lease_is_cancelled_by_eviction_during_read(self):
+        with mock.patch.object(version_leases, 'leases', {}), \
+                mock.patch.object(version_leases, 'connected', True), \
+                mock.patch.object(version_leases, 'pid', os.getpid()):
+            lease_token = version_leases.reserve('key')
+            self.assertEqual(version_leases.get('key'), (None, False))
+            version_leases.evict('key')
+            version_leases.set('key', b'old', lease_token)
+            self.assertEqual(version_leases.get('key'), (None, False))
+
+            lease_token = version_leases.reserve('key')
+            version_leases.set('key', b'current', lease_token)
+            self.assertEqual(version_leases.get('key'), (b'current', True))
+
+    @override_settings(LOCAL_CACHE_VERSION_LEASE=60)
+    def test_expired_version_leases_are_purged(self):
+        with mock.patch.object(version_leases, 'leases', {}), \
+                mock.patch.object(version_leases, 'connected', True), \
+                mock.patch.object(version_leases, 'purge_at', 0), \
+                mock.patch.object(version_leases, 'pid', os.getpid()):
+            version_leases.set('expired', b'old', version_leases.reserve('expired'))
+            version_leases.set('current', b'current', version_leases.reserve('current'))
+            version, _, token = version_leases.leases['expired']
+            version_leases.leases['expired'] = (version, 0, token)
+
+            version_leases.purge_at = 0
+            version_leases.reserve('other')
+            self.assertNotIn('expired', version_leases.leases)
+            self.assertEqual(version_leases.get('current'), (b'current', True))
+
+    @override_settings(LOCAL_CACHE_VERSION_LEASE=60)
+    def test_version_lease_is_not_reserved_until_subscribed(self):
+        with mock.patch.object(version_leases, 'connected', False):
+            self.assertIsNone(version_leases.reserve('key'))
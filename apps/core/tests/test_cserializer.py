@@ -0,0 +1,141 @@
+# coding=UTF8
+from unittest import mock
+
+from django.test import override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+from django_dynamic_fixture import G
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from apps.codeboxes.models import CodeBox, CodeBoxTrace
+from apps.codeboxes.runtimes import LATEST_PYTHON_RUNTIME
+from apps.core.tests.mixins import BenchmarkMixin
+from apps.core.tests.testcases import SyncanoAPITestBase
+from apps.data.models import DataObject, Klass
+from apps.data.v1.serializers import DataObjectSerializer
+from apps.instances.helpers import set_current_instance
+from apps.users.models import User
+
+
+class CSerializerTestBase(SyncanoAPITestBase):
+    disable_user_profile = False
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+    def setUp(self):
+        super().setUp()
+
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'string', 'type': 'string'},
+                                      {'name': 'text', 'type': 'text'},
+                                      {'name': 'int', 'type': 'integer'},
+                                      {'name': 'float', 'type': 'float'},
+                                      {'name': 'bool', 'type': 'boolean'},
+                                      {'name': 'dt', 'type': 'datetime'},
+                                      {'name': 'array', 'type': 'array'},
+                                      {'name': 'object', 'type': 'object'},
+                                      {'name': 'geo', 'type': 'geopoint'},
+                                      {'name': 'ref', 'type': 'reference', 'target': 'self'},
+                                      {'name': 'rel', 'type': 'relation', 'target': 'self'}],
+                       name='test')
+        self.codebox = G(CodeBox, label='test', runtime_name=LATEST_PYTHON_RUNTIME, source='print(1)')
+
+    def create_objects(self, count):
+        url = reverse('v1:dataobject-list', args=(self.instance.name, self.klass.name))
+        for i in range(count):
+            data = {'string': 'string %d' % i, 'text': 'text', 'int': i, 'float': i / 2, 'bool': bool(i % 2),
+                    'dt': '2018-01-01T10:00:00.%06dZ' % i, 'array': [i, 'a'], 'object': {'key': i},
+                    'geo': {'longitude': 10, 'latitude': 20}, 'owner_permissions': 'write'}
+            if i:
+                data.update({'ref': i, 'rel': [i, i + 1]})
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def create_users(self, count):
+        for i in range(count):
+            User.objects.create(username='user%d' % i)
+
+    def create_traces(self, count):
+        for i in range(count):
+            CodeBoxTrace.create(codebox=self.codebox, status=CodeBoxTrace.STATUS_CHOICES.SUCCESS,
+                                executed_at=timezone.now(), duration=i, result={'stdout': str(i)})
+
+    def get_list(self, url):
+        response = self.client.get(url, {'page_size': 500})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+
+class TestCSerializer(CSerializerTestBase):
+    def assert_same_as_drf(self, url):
+        with override_settings(USE_CSERIALIZER=True):
+            data = self.get_list(url)
+        with override_settings(USE_CSERIALIZER=False):
+            expected = self.get_list(url)
+
+        self.assertTrue(expected['objects'])
+        self.assertEqual(data, expected)
+        return data
+
+    def test_data_objects(self):
+        self.create_objects(3)
+        for version in ('v1', 'v2'):
+            url = reverse('{}:dataobject-list'.format(version), args=(self.instance.name, self.klass.name))
+            data = self.assert_same_as_drf(url)
+            self.assertEqual(data['objects'][-1]['ref'], {'type': 'reference', 'target': 'self', 'value': 2})
+            self.assertEqual(data['objects'][-1]['dt'], {'type': 'datetime', 'value': '2018-01-01T10:00:00.000002Z'})
+
+    def test_data_objects_with_values_set_in_python(self):
+        self.create_objects(2)
+        DataObject.load_klass(self.klass)
+        obj = DataObject.objects.last()
+        # Values that were set but not loaded from database are of native types
+        obj.int = 10
+        obj.bool = True
+        obj.dt = timezone.now()
+        obj.rel = [1]
+        context = {'request': mock.Mock(accepted_renderer=JSONRenderer())}
+
+        with override_settings(USE_CSERIALIZER=True):
+            data = DataObjectSerializer(obj, context=context, excluded_fields=('links',)).data
+        with override_settings(USE_CSERIALIZER=False):
+            expected = DataObjectSerializer(obj, context=context, excluded_fields=('links',)).data
+        self.assertEqual(data, expected)
+        self.assertEqual(data['int'], 10)
+
+    def test_users(self):
+        self.create_users(3)
+        self.assert_same_as_drf(reverse('v1:user-list', args=(self.instance.name,)))
+
+    def test_traces(self):
+        self.create_traces(3)
+        for version in ('v1', 'v2'):
+            url = reverse('{}:codebox-trace-list'.format(version), args=(self.instance.name, self.codebox.id))
+            self.assert_same_as_drf(url)
+
+
+@tag('benchmark')
+class BenchmarkCSerializer(BenchmarkMixin, CSerializerTestBase):
+    # Below STREAMING_LIST_MIN_SIZE so that whole response is rendered at once
+    count = 150
+
+    def measure_list(self, label, url):
+        for use_cserializer in (False, True):
+            with override_settings(USE_CSERIALIZER=use_cserializer):
+                # Warm up caches
+                self.get_list(url)
+                with self.measure('{} ({})'.format(label, 'cserializer' if use_cserializer else 'drf'),
+                                  unit='objects') as result:
+                    result.count = len(self.get_list(url)['objects'])
+
+    def test_data_objects(self):
+        self.create_objects(self.count)
+        self.measure_list('data objects', reverse('v2:dataobject-list', args=(self.instance.name, self.klass.name)))
+
+    def test_users(self):
+        self.create_users(self.count)
+        self.measure_list('users', reverse('v1:user-list', args=(self.instance.name,)))
+
+    def test_traces(self):
+        self.create_traces(CodeBoxTrace.list_max_size)
+        self.measure_list('traces', reverse('v2:codebox-trace-list', args=(self.instance.name, self.codebox.id)))
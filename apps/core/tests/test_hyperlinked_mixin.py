@@ -4,8 +4,9 @@ from unittest import mock
 
 from django.http import HttpRequest
 from django.test import TestCase
-from django.urls import NoReverseMatch
+from django.urls import NoReverseMatch, reverse
 from rest_framework import serializers
+from rest_framework.reverse import reverse as drf_reverse
 from rest_framework.versioning import NamespaceVersioning
 
 from apps.core.mixins.serializers import HyperlinkedMixin
@@ -117,3 +118,13 @@ class HyperlinkedMixinTestCase(TestCase):
 
         with self.assertRaises(NoReverseMatch):
             self.serializer.data
+
+    def test_hyperlinks_reversed_once_per_view(self):
+        comments = [Comment(email='leila@example.com', content='foo-%d' % i) for i in range(3)]
+
+        with mock.patch('apps.core.field_serializers.reverse', wraps=drf_reverse) as reverse_mock:
+            links = [self.field.to_representation(comment)['self'] for comment in comments]
+
+        self.assertEqual(reverse_mock.call_count, 1)
+        self.assertEqual(links, [reverse('v1:apikey-detail', args=(comment.content, comment.pk))
+                                 for comment in comments])
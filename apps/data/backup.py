@@ -7,8 +7,9 @@ from munch import Munch
 
 from apps.backups import site
 from apps.backups.options import ModelBackup
+from apps.core.helpers import add_post_transaction_success_operation
 from apps.data.tasks import IndexKlassTask
-from apps.instances.helpers import get_current_instance
+from apps.instances.helpers import get_current_instance, get_instance_db
 
 from .exceptions import KlassCountExceeded
 from .helpers import upload_file_to
@@ -56,14 +57,19 @@ class DataObjectBackup(ModelBackup):
     def backup_object(self, storage, obj):
         for key in obj['_files']:
             path = obj['_data'][key]
-            obj['_data'][key] = storage.add_file(default_storage.open(path))
+            obj['_data'][key] = storage.add_file(path)
         super().backup_object(storage, obj)
 
     def restore(self, storage, restore_context=None):
         # Get rid of any schema associated with DataObject, because it could
         # introduce other Klass-es fields to _data dictionary
         DataObject._meta.get_field('_data').reload_schema(None)
-        return super().restore(storage, restore_context)
+        super().restore(storage, restore_context)
+
+        # Objects are restored in bulk so live counters have to be rebuilt
+        instance = get_current_instance()
+        add_post_transaction_success_operation(Klass.invalidate_objects_counts, instance,
+                                               using=get_instance_db(instance))
 
     def to_instance(self, storage, representation):
         for file_field in representation['_files']:
@@ -6,6 +6,7 @@ import rapidjson as json
 from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
 from rest_framework.settings import api_settings
 from rest_framework.utils import humanize_datetime
@@ -20,6 +21,15 @@ from apps.data.mixins import (
 from apps.data.validators import ArrayValidator, ObjectValidator, check_extension_length
 
 
+def parse_relation(value):
+    """
+    Converts raw hstore value of relation (postgres array) to list of ids.
+    """
+    value = value[1:-1]
+    if value:
+        return [int(val) for val in value.split(',')]
+
+
 class IncrementableIntegerFieldSerializer(IncrementableFieldSerializerMixin, serializers.IntegerField):
     pass
 
@@ -50,6 +60,9 @@ class HStoreFileFieldSerializer(serializers.FileField):
 
 
 class ReferenceFieldSerializer(RelatedModelFieldSerializerMixin, serializers.IntegerField):
+    # Flags for CSerializer to know how to convert raw hstore value and that it is serialized as a dict structure
+    hstore_converter = int
+    as_dict = 'reference'
     type_name = 'ReferenceField'
 
     def __init__(self, target, *args, **kwargs):
@@ -75,6 +88,7 @@ class ReferenceFieldSerializer(RelatedModelFieldSerializerMixin, serializers.Int
 class DateTimeFieldSerializer(serializers.DateTimeField):
     # Flag for CSerializer to know that we should serialize it as a dict structure, not like standard DateTimeField
     as_dict = 'datetime'
+    hstore_converter = staticmethod(parse_datetime)
     type_name = 'DateTimeField'
 
     def to_representation(self, value):
@@ -96,6 +110,8 @@ class DateTimeFieldSerializer(serializers.DateTimeField):
 
 
 class DataJSONFieldSerializerBase(JSONField):
+    hstore_converter = staticmethod(json.loads)
+
     def __init__(self, *args, **kwargs):
         kwargs.pop('allow_blank', None)
         super().__init__(*args, **kwargs)
@@ -201,6 +217,8 @@ class RelationFieldSerializer(RelatedModelFieldSerializerMixin, ArrayFieldSerial
     default_validators = []
     max_length = settings.DATA_OBJECT_RELATION_LIMIT
     supported_ops = {ArrayFieldSerializer.ADD_OP, ArrayFieldSerializer.REMOVE_OP}
+    hstore_converter = staticmethod(parse_relation)
+    as_dict = 'relation'
 
     def __init__(self, target, child, *args, **kwargs):
         self.target = target
@@ -1,15 +1,21 @@
 # coding=UTF8
 import rapidjson as json
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db.models import FieldDoesNotExist, Q
 from django.db.models.sql import EmptyResultSet
 from rest_framework import filters
 
-from apps.core.helpers import get_from_request_query_params
+from apps.core.fields import DictionaryField
+from apps.core.helpers import LRUCache, get_from_request_query_params
 from apps.data.exceptions import InvalidQuery
 from apps.data.filters.lookups import lookup_registry
 from apps.data.validators import validate_query
 
+# Both caches may hold InvalidQuery instances as negative entries
+parsed_query_cache = LRUCache(settings.DATA_OBJECT_QUERY_CACHE_SIZE)
+query_plan_cache = LRUCache(settings.DATA_OBJECT_QUERY_CACHE_SIZE)
+
 
 class QueryFilterBackend(filters.BaseFilterBackend):
     """
@@ -21,6 +27,9 @@ class QueryFilterBackend(filters.BaseFilterBackend):
     ```{"field_name": {"_gt": 1, "_lte": 5}}```
 
     Possible lookups: _gt, _gte, _lt, _lte, _eq, _neq, _exists, _in.
+
+    Parsed queries are cached per raw query string and query plans (fields and lookups to use)
+    per loaded schema and query shape, so that only lookup values are validated on each request.
     """
 
     def process_query(self, view, queryset, query, query_fields=None, query_fields_extra=None):
@@ -28,8 +37,40 @@ class QueryFilterBackend(filters.BaseFilterBackend):
         query_fields_extra = query_fields_extra or getattr(view, 'query_fields_extra', {})
         current_q = Q()
 
-        for field_name, lookups in query.items():
-            field, field_desc = self.get_field_info(field_name, query_fields_extra, queryset.model)
+        for field_name, lookup, lookup_obj, field, orm_lookup in self.get_query_plan(queryset.model, query,
+                                                                                     query_fields,
+                                                                                     query_fields_extra):
+            value = lookup_obj.validate_value(view, field, query[field_name][lookup])
+            current_q &= lookup_obj.get_q(orm_lookup, value)
+
+        return queryset.filter(current_q)
+
+    def get_query_plan(self, model, query, query_fields, query_fields_extra):
+        shape = tuple(sorted((field_name, tuple(sorted(lookups)) if isinstance(lookups, dict) else None)
+                             for field_name, lookups in query.items()))
+        # Virtual fields depend on schema that is currently loaded on the model
+        schema_key = tuple(field.compiled_schema for field in model._meta.concrete_fields
+                           if isinstance(field, DictionaryField))
+        cache_key = (model, schema_key, frozenset(query_fields),
+                     tuple(sorted((name, desc['lookup']) for name, desc in query_fields_extra.items())), shape)
+
+        plan = query_plan_cache.get(cache_key)
+        if plan is None:
+            try:
+                plan = self.compile_query_plan(model, shape, query_fields, query_fields_extra)
+            except InvalidQuery as ex:
+                plan = InvalidQuery(ex.detail)
+            query_plan_cache.set(cache_key, plan)
+
+        if isinstance(plan, InvalidQuery):
+            raise InvalidQuery(plan.detail)
+        return plan
+
+    def compile_query_plan(self, model, shape, query_fields, query_fields_extra):
+        plan = []
+
+        for field_name, lookups in shape:
+            field, field_desc = self.get_field_info(field_name, query_fields_extra, model)
 
             # Respect virtual field settings
             if field.column is None:
@@ -42,37 +83,56 @@ class QueryFilterBackend(filters.BaseFilterBackend):
                     field_name=field_name
                 ))
 
-            if not isinstance(lookups, dict):
+            if lookups is None:
                 raise InvalidQuery('Invalid field "{field_name}" lookup type. Expected JSON object.'.format(
                     field_name=field_name))
 
-            for lookup, value in lookups.items():
+            for lookup in lookups:
                 lookup_obj = lookup_registry.match(lookup, field)
 
                 if lookup_obj is None:
                     raise InvalidQuery('Invalid lookup "{lookup}" defined for field "{field_name}".'.format(
                         field_name=field_name, lookup=lookup))
 
-                value = lookup_obj.validate_value(view, field, value)
-                current_q &= lookup_obj.get_q(field_desc['lookup'], value)
+                plan.append((field_name, lookup, lookup_obj, field, field_desc['lookup']))
+        return tuple(plan)
 
-        return queryset.filter(current_q)
+    def parse_query(self, query):
+        if not isinstance(query, str):
+            return self.validate_query(query)
+
+        cacheable = len(query) <= settings.DATA_OBJECT_QUERY_CACHE_MAX_LENGTH
+        parsed = parsed_query_cache.get(query) if cacheable else None
+        if parsed is None:
+            try:
+                try:
+                    parsed = json.loads(query)
+                except ValueError:
+                    raise InvalidQuery('Not a valid JSON string.')
+                parsed = self.validate_query(parsed)
+            except InvalidQuery as ex:
+                parsed = InvalidQuery(ex.detail)
+
+            if cacheable:
+                parsed_query_cache.set(query, parsed)
+
+        if isinstance(parsed, InvalidQuery):
+            raise InvalidQuery(parsed.detail)
+        return parsed
+
+    def validate_query(self, query):
+        try:
+            validate_query(query)
+        except ValidationError as ex:
+            raise InvalidQuery(ex.messages)
+        return query
 
     def filter_queryset(self, request, queryset, view):
         queries = get_from_request_query_params(request, 'query', getlist=True)
 
         for query in queries:
             if query:
-                if isinstance(query, str):
-                    try:
-                        query = json.loads(query)
-                    except ValueError:
-                        raise InvalidQuery('Not a valid JSON string.')
-
-                try:
-                    validate_query(query)
-                except ValidationError as ex:
-                    raise InvalidQuery(ex.messages)
+                query = self.parse_query(query)
 
                 try:
                     queryset = self.process_query(view, queryset, query)
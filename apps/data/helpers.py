@@ -88,7 +88,9 @@ INDEX_DATA = {
         'default': (
             {
                 'name': 'data_klass_{klass_pk}_order_{field_name}',
-                'using': 'btree(({db_type}), id)',
+                'using': 'btree({expressions})',
+                # Key expressions are reused as is by keyset pagination so that its query matches the index
+                'expressions': ('({db_type})', 'id'),
             },
         ),
     }
@@ -151,6 +153,19 @@ def convert_field_type_to_db_type(field_source, field_type, db_table='data_datao
                                           hstore_field_name=hstore_field_name)
 
 
+def get_index_expressions(index_info, field_column):
+    return tuple(expression.format(db_type=field_column) for expression in index_info.get('expressions', ()))
+
+
+def get_order_index_expression(field_column, field_type='default'):
+    """
+    Get key expression of order index defined on field column, exactly as it is used in index definition.
+    """
+    index_data = INDEX_DATA['order']
+    index_info = (index_data.get(field_type) or index_data['default'])[0]
+    return get_index_expressions(index_info, field_column)[0]
+
+
 def process_data_object_index(instance, klass_pk, index_type, index_data,
                               concurrently=True, create=True):
     field_column = None
@@ -195,7 +210,8 @@ def process_data_object_index(instance, klass_pk, index_type, index_data,
                 # Otherwise drop it
                 cursor.execute(DROP_INDEX_SQL.format(index_name=index_name, concurrently=concurrently_keyword))
 
-            index_using = index_info['using'].format(db_type=field_column)
+            expressions = ', '.join(get_index_expressions(index_info, field_column))
+            index_using = index_info['using'].format(db_type=field_column, expressions=expressions)
             # Only first index should be unique (and created non-concurrently)
             sql = CREATE_INDEX_SQL.format(index_name=index_name,
                                           concurrently='' if idx == 0 and unique else concurrently_keyword,
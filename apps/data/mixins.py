@@ -7,6 +7,9 @@ from apps.core.helpers import Cached
 
 
 class ObjectSchemaProcessViewMixin:
+    # Loaded class schema is process wide so these views cannot be processed concurrently in batch
+    batch_concurrent = False
+
     def initial(self, request, *args, **kwargs):
         if getattr(self, 'klass', None):
             self.model.load_klass(self.klass)
@@ -1,10 +1,12 @@
 # coding=UTF8
-from collections import defaultdict
+import json
+from collections import Counter, defaultdict
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files import File
-from django.db import models
+from django.db import models, router
+from django.db.models.signals import post_save, pre_save
 from django.utils.encoding import force_bytes
 from jsonfield import JSONField
 from rest_framework.validators import UniqueValidator
@@ -18,18 +20,47 @@ from apps.core.abstract_models import (
     TrackChangesAbstractModel
 )
 from apps.core.fields import DictionaryField, NullableJSONField, StrippedSlugField
-from apps.core.helpers import Cached, MetaIntEnum, get_schema_cache
+from apps.core.helpers import Cached, LRUCache, MetaIntEnum, add_post_transaction_success_operation, bulk_update, redis
 from apps.core.managers import LiveManager
 from apps.core.permissions import API_PERMISSIONS, FULL_PERMISSIONS
 from apps.core.querysets import CountEstimateLiveQuerySet
 from apps.core.validators import NotInValidator
 from apps.data.helpers import FIELD_CLASS_MAP, convert_field_type_to_db_type
 from apps.data.querysets import KlassQuerySet
+from apps.instances.helpers import get_current_instance
 
 from .validators import SchemaValidator
 
 DISALLOWED_KLASS_NAMES = {'self', 'user', 'users', 'acl'}
-KLASS_SCHEMA_CACHE_TEMPLATE = 'klass:{pk}:schema:'
+compiled_schema_cache = LRUCache(settings.DATA_OBJECT_SCHEMA_CACHE_SIZE)
+
+OBJECTS_COUNT_KEY_TEMPLATE = 'data:objects_count:{instance_pk}'
+OBJECTS_COUNT_RECONCILE_KEY_TEMPLATE = 'data:objects_count:reconcile:{instance_pk}'
+
+# Change objects counter of a class unless it was not initialized yet.
+# KEYS: counters hash
+# ARGV: klass pk, change
+# Returns new value or nil if counter was not initialized.
+INCREMENT_OBJECTS_COUNT_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
+increment_objects_count_script = redis.register_script(INCREMENT_OBJECTS_COUNT_SCRIPT)
+
+# Correct objects counter of a class unless it was changed since it was read.
+# KEYS: counters hash
+# ARGV: klass pk, value read, corrected value
+# Returns 1 if counter was corrected.
+RECONCILE_OBJECTS_COUNT_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+reconcile_objects_count_script = redis.register_script(RECONCILE_OBJECTS_COUNT_SCRIPT)
 
 
 class Klass(AclAbstractModel, DescriptionAbstractModel, MetadataAbstractModel, CacheableAbstractModel,
@@ -121,9 +152,87 @@ class Klass(AclAbstractModel, DescriptionAbstractModel, MetadataAbstractModel, C
     @property
     def objects_count(self):
         if not hasattr(self, '_objects_count'):
-            self._objects_count = self.data_objects.count_estimate()
+            self.load_objects_counts([self])
         return self._objects_count
 
+    @classmethod
+    def load_objects_counts(cls, klasses):
+        """
+        Set objects count on classes from live counters kept in redis, initializing missing ones with an estimate.
+        Counters are maintained by DataObject signal handlers and get reconciled periodically while they are in use.
+        """
+        from apps.data.tasks import ReconcileKlassObjectsCountTask
+
+        klasses = [klass for klass in klasses if not hasattr(klass, '_objects_count')]
+        if not klasses:
+            return
+
+        instance = get_current_instance()
+        key = OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=instance.pk)
+        pipe = redis.pipeline()
+        pipe.hmget(key, [klass.pk for klass in klasses])
+        pipe.set(OBJECTS_COUNT_RECONCILE_KEY_TEMPLATE.format(instance_pk=instance.pk), 1,
+                 nx=True, ex=settings.DATA_OBJECTS_COUNT_RECONCILE_INTERVAL)
+        counts, reconcile = pipe.execute()
+
+        missing = {}
+        for klass, count in zip(klasses, counts):
+            if count is None:
+                count = missing[klass.pk] = klass.data_objects.count_estimate()
+            klass._objects_count = int(count)
+
+        if missing:
+            pipe = redis.pipeline()
+            for klass_pk, count in missing.items():
+                pipe.hsetnx(key, klass_pk, count)
+            pipe.execute()
+
+        if reconcile:
+            ReconcileKlassObjectsCountTask.apply_async(kwargs={'instance_pk': instance.pk},
+                                                       countdown=settings.DATA_OBJECTS_COUNT_RECONCILE_INTERVAL)
+
+    @classmethod
+    def increment_objects_count(cls, instance_pk, klass_pk, change=1):
+        increment_objects_count_script(keys=(OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=instance_pk),),
+                                       args=(klass_pk, change))
+
+    @classmethod
+    def init_objects_count(cls, instance_pk, klass_pk):
+        redis.hsetnx(OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=instance_pk), klass_pk, 0)
+
+    @classmethod
+    def delete_objects_count(cls, instance_pk, klass_pk):
+        redis.hdel(OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=instance_pk), klass_pk)
+
+    @classmethod
+    def reconcile_objects_counts(cls, instance):
+        """
+        Correct counters that drifted from objects count. Counters are read before counting and only corrected
+        if they did not change in the meantime so that concurrent increments are not lost.
+        Classes with more than DATA_OBJECTS_COUNT_RECONCILE_EXACT_LIMIT objects are compared against an estimate
+        and corrected only if it differs by more than DATA_OBJECTS_COUNT_RECONCILE_TOLERANCE.
+        """
+        key = OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=instance.pk)
+        current_counts = redis.hgetall(key)
+        exact_limit = settings.DATA_OBJECTS_COUNT_RECONCILE_EXACT_LIMIT
+
+        for klass in cls.objects.all():
+            current = current_counts.get(str(klass.pk).encode())
+            if current is None:
+                # Missing counters get initialized when they are loaded
+                continue
+            current = int(current)
+
+            count = klass.data_objects.count_estimate(real_limit=exact_limit)
+            if count > exact_limit and abs(count - current) <= count * settings.DATA_OBJECTS_COUNT_RECONCILE_TOLERANCE:
+                continue
+            if count != current:
+                reconcile_objects_count_script(keys=(key,), args=(klass.pk, current, count))
+
+    @classmethod
+    def invalidate_objects_counts(cls, instance):
+        redis.delete(OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=instance.pk))
+
     @property
     def is_locked(self):
         return self.index_changes is not None
@@ -388,16 +497,102 @@ class DataObject(AclAbstractModel, TrackChangesAbstractModel, LiveAbstractModel)
                 raise ValidationError('Object maximum size exceeded.')
 
     @classmethod
-    def load_klass(cls, klass):
-        cache = get_schema_cache()
-        cache_key = KLASS_SCHEMA_CACHE_TEMPLATE.format(pk=klass.pk)
-
-        schema_data = cache.get(cache_key)
-        if schema_data is None:
-            schema_data = klass.convert_schema_to_django_schema()
-            cache[cache_key] = schema_data
+    def get_compiled_schema(cls, klass):
+        """
+        Get schema compiled for given klass. Compiled schemas are kept in process wide LRU cache
+        and recompiled whenever klass revision or indexes change.
+        """
+        instance = get_current_instance()
+        cache_key = (getattr(instance, 'pk', None), klass.pk, klass.revision,
+                     json.dumps(klass.existing_indexes, sort_keys=True))
+
+        compiled_schema = compiled_schema_cache.get(cache_key)
+        if compiled_schema is None:
+            field = cls._meta.get_field('_data')
+            compiled_schema = field.compile_schema(klass.convert_schema_to_django_schema())
+            compiled_schema_cache.set(cache_key, compiled_schema)
+        return compiled_schema
 
+    @classmethod
+    def load_klass(cls, klass):
+        """
+        Load compiled schema of given klass onto DataObject model. Compiled schema saves rebuilding virtual fields,
+        it is still loaded onto process wide model though. Only one klass can be loaded at a time so views that use it
+        are not safe to process concurrently within one process (see `batch_concurrent`).
+        """
+        compiled_schema = cls.get_compiled_schema(klass)
         field = cls._meta.get_field('_data')
-        field.reload_schema(schema_data)
-        cls.process_tracked_fields()
+
+        if field.compiled_schema is not compiled_schema:
+            field.load_compiled_schema(compiled_schema)
+            # Tracked fields depend only on schema so reuse them as well
+            if compiled_schema.model_data is None:
+                cls.process_tracked_fields()
+                compiled_schema.model_data = cls._fields_map
+            else:
+                cls._fields_map = compiled_schema.model_data
         cls.loaded_klass = klass
+
+    @classmethod
+    def update_objects_counts(cls, objects, change, using):
+        instance_pk = get_current_instance().pk
+        for klass_pk, count in Counter(obj._klass_id for obj in objects).items():
+            add_post_transaction_success_operation(Klass.increment_objects_count,
+                                                   using=using,
+                                                   instance_pk=instance_pk,
+                                                   klass_pk=klass_pk,
+                                                   change=change * count)
+
+    @classmethod
+    def bulk_insert(cls, objects):
+        """
+        Insert objects with a single statement. Model pre_save signal is sent for every object so that
+        e.g. acl is processed like in a regular save, object counters are updated once for the whole batch.
+        """
+        using = router.db_for_write(cls)
+        for obj in objects:
+            pre_save.send(sender=cls, instance=obj, raw=False, using=using, update_fields=None)
+        cls.objects.using(using).bulk_create(objects)
+        for obj in objects:
+            obj.store()
+        cls.update_objects_counts(objects, 1, using)
+
+    @classmethod
+    def bulk_save(cls, objects):
+        """
+        Update changed objects with a single statement. Model save signals are sent for every object
+        so that revision and changes are processed like in a regular save. Returns list of changed objects.
+        """
+        using = router.db_for_write(cls)
+        objects = [obj for obj in objects if obj.has_changes()]
+
+        for obj in objects:
+            pre_save.send(sender=cls, instance=obj, raw=False, using=using, update_fields=None)
+        bulk_update(cls, objects, [field.name for field in cls._meta.concrete_fields if not field.primary_key],
+                    using=using)
+        for obj in objects:
+            post_save.send(sender=cls, instance=obj, created=False, raw=False, using=using, update_fields=None)
+            obj.store()
+        return objects
+
+    @classmethod
+    def bulk_soft_delete(cls, objects):
+        """
+        Soft delete objects with a single statement. Cleanup of every object is queued like after a regular
+        soft delete, object counters are updated once for the whole batch.
+        """
+        from apps.core.tasks import DeleteLiveObjectTask
+
+        using = router.db_for_write(cls)
+        cls.objects.using(using).filter(pk__in=[obj.pk for obj in objects]).soft_delete()
+
+        instance_pk = get_current_instance().pk
+        model_class_name = '%s.%s' % (cls._meta.app_label, cls._meta.model_name)
+        for obj in objects:
+            obj._is_live = False
+            add_post_transaction_success_operation(DeleteLiveObjectTask.delay,
+                                                   using=using,
+                                                   model_class_name=model_class_name,
+                                                   object_pk=obj.pk,
+                                                   instance_pk=instance_pk)
+        cls.update_objects_counts(objects, -1, using)
@@ -1,11 +1,28 @@
 # coding=UTF8
+from django.db.models.query import ModelIterable
+
 from apps.core.querysets import CountEstimateLiveQuerySet
 
 
 class KlassQuerySet(CountEstimateLiveQuerySet):
-    def include_object_count(self, real_limit=1000):
-        alias = self.query.table_map.get(self.query.base_table)[0]
-        query = "'SELECT id FROM data_dataobject WHERE _klass_id=' || \"{alias}\".\"id\"".format(
-            alias=alias
-        )
-        return self.add_count_estimate('_objects_count', query, real_limit=real_limit, raw=True)
+    _include_object_count = False
+
+    def include_object_count(self):
+        """
+        Load objects count of fetched classes from live counters with a single lookup.
+        """
+        clone = self._chain()
+        clone._include_object_count = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._include_object_count = self._include_object_count
+        return clone
+
+    def _fetch_all(self):
+        fetch = self._result_cache is None
+        super()._fetch_all()
+
+        if fetch and self._include_object_count and self._iterable_class is ModelIterable:
+            self.model.load_objects_counts(self._result_cache)
@@ -4,6 +4,7 @@ from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from apps.core.helpers import add_post_transaction_success_operation
+from apps.core.signals import post_soft_delete
 from apps.data.models import DataObject, Klass
 from apps.data.tasks import DeleteKlassIndexesTask, IndexKlassTask
 from apps.instances.helpers import get_current_instance
@@ -62,25 +63,68 @@ def dataobject_post_save_changes(sender, instance, created, **kwargs):
     instance.changes = changes
 
 
+@receiver(post_save, sender=DataObject, dispatch_uid='dataobject_post_save_objects_count')
+def dataobject_post_save_objects_count(sender, instance, created, using, **kwargs):
+    if created and instance.is_live:
+        add_post_transaction_success_operation(Klass.increment_objects_count,
+                                               using=using,
+                                               instance_pk=get_current_instance().pk,
+                                               klass_pk=instance._klass_id)
+
+
+@receiver(post_soft_delete, sender=DataObject, dispatch_uid='dataobject_post_soft_delete_objects_count')
+def dataobject_post_soft_delete_objects_count(sender, instance, using, **kwargs):
+    add_post_transaction_success_operation(Klass.increment_objects_count,
+                                           using=using,
+                                           instance_pk=get_current_instance().pk,
+                                           klass_pk=instance._klass_id,
+                                           change=-1)
+
+
 @receiver(post_delete, sender=DataObject, dispatch_uid='dataobject_post_delete_handler')
-def dataobject_post_delete_handler(sender, instance, **kwargs):
+def dataobject_post_delete_handler(sender, instance, using, **kwargs):
     for file_source in instance._files.keys():
         file_name = instance._data[file_source]
         default_storage.delete(file_name)
     old_storage = sum(map(int, instance.old_value('_files').values()))
     update_instance_storage_indicator(-old_storage)
 
+    # Soft deleted objects were already uncounted
+    if instance.is_live:
+        add_post_transaction_success_operation(Klass.increment_objects_count,
+                                               using=using,
+                                               instance_pk=get_current_instance().pk,
+                                               klass_pk=instance._klass_id,
+                                               change=-1)
+
 
 # Klass signal handlers
 
 @receiver(post_delete, sender=Klass, dispatch_uid='klass_post_delete_handler')
 def klass_post_delete_handler(sender, instance, using, **kwargs):
+    instance_pk = get_current_instance().pk
     add_post_transaction_success_operation(DeleteKlassIndexesTask.delay,
                                            using=using,
-                                           instance_pk=get_current_instance().pk,
+                                           instance_pk=instance_pk,
+                                           klass_pk=instance.pk)
+    add_post_transaction_success_operation(Klass.delete_objects_count,
+                                           using=using,
+                                           instance_pk=instance_pk,
                                            klass_pk=instance.pk)
 
 
+@receiver(post_save, sender=Klass, dispatch_uid='klass_post_save_objects_count')
+def klass_post_save_objects_count(sender, instance, created, using, **kwargs):
+    instance_pk = get_current_instance().pk
+    # Spare and template schemas are migrated with an unsaved tenant,
+    # counters of their classes are initialized on first use once they are claimed
+    if created and instance_pk is not None:
+        add_post_transaction_success_operation(Klass.init_objects_count,
+                                               using=using,
+                                               instance_pk=instance_pk,
+                                               klass_pk=instance.pk)
+
+
 @receiver(post_save, sender=Klass, dispatch_uid='klass_post_save_handler')
 def klass_post_save_handler(sender, instance, using, **kwargs):
     if instance.index_changes:
@@ -71,6 +71,12 @@ class DeleteKlassIndexesTask(TaskLockMixin, InstanceBasedTask):
             cursor.execute(DROP_INDEX_SQL.format(index_name=row[0], concurrently=''))
 
 
+@register_task
+class ReconcileKlassObjectsCountTask(InstanceBasedTask):
+    def run(self, **kwargs):
+        Klass.reconcile_objects_counts(self.instance)
+
+
 @register_task
 class KlassOperationQueue(InstanceBasedTask):
     max_retries = None
@@ -14,7 +14,7 @@ from apps.instances.models import Instance
 from apps.users.models import Group, Membership, User
 from apps.users.tests.test_user_api import UserTestCase
 
-from ..models import Klass
+from ..models import DataObject, Klass
 
 
 class TestClassesDetailAPI(SyncanoAPITestBase):
@@ -347,3 +347,80 @@ class TestClassesFilteringByPermissions(UserTestCase):
         # Expected count is 2 in listing as there is also a user_profile created at this point
         self.assert_klass_access(group=group, group_permissions=Klass.PERMISSIONS.READ,
                                  other_permissions=Klass.PERMISSIONS.READ)
+
+
+@override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+@mock.patch('apps.data.tasks.ReconcileKlassObjectsCountTask', mock.MagicMock())
+class TestKlassObjectsCount(SyncanoAPITestBase):
+    def setUp(self):
+        super().setUp()
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'a', 'type': 'integer'}], name='test')
+        self.url = reverse('v1:klass-list', args=(self.instance.name,))
+
+    def get_objects_count(self):
+        return Klass.objects.get(pk=self.klass.pk).objects_count
+
+    def test_counter_is_maintained_by_signals(self):
+        objects = [G(DataObject, _klass=self.klass) for _ in range(3)]
+        self.assertEqual(self.get_objects_count(), 3)
+
+        objects[0].delete()
+        self.assertEqual(self.get_objects_count(), 2)
+        objects[0].hard_delete()
+        objects[1].hard_delete()
+        self.assertEqual(self.get_objects_count(), 1)
+
+    def test_missing_counter_is_initialized_with_estimate(self):
+        G(DataObject, _klass=self.klass)
+        Klass.invalidate_objects_counts(self.instance)
+        self.assertEqual(self.get_objects_count(), 1)
+
+        G(DataObject, _klass=self.klass)
+        self.assertEqual(self.get_objects_count(), 2)
+
+    def test_reconcile(self):
+        G(DataObject, _klass=self.klass)
+        Klass.increment_objects_count(self.instance.pk, self.klass.pk, 10)
+        self.assertEqual(self.get_objects_count(), 11)
+
+        Klass.reconcile_objects_counts(self.instance)
+        self.assertEqual(self.get_objects_count(), 1)
+
+    def test_reconcile_keeps_counter_changed_while_counting(self):
+        G(DataObject, _klass=self.klass)
+        Klass.increment_objects_count(self.instance.pk, self.klass.pk, 10)
+
+        def count_estimate(*args, **kwargs):
+            G(DataObject, _klass=self.klass)
+            return 2
+
+        with mock.patch('apps.core.querysets.CountEstimateLiveQuerySet.count_estimate', side_effect=count_estimate):
+            Klass.reconcile_objects_counts(self.instance)
+        self.assertEqual(self.get_objects_count(), 12)
+
+    @override_settings(DATA_OBJECTS_COUNT_RECONCILE_EXACT_LIMIT=10, DATA_OBJECTS_COUNT_RECONCILE_TOLERANCE=0.1)
+    def test_reconcile_tolerates_estimate_drift_of_large_classes(self):
+        Klass.increment_objects_count(self.instance.pk, self.klass.pk, 105)
+
+        with mock.patch('apps.core.querysets.CountEstimateLiveQuerySet.count_estimate', return_value=100):
+            Klass.reconcile_objects_counts(self.instance)
+        self.assertEqual(self.get_objects_count(), 105)
+
+        with mock.patch('apps.core.querysets.CountEstimateLiveQuerySet.count_estimate', return_value=200):
+            Klass.reconcile_objects_counts(self.instance)
+        self.assertEqual(self.get_objects_count(), 200)
+
+    def test_listing_classes_does_not_estimate_counts_per_class(self):
+        for i in range(3):
+            klass = G(Klass, schema=[{'name': 'a', 'type': 'integer'}], name='test_%d' % i)
+            G(DataObject, _klass=klass)
+
+        with mock.patch('apps.core.mixins.querysets.get_count_estimate_from_query') as estimate_mock:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(estimate_mock.called)
+        counts = {klass['name']: klass['objects_count'] for klass in response.data['objects']}
+        self.assertEqual(counts['test'], 0)
+        for i in range(3):
+            self.assertEqual(counts['test_%d' % i], 1)
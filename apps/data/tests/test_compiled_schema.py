@@ -0,0 +1,96 @@
+# coding=UTF8
+import logging
+import time
+from unittest import mock
+
+from django.test import tag
+from django.urls import reverse
+from django_dynamic_fixture import G
+from rest_framework import status
+
+from apps.core.fields import DictionaryField
+from apps.core.tests.testcases import SyncanoAPITestBase
+from apps.data.models import DataObject, Klass
+from apps.instances.helpers import set_current_instance
+
+logger = logging.getLogger(__name__)
+
+
+class TestCompiledSchema(SyncanoAPITestBase):
+    def setUp(self):
+        super().setUp()
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'string', 'type': 'string'},
+                                      {'name': 'integer', 'type': 'integer', 'filter_index': True}],
+                       name='test',
+                       description='test')
+
+    def get_virtual_field_names(self):
+        return {field.name for field in DataObject._meta.fields if hasattr(field, 'hstore_field_name')}
+
+    def test_compiled_schema_is_reused(self):
+        compiled_schema = DataObject.get_compiled_schema(self.klass)
+        self.assertIs(DataObject.get_compiled_schema(self.klass), compiled_schema)
+
+        DataObject.load_klass(self.klass)
+        self.assertEqual(self.get_virtual_field_names(), {'string', 'integer'})
+
+        with mock.patch.object(DictionaryField, '_remove_hstore_virtual_fields') as remove_mock:
+            DataObject.load_klass(self.klass)
+        self.assertFalse(remove_mock.called)
+
+    def test_schema_is_recompiled_on_change(self):
+        DataObject.load_klass(self.klass)
+        compiled_schema = DataObject._meta.get_field('_data').compiled_schema
+
+        self.klass.schema += [{'name': 'float', 'type': 'float'}]
+        self.klass.save()
+        DataObject.load_klass(self.klass)
+
+        self.assertIsNot(DataObject._meta.get_field('_data').compiled_schema, compiled_schema)
+        self.assertEqual(self.get_virtual_field_names(), {'string', 'integer', 'float'})
+
+    def test_switching_classes(self):
+        other_klass = G(Klass, schema=[{'name': 'other', 'type': 'string'}], name='other', description='test')
+
+        DataObject.load_klass(self.klass)
+        DataObject.load_klass(other_klass)
+        self.assertEqual(self.get_virtual_field_names(), {'other'})
+        self.assertEqual(set(DataObject._fields_map) & {'string', 'integer', 'other'}, {'other'})
+
+        DataObject.load_klass(self.klass)
+        self.assertEqual(self.get_virtual_field_names(), {'string', 'integer'})
+        self.assertEqual(set(DataObject._fields_map) & {'string', 'integer', 'other'}, {'string', 'integer'})
+
+
+@tag('benchmark')
+class BenchmarkCompiledSchema(SyncanoAPITestBase):
+    fields_count = 60
+    iterations = 50
+
+    def setUp(self):
+        super().setUp()
+        set_current_instance(self.instance)
+        schema = [{'name': 'field_%d' % i, 'type': 'string'} for i in range(self.fields_count)]
+        self.klass = G(Klass, schema=schema, name='benchmark', description='test')
+        self.url = reverse('v1:dataobject-list', args=(self.instance.name, self.klass.name))
+        self.object_data = {'field_%d' % i: 'value %d' % i for i in range(self.fields_count)}
+
+    def measure(self, label, func):
+        start = time.perf_counter()
+        for _ in range(self.iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        logger.info('%s: %.1f req/s', label, self.iterations / elapsed)
+
+    def test_create_and_list_throughput(self):
+        def create():
+            response = self.client.post(self.url, self.object_data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        def list_():
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.measure('create ({} fields)'.format(self.fields_count), create)
+        self.measure('list ({} fields)'.format(self.fields_count), list_)
@@ -1,15 +1,21 @@
 # coding=UTF8
 import json
 from datetime import datetime, timedelta
+from unittest import mock
 
 from django.contrib.gis.geos import Point
-from django.test import override_settings
+from django.http import QueryDict
+from django.test import override_settings, tag
 from django.urls import reverse
 from django_dynamic_fixture import G
 from rest_framework import status
 
+from apps.core.helpers import LRUCache
+from apps.core.tests.mixins import BenchmarkMixin
 from apps.core.tests.testcases import SyncanoAPITestBase
+from apps.data.filters import QueryFilterBackend, parsed_query_cache, query_plan_cache
 from apps.data.filters.lookups import LOOKUP_PREFIX
+from apps.data.v1.views import ObjectViewSet
 from apps.instances.helpers import set_current_instance
 from apps.users.models import User
 
@@ -453,3 +459,102 @@ class TestUniqueFiltering(FilteringTestBase):
     def test_simplefiltering_cases(self):
         self.assert_query_lookup({'name': {'_eq': 'Warsaw'}}, 1)
         self.assert_query_lookup({'name': {'_eq': 'Krakow'}}, 1)
+
+
+class TestQueryFilterCache(FilteringTestBase):
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True, CREATE_INDEXES_CONCURRENTLY=False)
+    def setUp(self):
+        super().setUp()
+        set_current_instance(self.instance)
+        parsed_query_cache.clear()
+        query_plan_cache.clear()
+
+        self.klass = G(Klass, schema=[{'name': 'name', 'type': 'string', 'filter_index': True}], name='cities')
+        self.klass.refresh_from_db()
+        DataObject.load_klass(self.klass)
+        for name in ('Warsaw', 'Krakow'):
+            DataObject.objects.create(_klass=self.klass, name=name)
+        self.url = reverse('v1:dataobject-list', args=(self.instance.name, self.klass.name))
+
+    @mock.patch.object(QueryFilterBackend, 'compile_query_plan', autospec=True,
+                       side_effect=QueryFilterBackend.compile_query_plan)
+    def test_query_plan_is_reused_for_same_shape(self, compile_mock):
+        self.assert_query_lookup({'name': {'_eq': 'Warsaw'}}, 1)
+        self.assert_query_lookup({'name': {'_eq': 'Gdansk'}}, 0)
+        self.assert_query_lookup({'name': {'_eq': 'Krakow'}}, 1)
+        self.assertEqual(compile_mock.call_count, 1)
+
+        self.assert_query_lookup({'name': {'_startswith': 'K'}}, 1)
+        self.assertEqual(compile_mock.call_count, 2)
+
+    @mock.patch.object(QueryFilterBackend, 'compile_query_plan', autospec=True,
+                       side_effect=QueryFilterBackend.compile_query_plan)
+    def test_invalid_query_plan_is_cached(self, compile_mock):
+        for _ in range(2):
+            response = self.assert_query_lookup({'idontexist': {'_eq': 1}},
+                                                expected_status=status.HTTP_400_BAD_REQUEST)
+            self.assertIn('Invalid field name', response.data['query'])
+        self.assertEqual(compile_mock.call_count, 1)
+
+    def test_invalid_json_is_cached(self):
+        with mock.patch('apps.data.filters.json.loads', side_effect=ValueError) as loads_mock:
+            for _ in range(2):
+                response = self.client.get(self.url, {'query': '{"name":'})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(loads_mock.call_count, 1)
+
+    def test_lookup_values_are_validated_on_cached_plan(self):
+        self.assert_query_lookup({'name': {'_in': ['Warsaw']}}, 1)
+        self.assert_query_lookup({'name': {'_in': 'Warsaw'}}, expected_status=status.HTTP_400_BAD_REQUEST)
+
+    def test_query_plan_is_recompiled_on_schema_change(self):
+        response = self.assert_query_lookup({'country': {'_eq': 'PL'}}, expected_status=status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Invalid field name', response.data['query'])
+
+        self.klass.schema += [{'name': 'country', 'type': 'string'}]
+        self.klass.save()
+
+        response = self.assert_query_lookup({'country': {'_eq': 'PL'}}, expected_status=status.HTTP_400_BAD_REQUEST)
+        self.assertIn('not indexed', response.data['query'])
+
+
+@tag('benchmark')
+class BenchmarkQueryFilter(BenchmarkMixin, SyncanoAPITestBase):
+    iterations = 2000
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True, CREATE_INDEXES_CONCURRENTLY=False)
+    def setUp(self):
+        super().setUp()
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'name', 'type': 'string', 'filter_index': True},
+                                      {'name': 'count', 'type': 'integer', 'filter_index': True},
+                                      {'name': 'created', 'type': 'datetime', 'filter_index': True}],
+                       name='benchmark')
+        self.klass.refresh_from_db()
+        DataObject.load_klass(self.klass)
+        self.view = mock.Mock(klass=self.klass, filter_backends=(QueryFilterBackend,),
+                              query_fields=ObjectViewSet.query_fields,
+                              query_fields_extra=ObjectViewSet.query_fields_extra)
+
+    def get_request(self, i):
+        query_params = QueryDict(mutable=True)
+        query_params['query'] = json.dumps({'name': {'_startswith': 'test%d' % (i % 10)},
+                                            'count': {'_gte': i % 100, '_lt': 1000},
+                                            'created': {'_gt': '2000-01-01T00:00:00.000000Z'},
+                                            'id': {'_in': [1, 2, 3]}})
+        return mock.Mock(query_params=query_params)
+
+    def measure_filtering(self, label):
+        requests = [self.get_request(i) for i in range(self.iterations)]
+        backend = QueryFilterBackend()
+
+        with self.measure(label, count=self.iterations, unit='queries'):
+            for request in requests:
+                queryset = backend.filter_queryset(request, DataObject.objects.filter(_klass=self.klass), self.view)
+                queryset.query.get_compiler(queryset.db).as_sql()
+
+    def test_filter_throughput(self):
+        with mock.patch('apps.data.filters.parsed_query_cache', LRUCache(0)), \
+                mock.patch('apps.data.filters.query_plan_cache', LRUCache(0)):
+            self.measure_filtering('uncached')
+        self.measure_filtering('cached')
@@ -1,17 +1,19 @@
 # coding=UTF8
 import json
+import tracemalloc
 from time import time
 from unittest import mock
 
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import override_settings
+from django.test import override_settings, tag
 from django.urls import reverse
 from django_dynamic_fixture import G
 from psycopg2._psycopg import QueryCanceledError
 from rest_framework import status
 
+from apps.core.tests.mixins import BenchmarkMixin
 from apps.core.tests.testcases import SyncanoAPITestBase
 from apps.instances.helpers import set_current_instance
 from apps.instances.models import InstanceIndicator
@@ -586,6 +588,34 @@ class TestObjectListAPI(TestObjectMixin, SyncanoAPITestBase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['objects_count'], 0)
 
+    @override_settings(STREAMING_LIST_MIN_SIZE=2, STREAMING_LIST_CHUNK_SIZE=2)
+    def test_streaming_large_list(self):
+        for i in range(3):
+            G(DataObject, _klass=self.klass, _data={'1_string': 'test%d' % i, '1_int_indexed': str(i)}, _files={})
+
+        response = self.client.get(self.url, {'page_size': 3, 'include_count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json; charset=utf-8')
+        data = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual(list(data.keys()), ['objects', 'next', 'prev', 'objects_count'])
+        self.assertEqual(sorted(obj['string'] for obj in data['objects']), ['test0', 'test1', 'test2'])
+        self.assertEqual(data['objects_count'], 3)
+
+        with override_settings(STREAMING_LIST_MIN_SIZE=4):
+            response = self.client.get(self.url, {'page_size': 3, 'include_count': 'true'})
+        self.assertFalse(response.streaming)
+        self.assertEqual(json.loads(response.content.decode()), data)
+
+    @override_settings(STREAMING_LIST_MIN_SIZE=1)
+    def test_streaming_is_skipped_for_batch(self):
+        G(DataObject, _klass=self.klass, _data={'1_string': 'test'}, _files={})
+        url = reverse('v1:batch', args=(self.instance.name,))
+
+        response = self.client.post(url, {'requests': [{'method': 'GET', 'path': self.url}]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['content']['objects'][0]['string'], 'test')
+
     def test_if_listing_objects_of_missing_class_fails(self):
         url = reverse('v1:dataobject-list', args=(self.instance.name, 'idontexist'))
         response = self.client.get(url)
@@ -954,3 +984,203 @@ class TestAnonymousObjectRead(SyncanoAPITestBase):
         url = reverse('v1:dataobject-list', args=(self.instance.name, self.klass.name))
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestObjectsBulkAPI(SyncanoAPITestBase):
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True, CREATE_INDEXES_CONCURRENTLY=False)
+    def setUp(self):
+        super().setUp()
+
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'string', 'type': 'string'},
+                                      {'name': 'int_indexed', 'type': 'integer',
+                                       'order_index': True, 'filter_index': True}],
+                       name='test')
+        self.url = reverse('v1:dataobject-bulk', args=(self.instance.name, self.klass.name))
+
+    def create_objects(self, count):
+        return [G(DataObject, _klass=self.klass, _data={'1_string': 'test%d' % i, '1_int_indexed': str(i)}, _files={})
+                for i in range(count)]
+
+    def test_bulk_create(self):
+        response = self.client.post(self.url, {'create': [{'string': 'a', 'int_indexed': 1},
+                                                          {'int_indexed': 'abc'},
+                                                          {'string': 'b', 'int_indexed': 2}]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['create']
+        self.assertEqual([result['code'] for result in results],
+                         [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST, status.HTTP_201_CREATED])
+        self.assertIn('int_indexed', results[1]['content'])
+        self.assertEqual(results[0]['content']['string'], 'a')
+        self.assertEqual(DataObject.objects.filter(_klass=self.klass).count(), 2)
+
+    def test_bulk_create_with_unique_field(self):
+        klass = G(Klass, schema=[{'name': 'string', 'type': 'string', 'filter_index': True, 'unique': True}],
+                  name='unique')
+        url = reverse('v1:dataobject-bulk', args=(self.instance.name, klass.name))
+
+        response = self.client.post(url, {'create': [{'string': 'a'}, {'string': 'a'}]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['code'] for result in response.data['create']],
+                         [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST])
+
+    def test_bulk_update(self):
+        obj1, obj2 = self.create_objects(2)
+
+        response = self.client.post(self.url, {'update': [{'id': obj1.pk, 'string': 'updated'},
+                                                          {'id': obj1.pk, 'string': 'again'},
+                                                          {'id': obj2.pk + 100, 'string': 'missing'},
+                                                          {'id': obj2.pk, 'int_indexed': 'abc'}]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['update']
+        self.assertEqual([result['code'] for result in results],
+                         [status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST,
+                          status.HTTP_404_NOT_FOUND, status.HTTP_400_BAD_REQUEST])
+        self.assertEqual(results[0]['content']['revision'], 2)
+
+        DataObject.load_klass(self.klass)
+        obj1 = DataObject.objects.get(pk=obj1.pk)
+        self.assertEqual(obj1.string, 'updated')
+        self.assertEqual(obj1._revision, 2)
+        self.assertEqual(DataObject.objects.get(pk=obj2.pk)._revision, 1)
+
+    def test_bulk_delete(self):
+        obj1, obj2 = self.create_objects(2)
+
+        response = self.client.post(self.url, {'delete': [obj1.pk, obj1.pk, obj2.pk + 100]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['code'] for result in response.data['delete']],
+                         [status.HTTP_204_NO_CONTENT, status.HTTP_404_NOT_FOUND, status.HTTP_404_NOT_FOUND])
+        self.assertEqual(list(DataObject.objects.filter(_klass=self.klass).values_list('pk', flat=True)), [obj2.pk])
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+    def test_bulk_updates_objects_count(self):
+        obj = self.create_objects(1)[0]
+        self.client.post(self.url, {'create': [{'string': 'a'}, {'string': 'b'}], 'delete': [obj.pk]})
+        self.assertEqual(Klass.objects.get(pk=self.klass.pk).objects_count, 2)
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+    @mock.patch('apps.core.tasks.DeleteLiveObjectTask.delay')
+    def test_bulk_delete_queues_cleanup_of_every_object(self, delay_mock):
+        obj1, obj2 = self.create_objects(2)
+
+        response = self.client.post(self.url, {'delete': [obj1.pk, obj2.pk]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(call[1]['object_pk'] for call in delay_mock.call_args_list), [obj1.pk, obj2.pk])
+        for call in delay_mock.call_args_list:
+            self.assertEqual(call[1]['model_class_name'], 'data.dataobject')
+            self.assertEqual(call[1]['instance_pk'], self.instance.pk)
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+    @mock.patch('apps.triggers.helpers.Trigger.match', mock.Mock(return_value=True))
+    @mock.patch('apps.triggers.helpers.HandleTriggerEventTask')
+    def test_bulk_launches_single_trigger_task(self, task_mock):
+        response = self.client.post(self.url, {'create': [{'string': 'a'}, {'string': 'b'}, {'string': 'c'}]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(task_mock.delay.call_count, 1)
+        batch = task_mock.delay.call_args[1]['batch']
+        self.assertEqual([item['data']['string'] for item in batch], ['a', 'b', 'c'])
+
+    def test_bulk_validation(self):
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with override_settings(DATA_OBJECT_BULK_MAX_SIZE=2):
+            response = self.client.post(self.url, {'create': [{'string': 'a'}, {'string': 'b'}], 'delete': [1]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestObjectsBulkByApiKey(UserTestCase):
+    def setUp(self):
+        super().init_data()
+        self.klass = G(Klass, schema=[{'name': 'a', 'type': 'string'}],
+                       name='test',
+                       description='test',
+                       other_permissions=Klass.PERMISSIONS.CREATE_OBJECTS)
+        self.url = reverse('v1:dataobject-bulk', args=(self.instance.name, self.klass.name))
+
+    def test_bulk_checks_permissions_per_object(self):
+        obj = G(DataObject, _klass=self.klass, other_permissions=DataObject.PERMISSIONS.NONE)
+
+        response = self.client.post(self.url, {'create': [{'a': 'test'}], 'delete': [obj.pk]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['create'][0]['code'], status.HTTP_201_CREATED)
+        self.assertEqual(response.data['create'][0]['content']['owner'], self.user.id)
+        self.assertNotEqual(response.data['delete'][0]['code'], status.HTTP_204_NO_CONTENT)
+        self.assertTrue(DataObject.objects.filter(pk=obj.pk).exists())
+
+
+@tag('benchmark')
+class BenchmarkBulkObjects(BenchmarkMixin, SyncanoAPITestBase):
+    objects_count = 1000
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True, CREATE_INDEXES_CONCURRENTLY=False)
+    def setUp(self):
+        super().setUp()
+
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'string', 'type': 'string'},
+                                      {'name': 'int_indexed', 'type': 'integer', 'filter_index': True}],
+                       name='benchmark')
+        self.list_path = '/v1/instances/{}/classes/{}/objects/'.format(self.instance.name, self.klass.name)
+        self.batch_url = reverse('v1:batch', args=(self.instance.name,))
+        self.bulk_url = reverse('v1:dataobject-bulk', args=(self.instance.name, self.klass.name))
+
+    def get_objects(self):
+        return [{'string': 'test%d' % i, 'int_indexed': i} for i in range(self.objects_count)]
+
+    def test_bulk_create_throughput(self):
+        objects = self.get_objects()
+
+        with self.measure('batch', count=self.objects_count, unit='objects'):
+            for i in range(0, self.objects_count, settings.BATCH_MAX_SIZE):
+                requests = [{'method': 'POST', 'path': self.list_path, 'body': obj}
+                            for obj in objects[i:i + settings.BATCH_MAX_SIZE]]
+                self.client.post(self.batch_url, {'requests': requests})
+
+        with self.measure('bulk', count=self.objects_count, unit='objects'):
+            self.client.post(self.bulk_url, {'create': objects})
+
+
+@tag('benchmark')
+class BenchmarkStreamingList(BenchmarkMixin, SyncanoAPITestBase):
+    page_sizes = (100, 500, 1000)
+
+    def setUp(self):
+        super().setUp()
+
+        set_current_instance(self.instance)
+        self.klass = G(Klass, schema=[{'name': 'string', 'type': 'string'},
+                                      {'name': 'int', 'type': 'integer'},
+                                      {'name': 'object', 'type': 'object'}],
+                       name='benchmark')
+        DataObject.load_klass(self.klass)
+        DataObject.objects.bulk_create([
+            DataObject(_klass=self.klass, _data={'1_string': 'x' * 100, '1_int': str(i),
+                                                 '1_object': json.dumps({'key': ['value'] * 10})}, _files={})
+            for i in range(max(self.page_sizes))
+        ])
+        self.url = reverse('v2:dataobject-list', args=(self.instance.name, self.klass.name))
+
+    def measure_list(self, label, page_size):
+        # Peak of python allocations is used instead of RSS as RSS of test process never goes down
+        tracemalloc.start()
+        start = time()
+        response = self.client.get(self.url, {'page_size': page_size})
+        content = iter(response.streaming_content if response.streaming else [response.content])
+        next(content)
+        ttfb = time() - start
+        for _ in content:
+            pass
+        total = time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.report('{} {}'.format(label, page_size), 'ttfb %.1fms, total %.1fms, peak memory %.0fKB',
+                    ttfb * 1000, total * 1000, peak / 1024)
+
+    def test_list_rendering(self):
+        for page_size in self.page_sizes:
+            with override_settings(STREAMING_LIST_MIN_SIZE=page_size + 1):
+                self.measure_list('rendered', page_size)
+            with override_settings(STREAMING_LIST_MIN_SIZE=0):
+                self.measure_list('streamed', page_size)
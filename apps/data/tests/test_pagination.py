@@ -1,10 +1,13 @@
 from unittest import mock
 
+from django.db import connections
 from django.test import override_settings
 from django.urls import reverse
 from django_dynamic_fixture import G
+from munch import Munch
 from rest_framework import status
 
+from apps.core.pagination import OrderedCursor, OrderedPagination
 from apps.core.tests.testcases import SyncanoAPITestBase
 from apps.data.models import DataObject, Klass
 from apps.instances.helpers import set_current_instance
@@ -250,3 +253,74 @@ class TestKeySetWithNullsPagination(TestPaginationMixin):
 
         response = self.check_pagination_url(response.data['prev'], objects_len=4)
         self.assertEqual(first_page_objects, response.data['objects'])
+
+
+class TestKeySetPaginationPlans(TestPaginationMixin):
+    # Supported order index field types with a valid cursor value for each
+    field_values = {
+        'string': 'abc',
+        'integer': 10,
+        'float': 1.5,
+        'boolean': True,
+        'datetime': '2018-01-01T00:00:00.000000Z',
+        'reference': 10,
+    }
+    cursors = (
+        OrderedCursor(None, None, None),
+        OrderedCursor(1, 1000, 'value'),
+        OrderedCursor(0, 1000, 'value'),
+        OrderedCursor(1, 1000, None),
+        OrderedCursor(0, 1000, None),
+    )
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True, CREATE_INDEXES_CONCURRENTLY=False)
+    def setUp(self):
+        super().setUp()
+
+        schema = [{'name': 'f_{}'.format(field_type), 'type': field_type, 'order_index': True}
+                  for field_type in self.field_values]
+        schema[-1]['target'] = 'self'
+        self.klass = G(Klass, schema=schema, description='test', name='test1')
+        self.klass.refresh_from_db()
+        DataObject.load_klass(self.klass)
+
+    def get_querysets(self, order_by, cursor):
+        pagination = OrderedPagination()
+        pagination.request = Munch(query_params={'order_by': order_by})
+        pagination.order_fields = set()
+
+        queryset, _ = pagination._process_object_pagination(DataObject.objects.filter(_klass=self.klass), cursor)
+        return [qs for qs in (queryset, pagination.tail_queryset) if qs is not None]
+
+    def get_plan(self, queryset):
+        sql, params = queryset[:10].query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            # Make sure that table size does not matter, sequential scan should only be used if index does not match
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            cursor.execute('EXPLAIN {}'.format(sql), params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_ordering_uses_order_index(self):
+        for field_type, value in self.field_values.items():
+            field_name = 'f_{}'.format(field_type)
+            index_name = 'data_klass_{}_order_{}'.format(self.klass.pk, self.klass.mapping[field_name])
+
+            for order_by in (field_name, '-{}'.format(field_name)):
+                for cursor in self.cursors:
+                    if cursor.last_value is not None:
+                        cursor = cursor._replace(last_value=value)
+
+                    for queryset in self.get_querysets(order_by, cursor):
+                        with self.subTest(order_by=order_by, cursor=cursor):
+                            plan = self.get_plan(queryset)
+                            self.assertRegex(plan, r'Index (Only )?Scan (Backward )?using {}'.format(index_name))
+                            self.assertNotIn('Sort', plan)
+
+    def test_seeking_is_done_with_index_condition(self):
+        for field_type, value in self.field_values.items():
+            field_name = 'f_{}'.format(field_type)
+            for order_by in (field_name, '-{}'.format(field_name)):
+                queryset = self.get_querysets(order_by, OrderedCursor(1, 1000, value))[0]
+                with self.subTest(order_by=order_by):
+                    self.assertRegex(self.get_plan(queryset), r'Index Cond: \(ROW\(')
@@ -83,6 +83,19 @@ class TestObjectsAccess(AclTestCase, UserTestCase):
         self.assert_object_access(acl={'groups': {str(group.id): ['read']},
                                        'users': {str(self.user.id): ['read']}})
 
+    def test_if_objects_created_in_bulk_are_listed_with_user_permissions(self):
+        url = reverse('v2:dataobject-bulk', args=(self.instance.name, self.klass.name))
+        response = self.client.post(url, {'create': [{'a': 'test', 'acl': {'users': {str(self.user.id): ['read']}}},
+                                                     {'a': 'test', 'acl': {}}]},
+                                    HTTP_X_API_KEY=self.instance.owner.key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['code'] for result in response.data['create']], [status.HTTP_201_CREATED] * 2)
+        readable_id = response.data['create'][0]['content']['id']
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([obj['id'] for obj in response.data['objects']], [readable_id])
+
     def test_if_write_with_improper_permissions_is_denied(self):
         group = G(Group)
         G(Membership, user=self.user, group=group)
@@ -1,7 +1,9 @@
 
+from django.conf import settings
 from django.db import models
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
+from rest_framework.serializers import raise_errors_on_nested_writes
 from rest_framework.validators import UniqueValidator
 from rest_framework_hstore.fields import HStoreField
 from rest_framework_hstore.serializers import HStoreSerializer as _HStoreSerializer
@@ -38,6 +40,18 @@ class HStoreSerializer(_HStoreSerializer):
     def create(self, validated_data):
         return super(_HStoreSerializer, self).create(validated_data)
 
+    @disabled_hstore_fields
+    def build(self, **kwargs):
+        """
+        Create instance from validated data the same way save() does but without saving it,
+        e.g. so that it can be inserted in bulk.
+        """
+        assert self.instance is None, 'Only new instances can be built.'
+        validated_data = dict(self.validated_data, **kwargs)
+        raise_errors_on_nested_writes('create', self, validated_data)
+        self.instance = self.Meta.model(**validated_data)
+        return self.instance
+
     def contribute_to_field_mapping(self):
         """
         add DictionaryField to field_mapping
@@ -234,3 +248,18 @@ class DataObjectDetailMixin(ProcessReadOnlyMixin, ProcessFieldsMixin, ExpectedRe
 
 class DataObjectDetailSerializer(DataObjectDetailMixin, DataObjectSerializer):
     pass
+
+
+class DataObjectBulkSerializer(serializers.Serializer):
+    create = serializers.ListField(child=serializers.DictField(), required=False)
+    update = serializers.ListField(child=serializers.DictField(), required=False)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, data):
+        objects_count = sum(len(items) for items in data.values())
+        if not objects_count:
+            raise serializers.ValidationError('No objects to process.')
+        if objects_count > settings.DATA_OBJECT_BULK_MAX_SIZE:
+            raise serializers.ValidationError('Too many objects to process (exceeds {max}).'.format(
+                max=settings.DATA_OBJECT_BULK_MAX_SIZE))
+        return data
@@ -1,6 +1,8 @@
 from django.conf import settings
 from rest_condition import And, Or
-from rest_framework import permissions, viewsets
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.response import Response
 from rest_framework_extensions.mixins import DetailSerializerMixin
 
@@ -15,9 +17,17 @@ from apps.billing.models import AdminLimit
 from apps.billing.permissions import OwnerInGoodStanding
 from apps.channels.permissions import HasPublishPermission
 from apps.core.decorators import sql_timeout
+from apps.core.exceptions import ModelNotFound
 from apps.core.helpers import is_query_param_true
-from apps.core.mixins.views import AtomicMixin, AutocompleteMixin, NestedViewSetMixin, SignalSenderModelMixin
+from apps.core.mixins.views import (
+    AtomicMixin,
+    AutocompleteMixin,
+    NestedViewSetMixin,
+    SignalSenderModelMixin,
+    StreamingListMixin
+)
 from apps.core.pagination import OrderedPagination
+from apps.core.signals import apiview_bulk_processed
 from apps.data.exceptions import ChannelPublishNotAllowed, KlassCountExceeded
 from apps.data.filters import QueryFilterBackend
 from apps.data.mixins import ObjectSchemaProcessViewMixin
@@ -30,6 +40,7 @@ from apps.data.permissions import (
     ProtectUserProfileKlass
 )
 from apps.data.v1.serializers import (
+    DataObjectBulkSerializer,
     DataObjectDetailSerializer,
     DataObjectSerializer,
     KlassDetailSerializer,
@@ -103,6 +114,7 @@ class ObjectViewSet(AtomicMixin,
                     NestedViewSetMixin,
                     ObjectSchemaProcessViewMixin,
                     DetailSerializerMixin,
+                    StreamingListMixin,
                     SignalSenderModelMixin,
                     viewsets.ModelViewSet):
     model = DataObject
@@ -199,12 +211,180 @@ class ObjectViewSet(AtomicMixin,
             serializer = self.get_serializer(page, many=True)
             objects_count = None
             if is_query_param_true(request, 'include_count'):
-                objects_count = queryset.count_estimate()
-            return self.get_paginated_response(serializer.data, objects_count=objects_count)
+                objects_count = queryset.count_estimate(cache_timeout=settings.DATA_OBJECTS_COUNT_CACHE_TIMEOUT)
+            return self.get_paginated_response(self.get_list_data(serializer), objects_count=objects_count)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def check_permissions(self, request):
+        # Bulk request consists of create, update and delete operations that are checked separately
+        if self.action != 'bulk':
+            super().check_permissions(request)
+
+    @list_route(methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create, update and delete objects in bulk.
+        Objects are validated one by one but written with single statements, results are reported per object.
+        """
+        serializer = DataObjectBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        self.bulk_checked_channels = set()
+        results = {}
+        try:
+            for action in ('create', 'update', 'delete'):
+                if action in serializer.validated_data:
+                    perform_func = getattr(self, 'perform_bulk_{}'.format(action))
+                    results[action] = perform_func(request, serializer.validated_data[action])
+        finally:
+            self.action = 'bulk'
+        return Response(results)
+
+    def perform_bulk_create(self, request, items):
+        self.action = 'create'
+        try:
+            self.check_permissions(request)
+        except APIException as exc:
+            return [self.get_bulk_error(exc)] * len(items)
+
+        results = [None] * len(items)
+        pending = []
+        for i, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            try:
+                serializer.is_valid(raise_exception=True)
+                self.check_bulk_channel_permission(request, serializer.validated_data.get('channel'))
+            except APIException as exc:
+                results[i] = self.get_bulk_error(exc)
+            else:
+                pending.append((i, serializer))
+
+        if self.has_unique_fields():
+            saved = self.perform_bulk_serializers_save(pending, results)
+        else:
+            for _, serializer in pending:
+                serializer.build()
+            self.model.bulk_insert([serializer.instance for _, serializer in pending])
+            saved = pending
+        return self.finalize_bulk(saved, results, status.HTTP_201_CREATED, 'create')
+
+    def perform_bulk_update(self, request, items):
+        self.action = 'partial_update'
+        try:
+            self.check_permissions(request)
+        except APIException as exc:
+            return [self.get_bulk_error(exc)] * len(items)
+
+        ids = [item.get('id') for item in items]
+        objects = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        results = [None] * len(items)
+        pending = []
+        seen_ids = set()
+
+        for i, (pk, item) in enumerate(zip(ids, items)):
+            try:
+                serializer = self.validate_bulk_update_item(request, pk, item, objects, seen_ids)
+            except APIException as exc:
+                results[i] = self.get_bulk_error(exc)
+            else:
+                pending.append((i, serializer))
+
+        if self.has_unique_fields():
+            saved = self.perform_bulk_serializers_save(pending, results)
+        else:
+            for _, serializer in pending:
+                for attr, value in serializer.validated_data.items():
+                    if attr != 'expected_revision':
+                        setattr(serializer.instance, attr, value)
+            self.model.bulk_save([serializer.instance for _, serializer in pending])
+            saved = pending
+        return self.finalize_bulk(saved, results, status.HTTP_200_OK, 'update')
+
+    def validate_bulk_update_item(self, request, pk, item, objects, seen_ids):
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            raise ValidationError({'id': ['A valid integer is required.']})
+        if pk in seen_ids:
+            raise ValidationError({'id': ['Object can only be updated once per request.']})
+        seen_ids.add(pk)
+
+        obj = objects.get(pk)
+        if obj is None:
+            raise ModelNotFound(self.model)
+        self.check_object_permissions(request, obj)
+        if obj.channel_id is not None:
+            self.check_bulk_channel_permission(request, obj.channel)
+
+        serializer = self.serializer_detail_class(obj, data=item, partial=True, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def perform_bulk_delete(self, request, items):
+        self.action = 'destroy'
+        try:
+            self.check_permissions(request)
+        except APIException as exc:
+            return [self.get_bulk_error(exc)] * len(items)
+
+        objects = self.get_queryset().in_bulk(set(items))
+        results = []
+        deleted = []
+
+        for pk in items:
+            # Pop so that duplicated ids are reported as missing
+            obj = objects.pop(pk, None)
+            try:
+                if obj is None:
+                    raise ModelNotFound(self.model)
+                self.check_object_permissions(request, obj)
+                if obj.channel_id is not None:
+                    self.check_bulk_channel_permission(request, obj.channel)
+            except APIException as exc:
+                results.append(self.get_bulk_error(exc))
+            else:
+                results.append({'code': status.HTTP_204_NO_CONTENT})
+                deleted.append(obj)
+
+        if deleted:
+            self.model.bulk_soft_delete(deleted)
+            apiview_bulk_processed.send(sender=self.model, view=self, instances=deleted, action='delete')
+        return results
+
+    def perform_bulk_serializers_save(self, pending, results):
+        # Save objects one by one so that integrity errors of unique fields are reported per object
+        saved = []
+        for i, serializer in pending:
+            try:
+                serializer.save()
+            except APIException as exc:
+                results[i] = self.get_bulk_error(exc)
+            else:
+                saved.append((i, serializer))
+        return saved
+
+    def finalize_bulk(self, saved, results, code, action):
+        instances = []
+        for i, serializer in saved:
+            results[i] = {'code': code, 'content': serializer.data}
+            instances.append(serializer.instance)
+
+        if instances:
+            apiview_bulk_processed.send(sender=self.model, view=self, instances=instances, action=action)
+        return results
+
+    def get_bulk_error(self, exc):
+        response = self.get_exception_handler()(exc, self.get_exception_handler_context())
+        return {'code': response.status_code, 'content': response.data}
+
+    def check_bulk_channel_permission(self, request, channel):
+        if channel is not None and channel.pk not in self.bulk_checked_channels:
+            self.check_channel_permission(request, channel)
+            self.bulk_checked_channels.add(channel.pk)
+
+    def has_unique_fields(self):
+        return any(field.get('unique') for field in self.klass.schema)
+
     def check_channel_permission(self, request, obj):
         # That's a little custom but as it is done in post_save and operate on an object
         # that is fetched later with a share lock (select for update).
@@ -39,6 +39,8 @@ class DataObjectHighLevelApiViewSetBase(AtomicMixin,
         Or(AdminHasPermissions, ApiKeyHasPermissions),
         OwnerInGoodStanding,
     )
+    # Runs data object views that load class schema
+    batch_concurrent = False
 
     def get_queryset(self):
         queryset = super().get_queryset()
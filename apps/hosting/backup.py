@@ -25,7 +25,7 @@ class HostingFileBackup(ModelBackup):
 
     def backup_object(self, storage, obj):
         path = obj['file_object']
-        obj['file_object'] = storage.add_file(Hosting.get_storage().open(path))
+        obj['file_object'] = storage.add_file(path, Hosting.get_storage())
         super().backup_object(storage, obj)
 
     def to_instance(self, storage, representation):
@@ -1,4 +1,5 @@
 # coding=UTF8
+import re
 
 
 def add_domains_to_syncano_instance(syncano_instance, domains):
@@ -11,3 +12,64 @@ def remove_domains_from_syncano_instance(syncano_instance, domains):
     for domain in domains:
         if domain in syncano_instance.domains:
             syncano_instance.domains.remove(domain)
+
+
+class HostingRouter:
+    """
+    Sockets mapping of a hosting compiled for fast path matching. Patterns without globs are matched
+    through dict lookup, patterns with only a trailing glob through prefix trie and the rest through
+    compiled regular expressions. As before, first matching pattern in mapping order wins.
+    """
+    TERMINAL = ''
+
+    def __init__(self, sockets_mapping):
+        self.exact = {}
+        self.prefixes = {}
+        self.patterns = []
+
+        for index, (pattern, socket) in enumerate(sockets_mapping):
+            route = (index, socket)
+            glob_pos = pattern.find('*')
+
+            if glob_pos == -1:
+                self.exact.setdefault(pattern, route)
+            elif glob_pos == len(pattern) - 1:
+                node = self.prefixes
+                for char in pattern[:-1]:
+                    node = node.setdefault(char, {})
+                node.setdefault(self.TERMINAL, route)
+            else:
+                regex = '.*'.join(re.escape(part) for part in pattern.split('*'))
+                self.patterns.append((index, re.compile(r'{}\Z'.format(regex), re.DOTALL), socket))
+
+    def match(self, path):
+        """
+        Return socket mapped to given path or None.
+        """
+        best = self.exact.get(path)
+
+        # Every prefix terminal on the way matches, keep the one that is first in mapping order
+        node = self.prefixes
+        for char in path:
+            best = self._first(best, node.get(self.TERMINAL))
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            best = self._first(best, node.get(self.TERMINAL))
+
+        for index, regex, socket in self.patterns:
+            if best is not None and index > best[0]:
+                break
+            if regex.match(path):
+                best = (index, socket)
+                break
+
+        if best is not None:
+            return best[1]
+
+    @staticmethod
+    def _first(route, other):
+        if route is None or other is not None and other[0] < route[0]:
+            return other
+        return route
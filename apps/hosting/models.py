@@ -1,11 +1,14 @@
 # coding=UTF8
 import os
 from crypt import crypt
+from itertools import chain
 from random import choice
 from string import ascii_letters, digits
 
+from django.conf import settings
 from django.contrib.postgres.fields import ArrayField, HStoreField
 from django.db import models
+from django.utils.encoding import force_text
 
 from apps.core.abstract_models import (
     CacheableAbstractModel,
@@ -17,11 +20,67 @@ from apps.core.abstract_models import (
 from apps.core.backends.storage import DefaultStorage
 from apps.core.decorators import cached
 from apps.core.fields import LowercaseCharField, NullableJSONField
-from apps.core.helpers import Cached, MetaIntEnum, generate_key, get_cur_loc_env
+from apps.core.helpers import (
+    Cached,
+    LRUCache,
+    MetaIntEnum,
+    add_post_transaction_success_operation,
+    generate_key,
+    get_cur_loc_env,
+    redis
+)
 from apps.core.permissions import API_PERMISSIONS, FULL_PERMISSIONS
+from apps.hosting.helpers import HostingRouter
 from apps.hosting.validators import VALID_DOMAIN_REGEX
 from apps.instances.helpers import get_current_instance
 
+router_cache = LRUCache(settings.HOSTING_ROUTER_CACHE_SIZE)
+
+FILE_MAP_KEY_TEMPLATE = 'hosting:filemap:{instance_pk}:{hosting_pk}'
+FILE_MAP_VERSION_KEY_TEMPLATE = 'hosting:filemap:{instance_pk}:{hosting_pk}:version'
+
+# Save built file map unless it already exists or files changed since they were read.
+# File map state is kept under '' field as paths are never empty.
+# KEYS: file map, version
+# ARGV: version files were read at, timeout, state, path1, name1, path2, name2...
+BUILD_FILE_MAP_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] or redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], '', ARGV[3])
+for i = 4, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+build_file_map_script = redis.register_script(BUILD_FILE_MAP_SCRIPT)
+
+# Bump file map version and apply file changes to file map if it is built.
+# KEYS: file map, version
+# ARGV: timeout, max size, path1, name1 (empty if file was removed), path2, name2...
+UPDATE_FILE_MAP_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+if redis.call('HGET', KEYS[1], '') ~= 'built' then
+    return
+end
+
+for i = 3, #ARGV, 2 do
+    if ARGV[i + 1] == '' then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    else
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+if redis.call('HLEN', KEYS[1]) > tonumber(ARGV[2]) + 1 then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], '', 'too_big')
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+"""
+update_file_map_script = redis.register_script(UPDATE_FILE_MAP_SCRIPT)
+
 
 def upload_hosting_file_to(instance, filename):
     _, ext = os.path.splitext(filename)
@@ -115,6 +174,19 @@ class Hosting(LiveAbstractModel, DescriptionAbstractModel,
     def is_browser_router_enabled(self):
         return self.config.get('browser_router', False)
 
+    def get_router(self):
+        """
+        Get router compiled from sockets mapping. Routers are kept in process wide LRU cache
+        and recompiled whenever hosting is updated.
+        """
+        cache_key = (get_current_instance().pk, self.pk, self.updated_at)
+
+        router = router_cache.get(cache_key)
+        if router is None:
+            router = HostingRouter(self.config.get('sockets_mapping', []))
+            router_cache.set(cache_key, router)
+        return router
+
     @classmethod
     def encrypt_passwd(cls, passwd):
         def salt():
@@ -175,3 +247,71 @@ class HostingFile(LiveAbstractModel, CacheableAbstractModel, CreatedUpdatedAtAbs
     @classmethod
     def invalidate_file(cls, hosting_id, path):
         cls.get_file_cached(hosting_id=hosting_id, path=path).invalidate()
+
+    @classmethod
+    def get_file_map(cls, hosting):
+        """
+        Get map of all hosting file paths to their storage names.
+        Returns None if hosting has too many files to keep them in file map.
+        """
+        file_map = HostingFileMap(hosting.id)
+        with redis.pipeline(transaction=False) as pipe:
+            pipe.hget(file_map.key, '')
+            pipe.get(file_map.version_key)
+            state, version = pipe.execute()
+
+        if state is None:
+            state = file_map.build(version)
+        if force_text(state) == HostingFileMap.TOO_BIG:
+            return None
+        return file_map
+
+    def update_file_map(self):
+        changes = {self.path: self.file_object.name if self.is_live and self.file_object else ''}
+        if self.has_changed('path') and self.old_value('path'):
+            changes[self.old_value('path')] = ''
+        add_post_transaction_success_operation(HostingFileMap(self.hosting_id).update, changes)
+
+
+class HostingFileMap:
+    """
+    Hosting file paths mapped to their storage names, kept in redis hash so that each path
+    is resolved with a single lookup. Hash is built once from database and then updated on file changes.
+    """
+    BUILT = 'built'
+    TOO_BIG = 'too_big'
+
+    def __init__(self, hosting_id):
+        instance_pk = get_current_instance().pk
+        self.hosting_id = hosting_id
+        self.key = FILE_MAP_KEY_TEMPLATE.format(instance_pk=instance_pk, hosting_pk=hosting_id)
+        self.version_key = FILE_MAP_VERSION_KEY_TEMPLATE.format(instance_pk=instance_pk, hosting_pk=hosting_id)
+
+    def get(self, path):
+        name = redis.hget(self.key, path) if path else None
+        if name is not None:
+            return force_text(name)
+
+    def is_empty(self):
+        return redis.hlen(self.key) <= 1
+
+    def build(self, version):
+        max_size = settings.HOSTING_FILE_MAP_MAX_SIZE
+        files = HostingFile.objects.filter(hosting=self.hosting_id).values_list('path', 'file_object')
+        files = list(files[:max_size + 1])
+
+        args = [force_text(version or ''), settings.HOSTING_FILE_MAP_TIMEOUT]
+        if len(files) > max_size:
+            state = self.TOO_BIG
+            args.append(state)
+        else:
+            state = self.BUILT
+            args.append(state)
+            args += chain.from_iterable(files)
+        build_file_map_script(keys=[self.key, self.version_key], args=args)
+        return state
+
+    def update(self, changes):
+        args = [settings.HOSTING_FILE_MAP_TIMEOUT, settings.HOSTING_FILE_MAP_MAX_SIZE]
+        args += chain.from_iterable(changes.items())
+        update_file_map_script(keys=[self.key, self.version_key], args=args)
@@ -85,6 +85,7 @@ def hostingfile_post_save_handler(sender, instance, created, **kwargs):
     Hosting.is_hosting_empty.invalidate(args=(instance.hosting_id,), immediate=False)
     # Invalidate hosting file.
     HostingFile.invalidate_file(hosting_id=instance.hosting_id, path=instance.path)
+    instance.update_file_map()
 
     if instance.is_live and instance.file_object:
         # Update instance storage size
@@ -59,6 +59,33 @@ class TestHostingFileViewRedirect(TestHostingFileViewBase):
             HostingView.get_accel_redirect(request, self.hosting_file.file_object.url, 'empty', query='')
         )
 
+    def test_files_are_resolved_through_file_map(self):
+        with mock.patch('apps.hosting.models.HostingFile.get_file', side_effect=AssertionError) as get_file_mock:
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get('/missing.html')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(get_file_mock.called)
+
+    @override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+    def test_file_map_is_updated_on_file_changes(self):
+        self.assertEqual(self.client.get('/other.html').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNotNone(HostingFile.get_file_map(self.hosting).get('index.html'))
+
+        response = self._post_file('<html><body>Other</body></html>', path='other.html')
+        self.assertEqual(self.client.get('/other.html').status_code, status.HTTP_200_OK)
+
+        HostingFile.objects.get(id=response.data['id']).soft_delete()
+        self.assertEqual(self.client.get('/other.html').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(HostingFile.get_file_map(self.hosting).get('other.html'))
+
+    @override_settings(HOSTING_FILE_MAP_MAX_SIZE=0)
+    def test_redirect_without_file_map(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/missing.html')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_redirect_for_prefix(self):
         self.hosting.domains = ['abc']
         self.hosting.is_default = False
@@ -0,0 +1,32 @@
+# coding=UTF8
+from django.test import TestCase
+
+from apps.hosting.helpers import HostingRouter
+
+
+class TestHostingRouter(TestCase):
+    def test_matching(self):
+        router = HostingRouter([
+            ['/users/*', 'users'],
+            ['/', 'root'],
+            ['*.html', 'html'],
+            ['/a*b', 'ab'],
+            ['/*', 'all'],
+        ])
+        for path, socket in (
+            ('/users/abc', 'users'),
+            ('/users/', 'users'),
+            ('/', 'root'),
+            ('/index.html', 'html'),
+            ('/axxb', 'ab'),
+            ('/ab', 'ab'),
+            ('/abc', 'all'),
+            ('/users', 'all'),
+            ('', None),
+        ):
+            self.assertEqual(router.match(path), socket, path)
+
+    def test_first_pattern_in_mapping_order_wins(self):
+        router = HostingRouter([['/*', 'all'], ['/users/*', 'users'], ['/users/abc', 'exact'], ['*', 'any']])
+        self.assertEqual(router.match('/users/abc'), 'all')
+        self.assertEqual(router.match('users'), 'any')
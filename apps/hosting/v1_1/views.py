@@ -16,7 +16,7 @@ from apps.admins.permissions import AdminHasPermissions
 from apps.billing.permissions import OwnerInGoodStanding
 from apps.core.authentication import AUTHORIZATION_HEADER
 from apps.core.exceptions import ModelNotFound
-from apps.core.helpers import Cached, get_cur_loc_env, glob, redis, run_api_view
+from apps.core.helpers import Cached, get_cur_loc_env, redis, run_api_view
 from apps.core.mixins.views import AtomicMixin, NestedViewSetMixin
 from apps.hosting.exceptions import ValidCNameMissing
 from apps.hosting.models import Hosting, HostingFile
@@ -227,10 +227,10 @@ class HostingView(InstanceBasedMixin, generics.GenericAPIView):
             response['WWW-Authenticate'] = 'Basic realm="Restricted"'
             return response
 
-        for pattern, socket in hosting.config.get('sockets_mapping', []):
-            if glob(pattern, path):
-                request.version = 'v2'
-                return run_api_view('socket-endpoint-endpoint', (request.instance.name, socket), request)
+        socket = hosting.get_router().match(path)
+        if socket is not None:
+            request.version = 'v2'
+            return run_api_view('socket-endpoint-endpoint', (request.instance.name, socket), request)
 
         if request.method != 'GET':
             self.http_method_not_allowed(request)
@@ -241,18 +241,31 @@ class HostingView(InstanceBasedMixin, generics.GenericAPIView):
         path = path.lstrip('/')
         query = iri_to_uri(request.META.get('QUERY_STRING', ''))
 
-        try:
-            hosting_file = HostingFile.get_file(hosting=hosting, path=path)
-            return self.get_accel_response(request,
-                                           Hosting.get_storage().internal_url(hosting_file.file_object.name),
-                                           self.EMPTY_404_KEY,
-                                           query)
-        except HostingFile.DoesNotExist:
-            return self.handle_missing_file(request, hosting, query, path)
-
-    def handle_missing_file(self, request, hosting, query, path):
+        file_map = HostingFile.get_file_map(hosting)
+        url = self.get_file_url(hosting, path, file_map)
+        if url is not None:
+            return self.get_accel_response(request, url, self.EMPTY_404_KEY, query)
+        return self.handle_missing_file(request, hosting, query, path, file_map)
+
+    def get_file_url(self, hosting, path, file_map=None):
+        """
+        Get internal url of hosting file. Resolved through file map if it is available to avoid per path lookups.
+        """
+        if file_map is not None:
+            name = file_map.get(path)
+            if name is None:
+                return None
+        else:
+            try:
+                name = HostingFile.get_file(hosting=hosting, path=path).file_object.name
+            except HostingFile.DoesNotExist:
+                return None
+        return Hosting.get_storage().internal_url(name)
+
+    def handle_missing_file(self, request, hosting, query, path, file_map=None):
         # Return default web pages if path is empty and hosting has no files.
-        if hosting.is_empty and path == self.DEFAULT_FILE:
+        is_empty = file_map.is_empty() if file_map is not None else hosting.is_empty
+        if is_empty and path == self.DEFAULT_FILE:
             return HttpResponse(
                 self.DEFAULT_CONTENT_TMPL.substitute(iframe=self.EMPTY_INDEX_IFRAME),
                 content_type='text/html'
@@ -260,24 +273,18 @@ class HostingView(InstanceBasedMixin, generics.GenericAPIView):
 
         # Return index.html if browser router is enabled.
         if hosting.is_browser_router_enabled:
-            try:
-                hosting_file = HostingFile.get_file(hosting=hosting, path=self.DEFAULT_FILE)
-            except HostingFile.DoesNotExist:
-                pass
-            else:
+            url = self.get_file_url(hosting, self.DEFAULT_FILE, file_map)
+            if url is not None:
                 return self.get_accel_response(request,
-                                               url=Hosting.get_storage().internal_url(hosting_file.file_object.name),
+                                               url=url,
                                                url_404=self.EMPTY_404_KEY,
                                                query=query)
 
         # Check for custom 404.
-        try:
-            hosting_file = HostingFile.get_file(hosting=hosting, path=self.DEFAULT_404_FILE)
-        except HostingFile.DoesNotExist:
+        url_404 = self.get_file_url(hosting, self.DEFAULT_404_FILE, file_map)
+        if url_404 is None:
             return self.create_404_response()
 
-        url_404 = Hosting.get_storage().internal_url(hosting_file.file_object.name)
-
         return self.get_accel_response(request,
                                        url='{}/{}'.format(url_404.rsplit('/', 1)[0], path),
                                        url_404=url_404,
@@ -0,0 +1,115 @@
+# coding=UTF8
+
+# Copy a schema with its data in a single call. Tables are filled before their indexes and foreign keys are added.
+# search_path is limited to pg_catalog so that pg_get_*def() functions qualify every object of the source schema
+# and definitions can be moved to destination schema by replacing that prefix.
+CLONE_SCHEMA_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION public.clone_schema(source_schema TEXT, dest_schema TEXT)
+  RETURNS VOID AS
+  $func$
+  DECLARE
+    source_oid  OID;
+    source_name TEXT := quote_ident(source_schema) || '.';
+    dest_name   TEXT := quote_ident(dest_schema) || '.';
+    rec         RECORD;
+  BEGIN
+    SELECT oid INTO STRICT source_oid FROM pg_namespace WHERE nspname = source_schema;
+    EXECUTE format('CREATE SCHEMA %I', dest_schema);
+
+    -- Functions first as they may be used by defaults, constraints and indexes
+    FOR rec IN SELECT oid FROM pg_proc WHERE pronamespace = source_oid AND prokind IN ('f', 'p') ORDER BY oid LOOP
+      EXECUTE replace(pg_get_functiondef(rec.oid), source_name, dest_name);
+    END LOOP;
+
+    FOR rec IN SELECT * FROM pg_sequences WHERE schemaname = source_schema LOOP
+      EXECUTE format('CREATE SEQUENCE %I.%I AS %s INCREMENT BY %s MINVALUE %s MAXVALUE %s START WITH %s CACHE %s %s',
+                     dest_schema, rec.sequencename, rec.data_type, rec.increment_by, rec.min_value, rec.max_value,
+                     rec.start_value, rec.cache_size, CASE WHEN rec.cycle THEN 'CYCLE' ELSE 'NO CYCLE' END);
+      IF rec.last_value IS NOT NULL THEN
+        PERFORM setval(format('%I.%I', dest_schema, rec.sequencename)::REGCLASS, rec.last_value);
+      END IF;
+    END LOOP;
+
+    FOR rec IN SELECT relname FROM pg_class WHERE relnamespace = source_oid AND relkind = 'r' ORDER BY oid LOOP
+      EXECUTE format('CREATE TABLE %1$I.%3$I (LIKE %2$I.%3$I INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+                     'INCLUDING STORAGE INCLUDING COMMENTS)', dest_schema, source_schema, rec.relname);
+      EXECUTE format('INSERT INTO %1$I.%3$I SELECT * FROM %2$I.%3$I', dest_schema, source_schema, rec.relname);
+    END LOOP;
+
+    -- Point defaults (e.g. nextval of serial columns) to destination sequences
+    FOR rec IN SELECT c.relname, a.attname, pg_get_expr(d.adbin, d.adrelid) AS expr
+               FROM pg_attrdef d
+                 JOIN pg_class c ON c.oid = d.adrelid
+                 JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+               WHERE c.relnamespace = source_oid AND c.relkind = 'r' LOOP
+      CONTINUE WHEN strpos(rec.expr, source_name) = 0;
+      EXECUTE format('ALTER TABLE %I.%I ALTER COLUMN %I SET DEFAULT %s',
+                     dest_schema, rec.relname, rec.attname, replace(rec.expr, source_name, dest_name));
+    END LOOP;
+
+    FOR rec IN SELECT s.relname AS sequence_name, t.relname AS table_name, a.attname
+               FROM pg_depend d
+                 JOIN pg_class s ON s.oid = d.objid
+                 JOIN pg_class t ON t.oid = d.refobjid
+                 JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+               WHERE s.relnamespace = source_oid AND s.relkind = 'S' AND d.deptype = 'a'
+                 AND d.classid = 'pg_class'::REGCLASS AND d.refclassid = 'pg_class'::REGCLASS LOOP
+      EXECUTE format('ALTER SEQUENCE %I.%I OWNED BY %I.%I.%I',
+                     dest_schema, rec.sequence_name, dest_schema, rec.table_name, rec.attname);
+    END LOOP;
+
+    -- Primary key, unique and exclusion constraints, then the rest of indexes
+    FOR rec IN SELECT c.relname, con.conname, pg_get_constraintdef(con.oid) AS definition
+               FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid
+               WHERE c.relnamespace = source_oid AND con.contype IN ('p', 'u', 'x') ORDER BY con.oid LOOP
+      EXECUTE format('ALTER TABLE %I.%I ADD CONSTRAINT %I %s',
+                     dest_schema, rec.relname, rec.conname, replace(rec.definition, source_name, dest_name));
+    END LOOP;
+
+    FOR rec IN SELECT pg_get_indexdef(i.indexrelid) AS definition
+               FROM pg_index i JOIN pg_class c ON c.oid = i.indrelid
+               WHERE c.relnamespace = source_oid AND c.relkind = 'r'
+                 AND NOT EXISTS(SELECT 1 FROM pg_constraint con
+                                WHERE con.conindid = i.indexrelid AND con.contype IN ('p', 'u', 'x'))
+               ORDER BY i.indexrelid LOOP
+      EXECUTE replace(rec.definition, source_name, dest_name);
+    END LOOP;
+
+    FOR rec IN SELECT c.relname, con.conname, pg_get_constraintdef(con.oid) AS definition
+               FROM pg_constraint con JOIN pg_class c ON c.oid = con.conrelid
+               WHERE c.relnamespace = source_oid AND con.contype = 'f' ORDER BY con.oid LOOP
+      EXECUTE format('ALTER TABLE %I.%I ADD CONSTRAINT %I %s',
+                     dest_schema, rec.relname, rec.conname, replace(rec.definition, source_name, dest_name));
+    END LOOP;
+
+    FOR rec IN SELECT relname, pg_get_viewdef(oid) AS definition FROM pg_class
+               WHERE relnamespace = source_oid AND relkind = 'v' ORDER BY oid LOOP
+      EXECUTE format('CREATE VIEW %I.%I AS %s',
+                     dest_schema, rec.relname, replace(rec.definition, source_name, dest_name));
+    END LOOP;
+
+    FOR rec IN SELECT pg_get_triggerdef(t.oid) AS definition
+               FROM pg_trigger t JOIN pg_class c ON c.oid = t.tgrelid
+               WHERE c.relnamespace = source_oid AND NOT t.tgisinternal ORDER BY t.oid LOOP
+      EXECUTE replace(rec.definition, source_name, dest_name);
+    END LOOP;
+  END
+  $func$ LANGUAGE plpgsql SET search_path = pg_catalog;
+"""
+
+
+def install_clone_schema_function(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(CLONE_SCHEMA_FUNCTION_SQL)
+
+
+def clone_schema(connection, source_schema, dest_schema):
+    """
+    Create 'dest_schema' as a copy of 'source_schema' with all of its objects and rows.
+    """
+    # safety check
+    from apps.instances.postgresql_backend.base import _check_identifier
+
+    _check_identifier(dest_schema)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT public.clone_schema(%s, %s)', [source_schema, dest_schema])
@@ -1,10 +1,30 @@
 # coding=UTF8
+import random
+import time
+from hashlib import md5
+
 from django.apps import apps
 from django.conf import settings
 from django.core.management import call_command
-from django.db import router
-
-from apps.core.helpers import get_request_cache
+from django.db import DatabaseError, router, transaction
+
+from apps.core.helpers import generate_key, get_request_cache
+from apps.instances.clone import clone_schema, install_clone_schema_function
+
+SPARE_SCHEMA_PREFIX = '_spare_'
+SPARE_SCHEMA_MIGRATING = 'migrating'
+TEMPLATE_SCHEMA_PREFIX = '_template_'
+# Schemas with given prefix and their comment (migrations state of spare schemas)
+PREFIXED_SCHEMAS_SQL = """
+SELECT nspname, obj_description(oid, 'pg_namespace') FROM pg_catalog.pg_namespace
+WHERE nspname LIKE %s ORDER BY nspname
+"""
+# Tables of a schema with creation and modification timestamps
+TIMESTAMPED_TABLES_SQL = """
+SELECT table_name FROM information_schema.columns
+WHERE table_schema = %s AND column_name IN ('created_at', 'updated_at')
+GROUP BY table_name HAVING COUNT(*) = 2 ORDER BY table_name
+"""
 
 
 def get_tenant_model():
@@ -48,12 +68,13 @@ def create_schema(connection, schema_name, check_if_exists=False, sync_schema=Tr
         return False
 
     if sync_schema:
-        # migrate will handle schema creation instead
-        call_command('migrate',
-                     shared=False,
-                     schema_name=schema_name,
-                     interactive=False,
-                     verbosity=getattr(settings, 'SCHEMA_MIGRATIONS_VERBOSITY', 1))
+        template_schema = get_template_schema(connection)
+        if template_schema:
+            clone_schema(connection, template_schema, schema_name)
+            reset_schema_timestamps(connection, schema_name)
+        else:
+            # migrate will handle schema creation instead
+            migrate_schema(schema_name)
     else:
         cursor = connection.cursor()
         cursor.execute('CREATE SCHEMA "%s"' % schema_name)
@@ -61,6 +82,27 @@ def create_schema(connection, schema_name, check_if_exists=False, sync_schema=Tr
     return True
 
 
+def reset_schema_timestamps(connection, schema_name):
+    """
+    Set creation and modification time of rows created along with a schema (e.g. default channels) to now
+    as the schema could have been migrated long before it was taken over by an instance.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(TIMESTAMPED_TABLES_SQL, [schema_name])
+        tables = [row[0] for row in cursor.fetchall()]
+        if tables:
+            cursor.execute(';'.join('UPDATE "%s"."%s" SET created_at = now(), updated_at = now()' % (schema_name, table)
+                                    for table in tables))
+
+
+def migrate_schema(schema_name):
+    call_command('migrate',
+                 shared=False,
+                 schema_name=schema_name,
+                 interactive=False,
+                 verbosity=getattr(settings, 'SCHEMA_MIGRATIONS_VERBOSITY', 1))
+
+
 def drop_schema(connection, schema_name):
     # safety check
     from apps.instances.postgresql_backend.base import _check_identifier
@@ -79,6 +121,151 @@ def rename_schema(connection, old_schema, new_schema):
     cursor.execute('ALTER SCHEMA "%s" RENAME TO "%s"' % (old_schema, new_schema))
 
 
+def get_migrations_state():
+    """
+    Return a tag of migrations of tenant apps. Spare schemas are only claimed when migrated to the current one
+    and new schemas are only cloned from a template schema of the current one.
+    """
+    from apps.core.management.commands.helpers.migrate import get_migrations
+
+    migrations = sorted('{}.{}'.format(migration.app, migration.name)
+                        for migration in get_migrations(settings.TENANT_APPS))
+    return md5('\n'.join(migrations).encode()).hexdigest()
+
+
+def is_unassigned_schema_name(schema_name):
+    return schema_name.startswith((SPARE_SCHEMA_PREFIX, TEMPLATE_SCHEMA_PREFIX))
+
+
+def get_unassigned_schemas_db():
+    return router.db_for_write(get_tenant_model(), context='new')
+
+
+def get_unassigned_tenant(schema_name):
+    """
+    Return an unsaved tenant object used to migrate a spare or template schema that does not belong to any instance.
+    """
+    return get_tenant_model()(name=schema_name, schema_name=schema_name, database=get_unassigned_schemas_db())
+
+
+def get_prefixed_schemas(connection, prefix):
+    with connection.cursor() as cursor:
+        cursor.execute(PREFIXED_SCHEMAS_SQL, [prefix.replace('_', '\\_') + '%'])
+        return cursor.fetchall()
+
+
+def get_spare_schemas(connection):
+    """
+    Return list of (schema_name, migrations_state) tuples of spare schemas.
+    """
+    return get_prefixed_schemas(connection, SPARE_SCHEMA_PREFIX)
+
+
+def set_schema_comment(connection, schema_name, comment):
+    with connection.cursor() as cursor:
+        cursor.execute('COMMENT ON SCHEMA "%s" IS %%s' % schema_name, [comment])
+
+
+def set_spare_schema_state(connection, schema_name, migrations_state):
+    set_schema_comment(connection, schema_name, migrations_state)
+
+
+def migrate_spare_schema(connection, schema_name, migrations_state):
+    """
+    Create (or migrate existing) spare schema and tag it with migrations state.
+    """
+    from apps.instances.postgresql_backend.base import _check_identifier
+
+    _check_identifier(schema_name)
+    migrate_schema(schema_name)
+    set_spare_schema_state(connection, schema_name, migrations_state)
+
+
+def create_spare_schema(connection, migrations_state):
+    schema_name = SPARE_SCHEMA_PREFIX + generate_key()
+    create_schema(connection, schema_name)
+    set_spare_schema_state(connection, schema_name, migrations_state)
+    return schema_name
+
+
+def claim_spare_schema(connection, schema_name):
+    """
+    Rename a spare schema migrated to the current state to 'schema_name'. Returns true if one was claimed.
+    Expected to run in a transaction so that concurrent claims of the same spare schema wait for it.
+    """
+    from apps.instances.postgresql_backend.base import _check_identifier
+
+    if not settings.INSTANCES_SPARE_SCHEMAS:
+        return False
+
+    _check_identifier(schema_name)
+    migrations_state = get_migrations_state()
+    spare_schemas = [name for name, state in get_spare_schemas(connection) if state == migrations_state]
+    # Spread concurrent claims over available schemas
+    random.shuffle(spare_schemas)
+
+    for spare_schema in spare_schemas:
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute('ALTER SCHEMA "%s" RENAME TO "%s"' % (spare_schema, schema_name))
+                cursor.execute('COMMENT ON SCHEMA "%s" IS NULL' % schema_name)
+            reset_schema_timestamps(connection, schema_name)
+        except DatabaseError:
+            # Claimed by someone else in the meantime
+            continue
+        return True
+    return False
+
+
+def get_template_schema(connection):
+    """
+    Return name of the template schema of current migrations state that new schemas are cloned from.
+    Template is built on first use. Returns None if templates are not used for 'connection' or when template
+    is being built by someone else at the moment.
+    """
+    from apps.instances.contextmanagers import instance_context
+
+    if not settings.INSTANCES_TEMPLATE_SCHEMA or connection.alias != get_unassigned_schemas_db():
+        return None
+
+    schema_name = TEMPLATE_SCHEMA_PREFIX + get_migrations_state()
+    if schema_exists(connection, schema_name):
+        return schema_name
+
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            # Lock is held until the end of transaction so that others do not wait for template to be built
+            # but fall back to migrate in the meantime
+            cursor.execute('SELECT pg_try_advisory_xact_lock(hashtext(%s))', [TEMPLATE_SCHEMA_PREFIX])
+            if not cursor.fetchone()[0]:
+                return None
+
+        if not schema_exists(connection, schema_name):
+            # Do not leave template tenant set as current instance after migrate
+            with instance_context(get_current_instance()):
+                migrate_schema(schema_name)
+            install_clone_schema_function(connection)
+    return schema_name
+
+
+def drop_stale_template_schemas(connection):
+    """
+    Drop template schemas of other migrations states once they have been stale for INSTANCES_TEMPLATE_SCHEMA_GRACE
+    seconds, so that during a rolling deploy templates that are still in use are not dropped while being cloned.
+    Time when template was first seen as stale is kept in its comment.
+    """
+    template_schema = TEMPLATE_SCHEMA_PREFIX + get_migrations_state()
+    now = int(time.time())
+
+    for schema_name, stale_since in get_prefixed_schemas(connection, TEMPLATE_SCHEMA_PREFIX):
+        if schema_name == template_schema:
+            continue
+        if stale_since is None:
+            set_schema_comment(connection, schema_name, str(now))
+        elif now - int(stale_since) >= settings.INSTANCES_TEMPLATE_SCHEMA_GRACE:
+            drop_schema(connection, schema_name)
+
+
 def set_current_instance(tenant):
     get_request_cache().current_tenant = tenant
 
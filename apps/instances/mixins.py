@@ -4,6 +4,7 @@ import re
 from django.conf import settings
 
 from apps.admins.models import Admin
+from apps.core.authentication import ApiKeyAuthentication
 from apps.core.exceptions import ModelNotFound, SyncanoException
 from apps.core.helpers import Cached
 from apps.instances.exceptions import InstanceLocationMismatch, InstanceVersionMismatch
@@ -37,12 +38,17 @@ class InstanceBasedMixin:
             try:
                 self.validate_instance(instance)
 
-                if getattr(request, 'instance', None) is None and request.META.get('HTTP_HOST_TYPE') != 'hosting':
-                    admin = Cached(Admin, kwargs={'id': instance.owner_id}).get()
-                    admin.update_last_access()
-
                 self.kwargs['instance'] = instance
                 set_current_instance(instance)
+
+                # Prefetch owner together with lookups needed by authentication in one round trip
+                lookups = ApiKeyAuthentication.get_lookups(request, instance)
+                if getattr(request, 'instance', None) is None and request.META.get('HTTP_HOST_TYPE') != 'hosting':
+                    owner_lookup = Cached(Admin, kwargs={'id': instance.owner_id})
+                    Cached.prefetch([owner_lookup] + lookups)
+                    owner_lookup.get().update_last_access()
+                else:
+                    Cached.prefetch(lookups)
             except SyncanoException as ex:
                 request.error = ex
                 instance = None
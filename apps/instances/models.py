@@ -21,7 +21,7 @@ from apps.core.permissions import API_PERMISSIONS
 from apps.core.validators import NotInValidator
 from apps.instances.contextmanagers import instance_context
 
-from .helpers import create_schema, get_new_instance_db
+from .helpers import claim_spare_schema, create_schema, get_new_instance_db
 
 Admin = settings.AUTH_USER_MODEL
 
@@ -86,7 +86,9 @@ class Instance(DescriptionAbstractModel, MetadataAbstractModel, CacheableAbstrac
             super().save(*args, **kwargs)
 
             with transaction.atomic(db):
-                create_schema(connections[db], schema_name=self.schema_name, sync_schema=sync_schema)
+                # Take over a pre-migrated spare schema if there is one available
+                if not sync_schema or not claim_spare_schema(connections[db], self.schema_name):
+                    create_schema(connections[db], schema_name=self.schema_name, sync_schema=sync_schema)
             self.owner.add_to_instance(self)
         else:
             super().save(*args, **kwargs)
@@ -0,0 +1,53 @@
+# coding=UTF8
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import connections
+from settings.celeryconf import app, register_task
+
+from apps.core.mixins import TaskLockMixin
+
+from .helpers import (
+    SPARE_SCHEMA_MIGRATING,
+    create_spare_schema,
+    drop_schema,
+    drop_stale_template_schemas,
+    get_migrations_state,
+    get_spare_schemas,
+    get_template_schema,
+    get_unassigned_schemas_db,
+    migrate_spare_schema,
+    set_spare_schema_state
+)
+
+logger = get_task_logger(__name__)
+
+
+@register_task
+class RefillSpareSchemasTask(TaskLockMixin, app.Task):
+    """
+    Keep INSTANCES_SPARE_SCHEMAS spare schemas migrated to the current state
+    and template schema of the current state ready for cloning.
+    """
+    lock_expire = 60 * 60
+
+    def run(self):
+        connection = connections[get_unassigned_schemas_db()]
+        migrations_state = get_migrations_state()
+        drop_stale_template_schemas(connection)
+        get_template_schema(connection)
+        spare_schemas = get_spare_schemas(connection)
+
+        for schema_name, _ in spare_schemas[settings.INSTANCES_SPARE_SCHEMAS:]:
+            drop_schema(connection, schema_name)
+        spare_schemas = spare_schemas[:settings.INSTANCES_SPARE_SCHEMAS]
+
+        for schema_name, state in spare_schemas:
+            if state != migrations_state:
+                logger.info('Migrating spare schema %s.', schema_name)
+                # Mark schema so that it is not claimed while being migrated
+                set_spare_schema_state(connection, schema_name, SPARE_SCHEMA_MIGRATING)
+                migrate_spare_schema(connection, schema_name, migrations_state)
+
+        for _ in range(settings.INSTANCES_SPARE_SCHEMAS - len(spare_schemas)):
+            schema_name = create_spare_schema(connection, migrations_state)
+            logger.info('Created spare schema %s.', schema_name)
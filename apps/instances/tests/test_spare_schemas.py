@@ -0,0 +1,117 @@
+# coding=UTF8
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase, override_settings, tag
+from django.utils import timezone
+from django_dynamic_fixture import G
+
+from apps.channels.models import Channel
+from apps.core.helpers import redis
+from apps.core.tests.mixins import BenchmarkMixin, CleanupTestCaseMixin
+from apps.data.models import OBJECTS_COUNT_KEY_TEMPLATE, Klass
+from apps.instances.contextmanagers import instance_context
+from apps.instances.helpers import (
+    SPARE_SCHEMA_PREFIX,
+    create_spare_schema,
+    drop_schema,
+    get_migrations_state,
+    get_spare_schemas,
+    get_template_schema,
+    get_unassigned_schemas_db,
+    migrate_spare_schema,
+    schema_exists,
+    set_spare_schema_state
+)
+from apps.instances.models import Instance
+from apps.instances.tasks import RefillSpareSchemasTask
+
+
+@override_settings(POST_TRANSACTION_SUCCESS_EAGER=True)
+class SpareSchemaTestBase(CleanupTestCaseMixin, TestCase):
+    def setUp(self):
+        self.connection = connections[get_unassigned_schemas_db()]
+
+    def tearDown(self):
+        for schema_name, _ in get_spare_schemas(self.connection):
+            drop_schema(self.connection, schema_name)
+        super().tearDown()
+
+
+@override_settings(INSTANCES_SPARE_SCHEMAS=2)
+class TestSpareSchemas(SpareSchemaTestBase):
+    def test_instance_claims_spare_schema(self):
+        spare_schema = create_spare_schema(self.connection, get_migrations_state())
+
+        claimed_at = timezone.now()
+        instance = G(Instance, name='claiming')
+        self.assertFalse(schema_exists(self.connection, spare_schema))
+        self.assertEqual(get_spare_schemas(self.connection), [])
+        self.assertTrue(schema_exists(self.connection, instance.schema_name))
+
+        with instance_context(instance):
+            self.assertGreaterEqual(Klass.objects.get(name=Klass.USER_PROFILE_NAME).created_at, claimed_at)
+            self.assertTrue(Channel.objects.filter(name=Channel.DEFAULT_NAME).exists())
+
+    def test_outdated_spare_schema_is_not_claimed(self):
+        spare_schema = create_spare_schema(self.connection, 'outdated')
+
+        with mock.patch('apps.instances.models.create_schema') as create_schema_mock:
+            G(Instance, name='notclaiming')
+        self.assertTrue(create_schema_mock.called)
+        self.assertTrue(schema_exists(self.connection, spare_schema))
+
+    @override_settings(INSTANCES_SPARE_SCHEMAS=0)
+    def test_disabled_pool(self):
+        create_spare_schema(self.connection, get_migrations_state())
+
+        with mock.patch('apps.instances.models.create_schema') as create_schema_mock:
+            G(Instance, name='notclaiming')
+        self.assertTrue(create_schema_mock.called)
+
+    def test_spare_schema_migration_does_not_init_objects_counts(self):
+        orphan_key = OBJECTS_COUNT_KEY_TEMPLATE.format(instance_pk=None)
+        redis.delete(orphan_key)
+
+        migrate_spare_schema(self.connection, SPARE_SCHEMA_PREFIX + 'test', get_migrations_state())
+        self.assertFalse(redis.exists(orphan_key))
+
+    def test_refill_task(self):
+        migrations_state = get_migrations_state()
+        RefillSpareSchemasTask.delay()
+        spare_schemas = get_spare_schemas(self.connection)
+        self.assertEqual([state for _, state in spare_schemas], [migrations_state] * 2)
+
+        # Outdated spare schemas are migrated, missing ones recreated
+        set_spare_schema_state(self.connection, spare_schemas[0][0], 'outdated')
+        drop_schema(self.connection, spare_schemas[1][0])
+        RefillSpareSchemasTask.delay()
+        refilled_schemas = get_spare_schemas(self.connection)
+        self.assertEqual([state for _, state in refilled_schemas], [migrations_state] * 2)
+        self.assertIn(spare_schemas[0][0], [name for name, _ in refilled_schemas])
+
+        with override_settings(INSTANCES_SPARE_SCHEMAS=1):
+            RefillSpareSchemasTask.delay()
+        self.assertEqual(len(get_spare_schemas(self.connection)), 1)
+
+
+@tag('benchmark')
+class BenchmarkInstanceCreation(BenchmarkMixin, SpareSchemaTestBase):
+    count = 5
+
+    def measure_creation(self, label):
+        with self.measure('instance creation ({})'.format(label), count=self.count, unit='instances'):
+            for i in range(self.count):
+                G(Instance, name='{}-{}'.format(label, i))
+
+    def test_instance_creation(self):
+        with override_settings(INSTANCES_SPARE_SCHEMAS=0, INSTANCES_TEMPLATE_SCHEMA=False):
+            self.measure_creation('migrate')
+
+        with override_settings(INSTANCES_SPARE_SCHEMAS=0):
+            get_template_schema(self.connection)
+            self.measure_creation('template-schema')
+
+        with override_settings(INSTANCES_SPARE_SCHEMAS=self.count):
+            RefillSpareSchemasTask.delay()
+            self.measure_creation('spare-schema')
@@ -0,0 +1,121 @@
+# coding=UTF8
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_dynamic_fixture import G
+
+from apps.channels.models import Channel
+from apps.core.tests.mixins import CleanupTestCaseMixin
+from apps.data.models import Klass
+from apps.instances.contextmanagers import instance_context
+from apps.instances.helpers import (
+    TEMPLATE_SCHEMA_PREFIX,
+    drop_schema,
+    drop_stale_template_schemas,
+    get_migrations_state,
+    get_prefixed_schemas,
+    get_template_schema,
+    get_unassigned_schemas_db,
+    schema_exists
+)
+from apps.instances.models import Instance
+
+SCHEMA_OBJECTS_SQL = (
+    """
+    SELECT table_name, column_name, data_type, is_nullable, column_default FROM information_schema.columns
+    WHERE table_schema = %(schema)s
+    """,
+    """
+    SELECT tablename, indexname, indexdef FROM pg_indexes WHERE schemaname = %(schema)s
+    """,
+    """
+    SELECT c.relname, con.conname, pg_get_constraintdef(con.oid) FROM pg_constraint con
+    JOIN pg_class c ON c.oid = con.conrelid JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %(schema)s
+    """,
+    """
+    SELECT sequencename, last_value FROM pg_sequences WHERE schemaname = %(schema)s
+    """,
+    """
+    SELECT proname, pg_get_function_arguments(p.oid) FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+    WHERE n.nspname = %(schema)s
+    """,
+)
+
+
+@override_settings(POST_TRANSACTION_SUCCESS_EAGER=True, INSTANCES_SPARE_SCHEMAS=0)
+class TestTemplateSchema(CleanupTestCaseMixin, TestCase):
+    def setUp(self):
+        self.connection = connections[get_unassigned_schemas_db()]
+
+    def get_schema_objects(self, schema_name):
+        objects = []
+        with self.connection.cursor() as cursor:
+            for sql in SCHEMA_OBJECTS_SQL:
+                cursor.execute(sql, {'schema': schema_name})
+                objects.append(sorted(tuple(str(value).replace('{}.'.format(schema_name), '') for value in row)
+                                      for row in cursor.fetchall()))
+            # Rows copied from template, e.g. created by post_tenant_migrate handlers
+            for table_name in sorted({row[0] for row in objects[0]}):
+                cursor.execute('SELECT COUNT(*) FROM "{}"."{}"'.format(schema_name, table_name))
+                objects.append((table_name, cursor.fetchone()[0]))
+        return objects
+
+    def test_cloned_schema_is_same_as_migrated(self):
+        with override_settings(INSTANCES_TEMPLATE_SCHEMA=False):
+            migrated = G(Instance, name='migrated')
+        get_template_schema(self.connection)
+        cloned_at = timezone.now()
+        with mock.patch('apps.instances.helpers.migrate_schema') as migrate_mock:
+            cloned = G(Instance, name='cloned')
+        self.assertFalse(migrate_mock.called)
+
+        self.assertEqual(self.get_schema_objects(cloned.schema_name), self.get_schema_objects(migrated.schema_name))
+
+        with instance_context(cloned):
+            # Rows copied from template are timestamped with instance creation
+            user_profile = Klass.objects.get(name=Klass.USER_PROFILE_NAME)
+            self.assertGreaterEqual(user_profile.created_at, cloned_at)
+            self.assertGreaterEqual(Channel.objects.get(name=Channel.DEFAULT_NAME).updated_at, cloned_at)
+            # Sequences continue after rows copied from template
+            klass = G(Klass, name='cloned')
+            self.assertEqual(klass.pk, Klass.objects.order_by('pk').last().pk)
+
+    def test_stale_template_schema_is_replaced(self):
+        current_template = get_template_schema(self.connection)
+        with mock.patch('apps.instances.helpers.get_migrations_state', return_value='stale'):
+            stale_template = get_template_schema(self.connection)
+        self.assertEqual(stale_template, TEMPLATE_SCHEMA_PREFIX + 'stale')
+        self.assertNotEqual(current_template, stale_template)
+
+        # Stale template is kept for a grace period
+        with override_settings(INSTANCES_TEMPLATE_SCHEMA_GRACE=0):
+            drop_stale_template_schemas(self.connection)
+            self.assertTrue(schema_exists(self.connection, stale_template))
+
+            drop_stale_template_schemas(self.connection)
+        self.assertEqual([name for name, _ in get_prefixed_schemas(self.connection, TEMPLATE_SCHEMA_PREFIX)],
+                         [TEMPLATE_SCHEMA_PREFIX + get_migrations_state()])
+
+    def test_stale_template_schema_is_kept_during_grace_period(self):
+        get_template_schema(self.connection)
+        with mock.patch('apps.instances.helpers.get_migrations_state', return_value='stale'):
+            stale_template = get_template_schema(self.connection)
+
+        for _ in range(2):
+            drop_stale_template_schemas(self.connection)
+        self.assertTrue(schema_exists(self.connection, stale_template))
+
+    @override_settings(INSTANCES_TEMPLATE_SCHEMA=False)
+    def test_disabled_template_schema(self):
+        self.assertIsNone(get_template_schema(self.connection))
+        with mock.patch('apps.instances.helpers.clone_schema') as clone_mock:
+            instance = G(Instance, name='migrated')
+        self.assertFalse(clone_mock.called)
+        self.assertTrue(schema_exists(self.connection, instance.schema_name))
+
+    def tearDown(self):
+        drop_schema(self.connection, TEMPLATE_SCHEMA_PREFIX + 'stale')
+        super().tearDown()
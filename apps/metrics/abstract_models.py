@@ -7,6 +7,11 @@ class AggregateAbstractModel(models.Model):
     class SOURCES(MetaEnum):
         API_CALL = 'api', 'api call'
         CODEBOX_TIME = 'cbx', 'script execution time'
+        ENDPOINT_CACHE_HIT = 'ech', 'endpoint cache hit'
+        ENDPOINT_CACHE_MISS = 'ecm', 'endpoint cache miss'
+
+    # Sources that are charged for and exposed in usage stats; cache counters are internal only.
+    BILLABLE_SOURCES = (SOURCES.API_CALL, SOURCES.CODEBOX_TIME)
 
     timestamp = models.DateTimeField(db_index=True)
     source = models.CharField(max_length=3, choices=SOURCES.as_choices())
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+SOURCE_CHOICES = [('api', 'api call'), ('cbx', 'script execution time'), ('ech', 'endpoint cache hit'),
+                  ('ecm', 'endpoint cache miss')]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0021_worklog_unique_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dayaggregate',
+            name='source',
+            field=models.CharField(choices=SOURCE_CHOICES, max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='houraggregate',
+            name='source',
+            field=models.CharField(choices=SOURCE_CHOICES, max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='minuteaggregate',
+            name='source',
+            field=models.CharField(choices=SOURCE_CHOICES, max_length=3),
+        ),
+    ]
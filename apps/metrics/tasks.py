@@ -62,13 +62,17 @@ class AggregateHourTask(AggregateAbstractTask):
             if not obj.value:
                 continue
 
-            task_kwargs['admin_id'] = obj.admin_id
             if obj.source == HourAggregate.SOURCES.API_CALL:
                 task_kwargs['api_calls'] = obj.value
                 task_class = NotifyAboutApiCalls
-            else:
+            elif obj.source == HourAggregate.SOURCES.CODEBOX_TIME:
                 task_kwargs['codebox_runs'] = obj.value
                 task_class = NotifyAboutCodeBoxSeconds
+            else:
+                # Other sources (e.g. endpoint cache counters) are informational only
+                continue
+
+            task_kwargs['admin_id'] = obj.admin_id
             add_post_transaction_success_operation(task_class.delay,
                                                    admin_id=obj.admin_id,
                                                    instance_name=instance_name,
@@ -67,6 +67,18 @@ class TestAggregateAPI:
         self.assertEqual(len(response.data['objects']), 1)
         self.assertEqual(response.data['objects'][0]['value'], aggregate2.value)
 
+    def test_endpoint_cache_counters_are_not_listed(self):
+        aggregate = G(self.model, admin=self.admin, source=self.model.SOURCES.API_CALL, value=100)
+        for source in (self.model.SOURCES.ENDPOINT_CACHE_HIT, self.model.SOURCES.ENDPOINT_CACHE_MISS):
+            G(self.model, admin=self.admin, source=source, value=10)
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['objects']), 1)
+        self.assertEqual(response.data['objects'][0]['value'], aggregate.value)
+
+        response = self.client.get(self.url, {'source': self.model.SOURCES.ENDPOINT_CACHE_HIT})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_filtering_by_instance(self):
         aggregate1 = G(self.model, admin=self.admin, instance_name='instance1', value=100)
         aggregate2 = G(self.model, admin=self.admin, instance_name='instance2', value=150)
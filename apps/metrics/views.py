@@ -44,13 +44,13 @@ class HourlyStatsViewSet(AtomicMixin,
 
     def parse_source(self, value):
         value = value.lower()
-        found = next((src for src in self.model.SOURCES.as_choices() if src[0] == value), None)
-        if not found:
+        if value not in self.model.BILLABLE_SOURCES:
             raise IncorrectQueryValue(field='source')
         return value
 
     def get_queryset(self):
-        qs = super().get_queryset().filter(admin=self.request.user).order_by('timestamp')
+        qs = super().get_queryset().filter(admin=self.request.user,
+                                           source__in=self.model.BILLABLE_SOURCES).order_by('timestamp')
 
         # Don't filter retrieve
         if self.action != 'list':
@@ -1,4 +1,6 @@
 # coding=UTF8
+import random
+
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.encoding import force_bytes
 from redis import WatchError
@@ -8,6 +10,75 @@ from apps.core.helpers import redis
 from apps.instances.helpers import get_current_instance
 from apps.redis_storage.fields import AutoField, RedisField
 
+# Id is allocated server side, so objects are serialized with random (never valid) negative id that is replaced in lua.
+# New one is drawn if it happens to also appear elsewhere in serialized object.
+PK_PLACEHOLDER_ATTEMPTS = 3
+
+# Allocate id, save object, add it to list (trimming it if needed) and publish message in one atomic call.
+# KEYS: sequence key, list key
+# ARGV: object key prefix, object key suffix, message prefix, message suffix, publish channel,
+#       ttl, list max size, trimmed ttl, raw field (empty if message is not to be stored),
+#       field1, value1, field2, value2...
+CREATE_AND_PUBLISH_SCRIPT = """
+local seq_key, list_key = KEYS[1], KEYS[2]
+local ttl, list_max_size, trimmed_ttl = tonumber(ARGV[6]), tonumber(ARGV[7]), tonumber(ARGV[8])
+
+local pk = redis.call('INCR', seq_key)
+local object_key = ARGV[1] .. pk .. ARGV[2]
+local message = ARGV[3] .. pk .. ARGV[4]
+
+redis.call('HSET', object_key, 'id', pk)
+for i = 10, #ARGV, 2 do
+    redis.call('HSET', object_key, ARGV[i], ARGV[i + 1])
+end
+if ARGV[9] ~= '' then
+    redis.call('HSET', object_key, ARGV[9], message)
+end
+redis.call('ZADD', list_key, pk, object_key)
+
+if ttl > 0 then
+    redis.call('EXPIRE', seq_key, ttl * 2)
+    redis.call('EXPIRE', object_key, ttl)
+    redis.call('EXPIRE', list_key, ttl)
+end
+
+if list_max_size > 0 and pk > list_max_size then
+    local trim = -(list_max_size + 1)
+    local trimmed = redis.call('ZRANGE', list_key, 0, trim)
+    redis.call('ZREMRANGEBYRANK', list_key, 0, trim)
+    if trimmed_ttl > 0 then
+        for _, key in ipairs(trimmed) do
+            redis.call('EXPIRE', key, trimmed_ttl)
+        end
+    end
+end
+
+redis.call('PUBLISH', ARGV[5], message)
+return pk
+"""
+create_and_publish_script = redis.register_script(CREATE_AND_PUBLISH_SCRIPT)
+
+# List objects and get their raw (stored on publish) representation in one call.
+# KEYS: list key
+# ARGV: min score, max score, limit, ordering, raw field
+# Returns flat list of object key and its raw value (empty if it is missing).
+LIST_RAW_SCRIPT = """
+local keys
+if ARGV[4] == 'desc' then
+    keys = redis.call('ZREVRANGEBYSCORE', KEYS[1], ARGV[2], ARGV[1], 'LIMIT', 0, ARGV[3])
+else
+    keys = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[1], ARGV[2], 'LIMIT', 0, ARGV[3])
+end
+
+local result = {}
+for _, key in ipairs(keys) do
+    table.insert(result, key)
+    table.insert(result, redis.call('HGET', key, ARGV[5]) or '')
+end
+return result
+"""
+list_raw_script = redis.register_script(LIST_RAW_SCRIPT)
+
 
 class RedisModelBase(type):
     def __new__(mcs, name, bases, attrs):
@@ -63,6 +134,8 @@ class RedisModel(metaclass=RedisModelBase):
     trimmed_ttl = None
     # If tenant_model is True, all objects are bound to current Instance at time of creation
     tenant_model = False
+    # Hash field to store published message in, so that it can be listed without deserializing
+    raw_field = None
 
     id = AutoField()
     pk_field = 'id'
@@ -139,6 +212,60 @@ class RedisModel(metaclass=RedisModelBase):
         self._save(object_key, update_fields, **kwargs)
         self._saved = True
 
+    def save_and_publish(self, channel_name, serialize, **kwargs):
+        """
+        Save new object and publish it to channel_name in one atomic server side call.
+        Objects published this way are guaranteed to be published in order of their ids.
+
+        `serialize` is called with object and has to return a string that is to be published.
+        As id is allocated by redis, object is serialized with a placeholder id that has to appear in it exactly once.
+        """
+        if self._saved:
+            raise RuntimeError('Only unsaved object can be published.')
+
+        field_values = []
+        for field, field_obj in self.fields.items():
+            if field == self.pk_field:
+                continue
+
+            value = getattr(self, field, None)
+            if value is None and hasattr(field_obj, 'initial_value'):
+                value = field_obj.initial_value()
+                setattr(self, field, value)
+
+            if value is not None:
+                value = field_obj.dump(value)
+            if value is not None:
+                field_values += [field, value]
+
+        (message_prefix, message_suffix), (object_key_prefix, object_key_suffix) = self._split_on_placeholder(
+            serialize, **kwargs)
+
+        pk = create_and_publish_script(
+            keys=[self.get_object_key(pk='seq', **kwargs), self.get_list_key(**kwargs)],
+            args=[object_key_prefix, object_key_suffix, message_prefix, message_suffix, channel_name,
+                  self.get_ttl(**kwargs) or 0, self.get_list_max_size(**kwargs) or 0,
+                  self.get_trimmed_ttl(**kwargs) or 0, self.raw_field or ''] + field_values,
+            client=self.redis_cli)
+
+        setattr(self, self.pk_field, pk)
+        self._saved = True
+
+    def _split_on_placeholder(self, serialize, **kwargs):
+        for _ in range(PK_PLACEHOLDER_ATTEMPTS):
+            placeholder = -2 ** 62 - random.getrandbits(62)
+            setattr(self, self.pk_field, placeholder)
+            placeholder = str(placeholder)
+            message = serialize(self)
+            object_key = self.get_object_key(pk=placeholder, **kwargs)
+
+            occurrences = message.count(placeholder)
+            if occurrences == 0:
+                break
+            if occurrences == 1 and object_key.count(placeholder) == 1:
+                return message.split(placeholder), object_key.split(placeholder)
+        raise RuntimeError('Serialized object has to contain its id exactly once.')
+
     def delete(self, **kwargs):
         object_key = self.get_object_key(pk=self.pk, **kwargs)
         list_key = self.get_list_key(**kwargs)
@@ -220,14 +347,14 @@ class RedisModel(metaclass=RedisModelBase):
         object_data = cls.redis_cli.hgetall(key)
 
         if object_data:
-            return cls.load(**{k.decode(): v.decode() for k, v in object_data.items()})
+            object_data = {k.decode(): v.decode() for k, v in object_data.items()}
+            object_data.pop(cls.raw_field, None)
+            return cls.load(**object_data)
         raise ObjectDoesNotExist()
 
     @classmethod
     def list(cls, min_pk=None, max_pk=None, ordering='desc', limit=100, deferred_fields=None, **kwargs):
         list_key = cls.get_list_key(**kwargs)
-        deferred_fields = deferred_fields or {}
-        fields_list = [field_key for field_key in cls.fields.keys() if field_key not in deferred_fields]
         redis_cli = cls.redis_cli
         if (min_pk is not None and min_pk <= 0) or (max_pk is not None and max_pk <= 0):
             return []
@@ -236,6 +363,43 @@ class RedisModel(metaclass=RedisModelBase):
             keys_list = redis_cli.zrevrangebyscore(list_key, max_pk or '+inf', min_pk or '-inf', start=0, num=limit)
         else:
             keys_list = redis_cli.zrangebyscore(list_key, min_pk or '-inf', max_pk or '+inf', start=0, num=limit)
+        return cls._load_list(keys_list, deferred_fields)
+
+    @classmethod
+    def list_raw(cls, serialize, min_pk=None, max_pk=None, ordering='desc', limit=100, **kwargs):
+        """
+        List objects in their raw, already serialized form stored by `save_and_publish` using a single call.
+        Objects without raw form are loaded and serialized with `serialize`.
+        """
+        if (min_pk is not None and min_pk <= 0) or (max_pk is not None and max_pk <= 0):
+            return []
+        if cls.raw_field is None:
+            return [serialize(obj) for obj in cls.list(min_pk, max_pk, ordering, limit, **kwargs)]
+
+        data = list_raw_script(keys=[cls.get_list_key(**kwargs)],
+                               args=[min_pk or '-inf', max_pk or '+inf', limit, ordering, cls.raw_field],
+                               client=cls.redis_cli)
+        raw_list = []
+        missing = {}
+        for i in range(0, len(data), 2):
+            key, raw = data[i], data[i + 1]
+            if raw:
+                raw_list.append(raw.decode())
+            else:
+                missing[len(raw_list)] = key
+                raw_list.append(None)
+
+        if missing:
+            object_list = cls._load_list(missing.values(), skip_missing=False)
+            for pos, obj in zip(missing.keys(), object_list):
+                raw_list[pos] = serialize(obj) if obj is not None else None
+        return [raw for raw in raw_list if raw is not None]
+
+    @classmethod
+    def _load_list(cls, keys_list, deferred_fields=None, skip_missing=True):
+        deferred_fields = deferred_fields or {}
+        fields_list = [field_key for field_key in cls.fields.keys() if field_key not in deferred_fields]
+        redis_cli = cls.redis_cli
 
         with redis_cli.pipeline() as pipe:
             for key in keys_list:
@@ -249,6 +413,8 @@ class RedisModel(metaclass=RedisModelBase):
                 object_data = [v.decode() if v is not None else None for v in object_data]
                 obj = cls.load(**dict(zip(fields_list, object_data)))
                 object_list.append(obj)
+            elif not skip_missing:
+                object_list.append(None)
 
         return object_list
 
@@ -257,3 +423,9 @@ class RedisModel(metaclass=RedisModelBase):
         obj = cls(**kwargs)
         obj.save(**kwargs)
         return obj
+
+    @classmethod
+    def create_and_publish(cls, channel_name, serialize, **kwargs):
+        obj = cls(**kwargs)
+        obj.save_and_publish(channel_name, serialize, **kwargs)
+        return obj
@@ -1,3 +1,6 @@
+from unittest import mock
+
+import rapidjson as json
 from django.core.exceptions import ObjectDoesNotExist
 from django.test import TestCase
 from django.utils import timezone
@@ -24,6 +27,10 @@ class MyModel(RedisModel):
     list_max_size = 20
 
 
+class MyRawModel(MyModel):
+    raw_field = 'raw'
+
+
 class MyModelWithListArgs(RedisModel):
     char = redis_fields.CharField(default='abc')
     list_template_args = '{arg1}'
@@ -253,3 +260,78 @@ class TestModels(CleanupTestCaseMixin, TestCase):
         model1 = MyModel.create(json='\ud977\ufffd')
         model1 = MyModel.get(pk=model1.pk)
         self.assertEqual(model1.json, {})
+
+    def test_creating_and_publishing(self):
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe('test_channel')
+
+        def serialize(obj):
+            return json.dumps({'id': obj.pk, 'int': obj.int})
+
+        for i in range(25):
+            obj = MyModel.create_and_publish('test_channel', serialize, int=i, date=timezone.now())
+            self.assertEqual(obj.pk, i + 1)
+
+            message = pubsub.get_message(timeout=1)
+            while message is None or message['type'] != 'message':
+                message = pubsub.get_message(timeout=1)
+            self.assertEqual(json.loads(message['data']), {'id': obj.pk, 'int': i})
+        pubsub.close()
+
+        # Check that the same key layout as with regular save is used
+        model_list = MyModel.list(limit=100)
+        self.assertEqual(len(model_list), MyModel.list_max_size)
+        self.assertEqual(model_list[0].int, 24)
+        self.assertIsNotNone(model_list[0].date)
+        self.assert_equal_object_data(MyModel.get(pk=obj.pk), {'pk': obj.pk, 'int': 24, 'char': 'abc', 'bool': True})
+
+        self.assertLessEqual(redis.ttl(MyModel.get_list_key()), MyModel.ttl)
+        self.assertLessEqual(redis.ttl(MyModel.get_object_key(pk=obj.pk)), MyModel.ttl)
+        self.assertLessEqual(redis.ttl(MyModel.get_object_key(pk=1)), MyModel.trimmed_ttl)
+
+        # Sequence is shared with regular save
+        self.assertEqual(MyModel.create().pk, 26)
+
+    def test_publishing_saved_object(self):
+        obj = MyModel.create()
+        self.assertRaises(RuntimeError, obj.save_and_publish, 'test_channel', json.dumps)
+
+    def test_publishing_requires_single_id_in_message(self):
+        self.assertRaises(RuntimeError, MyModel.create_and_publish, 'test_channel', lambda obj: '{}')
+        self.assertRaises(RuntimeError, MyModel.create_and_publish, 'test_channel',
+                          lambda obj: json.dumps({'id': obj.pk, 'copy': obj.pk}))
+        self.assertEqual(MyModel.list(), [])
+
+    def test_publishing_with_placeholder_collision(self):
+        def serialize(obj):
+            return json.dumps({'id': obj.pk, 'char': obj.char})
+
+        # First placeholder drawn is also the value of char field
+        with mock.patch('apps.redis_storage.models.random.getrandbits', side_effect=[0, 1]):
+            obj = MyRawModel.create_and_publish('test_channel', serialize, char=str(-2 ** 62))
+        self.assertEqual(MyRawModel.list_raw(serialize), [json.dumps({'id': obj.pk, 'char': str(-2 ** 62)})])
+
+    def test_listing_raw(self):
+        def serialize(obj):
+            return json.dumps({'id': obj.pk, 'int': obj.int})
+
+        for i in range(5):
+            MyRawModel.create_and_publish('test_channel', serialize, int=i)
+        # Object without raw form is serialized on list
+        MyRawModel.create(int=5)
+
+        raw_list = MyRawModel.list_raw(serialize, min_pk=2, ordering='asc')
+        self.assertEqual(raw_list, [serialize(obj) for obj in MyRawModel.list(min_pk=2, ordering='asc')])
+        self.assertEqual(len(raw_list), 5)
+        self.assertEqual(MyRawModel.list_raw(serialize, limit=1), ['{"id":6,"int":5}'])
+
+        # Raw field is not loaded as a regular field
+        self.assertEqual(MyRawModel.get(pk=1).int, 0)
+
+        # Expired objects are skipped
+        redis.delete(MyRawModel.get_object_key(pk=6), MyRawModel.get_object_key(pk=5))
+        self.assertEqual(len(MyRawModel.list_raw(serialize)), 4)
+
+        # Model without raw field falls back to regular listing
+        MyModel.create(int=1)
+        self.assertEqual(MyModel.list_raw(serialize), ['{"id":1,"int":1}'])
@@ -1,5 +1,4 @@
 # coding=UTF8
-from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import Http404
 from rest_framework.pagination import _positive_int
@@ -8,12 +7,12 @@ from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
 
 from apps.core.exceptions import MalformedPageParameter
+from apps.core.mixins.views import StreamingListMixin
 from apps.redis_storage.pagination import RedisStandardPagination
 
 
-class ReadOnlyModelViewSet(GenericViewSet):
+class ReadOnlyModelViewSet(StreamingListMixin, GenericViewSet):
     page_size = api_settings.PAGE_SIZE
-    max_page_size = settings.MAX_PAGE_SIZE
     paginate_by_param = 'page_size'
     ordering = 'desc'
     pagination_class = RedisStandardPagination
@@ -50,7 +49,7 @@ class ReadOnlyModelViewSet(GenericViewSet):
         page = self.paginate_queryset(self.model)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.get_list_data(serializer))
 
         serializer = self.get_serializer(self.model.list(limit=self.get_page_size(request),
                                                          ordering=self.get_ordering(request),
@@ -3,13 +3,14 @@ import resource
 from multiprocessing import Process, Queue, current_process
 from queue import Empty
 
+from django.conf import settings
 from django.db import models
 from jinja2.exceptions import SecurityError
 from jsonfield import JSONField
 
 from apps.core.abstract_models import CacheableAbstractModel, DescriptionAbstractModel
 from apps.core.fields import StrippedSlugField
-from apps.core.helpers import dict_get_any
+from apps.core.helpers import LRUCache, dict_get_any
 from apps.core.permissions import API_PERMISSIONS, FULL_PERMISSIONS
 from apps.response_templates.exceptions import (
     Jinja2TemplateRenderingError,
@@ -18,6 +19,7 @@ from apps.response_templates.exceptions import (
     UnsafePropertiesOnTemplate
 )
 from apps.response_templates.jinja2_environments import jinja2_env
+from apps.response_templates.sandbox import SandboxPool
 from apps.response_templates.utils import get_current_virtual_mememory_size
 
 RESPONSE_TEMPLATE_MAX_LENGTH = 64 * 1024
@@ -30,6 +32,9 @@ RESPONSE_TEMPLATE_CPU_HARD_TIME_LIMIT = 5  # 5 seconds
 RESPONSE_TEMPLATE_HEADER_NAMES = ('HTTP_X_TEMPLATE', 'HTTP_X_TEMPLATE_RESPONSE')
 RESPONSE_TEMPLATE_GET_ARG_NAMES = ('template', 'template_response')
 
+# Compiled templates, populated separately in every sandbox worker
+compiled_templates = LRUCache(settings.RESPONSE_TEMPLATE_CACHE_SIZE)
+
 
 class ResponseTemplate(DescriptionAbstractModel, CacheableAbstractModel):
     PERMISSION_CONFIG = {
@@ -57,14 +62,23 @@ class ResponseTemplate(DescriptionAbstractModel, CacheableAbstractModel):
         return 'ResponseTemplate[id=%s, name=%s, content_type=%s]' % (self.id, self.name, self.content_type)
 
     @classmethod
-    def render_template(cls, content, data=None, context=None):
+    def render_template(cls, content, data=None, context=None, cache_key=None):
         """
-        Render the jinja2 template;
-        :param request: a request object needed for default context;
+        Render the jinja2 template in a sandbox process;
         :param context: a context passed to the template render method;
         :param data: a response used when some other endpoint is called, passed as a 'response' to the template;
+        :param cache_key: a key of compiled template, defaults to the content itself;
         :return: a rendered content;
         """
+        if not settings.RESPONSE_TEMPLATE_POOL_SIZE:
+            return cls._render_in_process(content, context)
+
+        return render_pool.run((cache_key or content, content, context),
+                               cpu_limit=RESPONSE_TEMPLATE_CPU_HARD_TIME_LIMIT,
+                               memory_limit=RESPONSE_TEMPLATE_MEMORY_HARD_LIMIT)
+
+    @classmethod
+    def _render_in_process(cls, content, context):
         def _render(queue, content, context, current_virtual_memory):
             # limit resources of child process;
             resource.setrlimit(resource.RLIMIT_CPU, (RESPONSE_TEMPLATE_CPU_SOFT_TIME_LIMIT,
@@ -117,7 +131,8 @@ class ResponseTemplate(DescriptionAbstractModel, CacheableAbstractModel):
         context = context or self.context
         template_context = self._get_default_context(request, data)
         template_context.update(context)  # context is more important;
-        return self.render_template(self.content, data, template_context)
+        cache_key = (request.instance.pk, self.pk, self.updated_at) if self.pk else None
+        return self.render_template(self.content, data, template_context, cache_key=cache_key)
 
     @classmethod
     def get_name_from_request(cls, request):
@@ -125,10 +140,18 @@ class ResponseTemplate(DescriptionAbstractModel, CacheableAbstractModel):
             dict_get_any(request.GET, *RESPONSE_TEMPLATE_GET_ARG_NAMES)
 
     @classmethod
-    def render_raw(cls, content, context):
+    def render_cached(cls, cache_key, content, context):
+        template = compiled_templates.get(cache_key)
+        if template is None:
+            template = compiled_templates.set(cache_key, jinja2_env.from_string(content))
+        return cls.render_raw(content, context, template=template)
+
+    @classmethod
+    def render_raw(cls, content, context, template=None):
         if context.get('action', None) == 'get_api':  # allow to render data endpoints;
             context['action'] = 'list'
-        template = jinja2_env.from_string(content)
+        if template is None:
+            template = jinja2_env.from_string(content)
         try:
             rendered = template.render(context)
         except SecurityError:
@@ -148,3 +171,6 @@ class ResponseTemplate(DescriptionAbstractModel, CacheableAbstractModel):
         if data:
             default_context['response'] = data
         return default_context
+
+
+render_pool = SandboxPool(ResponseTemplate.render_cached)
@@ -0,0 +1,188 @@
+# coding=UTF8
+import os
+import resource
+import threading
+from multiprocessing import Pipe, Process, current_process
+from queue import Empty, Queue
+
+from django.conf import settings
+
+from apps.response_templates.exceptions import TemplateRenderingError, TemplateRenderingTimeout
+from apps.response_templates.utils import get_current_virtual_mememory_size
+
+
+class SandboxWorker(Process):
+    """
+    Long running, resource limited process executing handler for tasks received through a pipe.
+
+    CPU limit applies to every task separately, memory limit (in KB) to the whole process.
+    Worker exits after `max_tasks` tasks or when it runs out of memory so that it gets replaced with a fresh one.
+    """
+
+    parent_check_interval = 1
+
+    def __init__(self, handler, max_tasks, memory_limit):
+        super().__init__(daemon=True)
+        self.handler = handler
+        self.max_tasks = max_tasks
+        self.memory_limit = memory_limit
+        self.parent_pid = os.getpid()
+        self.conn, self.child_conn = Pipe()
+        self.tasks_count = 0
+
+    def start(self):
+        super().start()
+        self.child_conn.close()
+
+    def run(self):
+        self.conn.close()
+        # convert to bytes
+        memory_limit = (get_current_virtual_mememory_size() + self.memory_limit) * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+        for _ in range(self.max_tasks):
+            task = self.receive_task()
+            if task is None:
+                return
+
+            cpu_limit, args = task
+            self.set_cpu_limit(cpu_limit)
+            try:
+                result = {'result': self.handler(*args)}
+            except MemoryError:
+                self.child_conn.send({'error_message': 'Memory limit exceeded.', 'recycle': True})
+                return
+            except Exception as e:
+                result = {'error_message': getattr(e, 'message', None) or getattr(e, 'detail', None)}
+            self.child_conn.send(result)
+
+    def receive_task(self):
+        # Poll with an interval so that worker does not outlive parent process killed without cleanup
+        try:
+            while not self.child_conn.poll(self.parent_check_interval):
+                if os.getppid() != self.parent_pid:
+                    return None
+            return self.child_conn.recv()
+        except EOFError:
+            return None
+
+    def set_cpu_limit(self, limit):
+        # RLIMIT_CPU counts total CPU time of a process so it is moved forward before every task.
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft_limit = int(usage.ru_utime + usage.ru_stime) + limit + 1
+        hard_limit = resource.getrlimit(resource.RLIMIT_CPU)[1]
+        if hard_limit != resource.RLIM_INFINITY:
+            soft_limit = min(soft_limit, hard_limit)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft_limit, hard_limit))
+
+    def is_usable(self):
+        return self.tasks_count < self.max_tasks and self.is_alive()
+
+    def execute(self, args, timeout):
+        self.tasks_count += 1
+        try:
+            self.conn.send((timeout, args))
+            if not self.conn.poll(timeout):
+                raise TemplateRenderingTimeout()
+            return self.conn.recv()
+        except (EOFError, OSError):
+            # Worker was killed after exceeding its limits
+            raise TemplateRenderingTimeout()
+
+    def stop(self):
+        self.conn.close()
+        if self.is_alive():
+            self.terminate()
+        self.join(timeout=1)
+
+
+class SandboxPool:
+    """
+    Fixed size pool of pre-forked sandbox workers.
+
+    Pool is set up lazily in every process using it (e.g. each uWSGI worker or celery child) and workers are
+    started on first use. Worker is replaced when it exceeded a limit or reached RESPONSE_TEMPLATE_POOL_MAX_RENDERS.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.lock = threading.Lock()
+        self.pid = None
+        self.idle = None
+
+    def setup(self):
+        if self.pid == os.getpid():
+            return
+
+        with self.lock:
+            if self.pid != os.getpid():
+                # Idle slots, None means that worker was not started yet
+                self.idle = Queue()
+                for _ in range(settings.RESPONSE_TEMPLATE_POOL_SIZE):
+                    self.idle.put(None)
+                self.pid = os.getpid()
+
+    def start_worker(self, memory_limit):
+        # Workaround for "daemonic processes are not allowed to have children" assertion
+        current_process()._config['daemon'] = False
+
+        worker = SandboxWorker(self.handler, settings.RESPONSE_TEMPLATE_POOL_MAX_RENDERS, memory_limit)
+        worker.start()
+        return worker
+
+    def get_worker(self, timeout, memory_limit):
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except Empty:
+            raise TemplateRenderingTimeout()
+
+        if worker is not None and not worker.is_usable():
+            worker.stop()
+            worker = None
+        if worker is None:
+            try:
+                worker = self.start_worker(memory_limit)
+            except Exception:
+                self.idle.put(None)
+                raise
+        return worker
+
+    def run(self, args, cpu_limit, memory_limit):
+        """
+        Run handler with args in a sandbox worker and return its result.
+        :param cpu_limit: CPU time limit of a task in seconds, also used as a timeout;
+        :param memory_limit: memory limit of a newly started worker in KB;
+        """
+        self.setup()
+        idle = self.idle
+        worker = self.get_worker(cpu_limit, memory_limit)
+
+        try:
+            result = worker.execute(args, cpu_limit)
+            if result.get('recycle'):
+                worker.stop()
+                worker = None
+        except TemplateRenderingTimeout:
+            worker.stop()
+            worker = None
+            raise
+        finally:
+            idle.put(worker)
+
+        if 'error_message' in result:
+            raise TemplateRenderingError(result['error_message'])
+        return result['result']
+
+    def close(self):
+        if self.pid != os.getpid():
+            return
+
+        with self.lock:
+            while True:
+                try:
+                    worker = self.idle.get_nowait()
+                except Empty:
+                    break
+                if worker is not None:
+                    worker.stop()
+            self.pid = None
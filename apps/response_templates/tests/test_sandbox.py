@@ -0,0 +1,87 @@
+# coding=UTF8
+import os
+
+from django.test import SimpleTestCase, override_settings, tag
+
+from apps.core.tests.mixins import BenchmarkMixin
+from apps.response_templates.exceptions import TemplateRenderingError, TemplateRenderingTimeout
+from apps.response_templates.models import ResponseTemplate, compiled_templates
+from apps.response_templates.sandbox import SandboxPool
+
+MEMORY_LIMIT = 200 * 1024
+
+
+def handler(action):
+    if action == 'loop':
+        while True:
+            pass
+    elif action == 'error':
+        raise TemplateRenderingError('error')
+    return os.getpid()
+
+
+@override_settings(RESPONSE_TEMPLATE_POOL_SIZE=2, RESPONSE_TEMPLATE_POOL_MAX_RENDERS=3)
+class TestSandboxPool(SimpleTestCase):
+    def setUp(self):
+        self.pool = SandboxPool(handler)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def run_in_pool(self, action='pid', cpu_limit=2):
+        return self.pool.run((action,), cpu_limit=cpu_limit, memory_limit=MEMORY_LIMIT)
+
+    def test_workers_are_reused_and_recycled(self):
+        pids = [self.run_in_pool() for _ in range(12)]
+        self.assertNotIn(os.getpid(), pids)
+        # 2 workers, each one replaced after 3 renders
+        self.assertEqual(len(set(pids)), 4)
+
+    def test_error_is_passed_on(self):
+        with self.assertRaisesMessage(TemplateRenderingError, 'error'):
+            self.run_in_pool('error')
+        self.assertTrue(self.run_in_pool())
+
+    def test_worker_is_replaced_after_timeout(self):
+        pid = self.run_in_pool()
+        with self.assertRaises(TemplateRenderingTimeout):
+            self.run_in_pool('loop', cpu_limit=1)
+        pids = {self.run_in_pool() for _ in range(2)}
+        self.assertEqual(len(pids), 2)
+        self.assertIn(pid, pids)
+
+
+class TestCompiledTemplates(SimpleTestCase):
+    def setUp(self):
+        compiled_templates.clear()
+
+    def test_template_is_compiled_once(self):
+        cache_key = (1, 1, None)
+        self.assertEqual(ResponseTemplate.render_cached(cache_key, '{{ a }}', {'a': 1}), '1')
+        template = compiled_templates.get(cache_key)
+        self.assertIsNotNone(template)
+        # content is only used on cache miss
+        self.assertEqual(ResponseTemplate.render_cached(cache_key, '{{ b }}', {'a': 2}), '2')
+        self.assertIs(compiled_templates.get(cache_key), template)
+
+    @override_settings(RESPONSE_TEMPLATE_POOL_SIZE=2)
+    def test_rendering_in_pool(self):
+        self.assertEqual(ResponseTemplate.render_template('{{ a }}', context={'a': 'abc'}), 'abc')
+
+
+@tag('benchmark')
+class BenchmarkResponseTemplateRender(BenchmarkMixin, SimpleTestCase):
+    count = 200
+    content = """{% for object in response.objects %}<li>{{ object.name|upper }}: {{ object.value }}</li>{% endfor %}"""
+    context = {'action': 'list', 'response': {'objects': [{'name': 'obj%d' % i, 'value': i} for i in range(20)]}}
+
+    def test_render(self):
+        for pool_size in (0, 2):
+            with override_settings(RESPONSE_TEMPLATE_POOL_SIZE=pool_size):
+                # Warm up pool and compiled template cache
+                ResponseTemplate.render_template(self.content, context=dict(self.context), cache_key='benchmark')
+                label = 'response template render ({})'.format('pool' if pool_size else 'process per render')
+                with self.measure(label, count=self.count, unit='renders'):
+                    for _ in range(self.count):
+                        ResponseTemplate.render_template(self.content, context=dict(self.context),
+                                                         cache_key='benchmark')
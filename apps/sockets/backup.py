@@ -23,11 +23,11 @@ class SocketBackup(ModelBackupByName):
 
     def backup_object(self, storage, obj):
         if obj['zip_file']:
-            obj['zip_file'] = storage.add_file(default_storage.open(obj['zip_file']))
+            obj['zip_file'] = storage.add_file(obj['zip_file'])
 
         file_list = json.loads(obj['file_list'])
         for file_data in file_list.values():
-            file_data['file'] = storage.add_file(default_storage.open(file_data['file']))
+            file_data['file'] = storage.add_file(file_data['file'])
         obj['file_list'] = file_list
 
         super().backup_object(storage, obj)
@@ -56,7 +56,7 @@ class SocketEnvironmentBackup(ModelBackupByName):
     def backup_object(self, storage, obj):
         for f in ('zip_file', 'fs_file'):
             if obj[f]:
-                obj[f] = storage.add_file(default_storage.open(obj[f]))
+                obj[f] = storage.add_file(obj[f])
 
         super().backup_object(storage, obj)
 
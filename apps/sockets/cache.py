@@ -0,0 +1,174 @@
+# coding=UTF8
+import math
+import time
+from hashlib import md5
+
+import rapidjson as json
+from django.conf import settings
+from django.http import HttpResponse
+
+from apps.codeboxes.models import Trace
+from apps.core.helpers import redis
+from apps.metrics.models import MinuteAggregate
+
+ENDPOINT_RESULT_KEY_TEMPLATE = '{schema}:cache:sr:{name}:{hash}'
+ENDPOINT_RESULT_LOCK_TEMPLATE = '{schema}:cache:sl:{name}:{hash}:{field}'
+ENDPOINT_RESULT_CHANNEL_TEMPLATE = '{schema}:cache:sc:{name}:{hash}:{field}'
+
+# Store result entry and release fill lock.
+# KEYS: results hash, fill lock
+# ARGV: field, entry, hash timeout, max entries
+# Returns 1 if entry was stored, 0 if results hash is full.
+STORE_RESULT_SCRIPT = """
+redis.call('DEL', KEYS[2])
+if redis.call('HLEN', KEYS[1]) >= tonumber(ARGV[4]) and redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+if redis.call('TTL', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+"""
+store_result_script = redis.register_script(STORE_RESULT_SCRIPT)
+
+
+class EndpointResultCache:
+    """
+    Server side cache of socket endpoint results.
+
+    Results are kept in a redis hash per endpoint and socket hash with a field per normalized request args.
+    Entry is fresh for `ttl` seconds and is served stale for SOCKETS_RESULT_CACHE_STALE_TIME afterwards
+    while a single request revalidates it in background. Concurrent misses wait for the request holding fill lock.
+    """
+
+    HIT = 'hit'
+    STALE = 'stale'
+    REVALIDATE = 'revalidate'
+    WAIT = 'wait'
+    MISS = 'miss'
+
+    def __init__(self, instance, endpoint, socket, field, ttl, timeout):
+        self.instance = instance
+        self.field = field
+        self.ttl = ttl
+        self.lock_timeout = int(timeout) + settings.SOCKETS_RESULT_CACHE_LOCK_MARGIN
+
+        key_kwargs = {'schema': instance.pk, 'name': endpoint.name, 'hash': socket.get_hash(), 'field': field}
+        self.key = ENDPOINT_RESULT_KEY_TEMPLATE.format(**key_kwargs)
+        self.lock_key = ENDPOINT_RESULT_LOCK_TEMPLATE.format(**key_kwargs)
+        self.channel = ENDPOINT_RESULT_CHANNEL_TEMPLATE.format(**key_kwargs)
+
+    @classmethod
+    def get_field(cls, method, args, user_id=None, admin_id=None):
+        normalized = '{}:{}:{}:{}'.format(method, user_id or '', admin_id or '', json.dumps(args, sort_keys=True))
+        return md5(normalized.encode()).hexdigest()
+
+    @classmethod
+    def get_key(cls, instance, endpoint, socket):
+        return ENDPOINT_RESULT_KEY_TEMPLATE.format(schema=instance.pk, name=endpoint.name, hash=socket.get_hash())
+
+    @classmethod
+    def get_entry(cls, key, field, stale=False):
+        entry = redis.hget(key, field)
+        if entry is None:
+            return None
+
+        entry = json.loads(entry)
+        if entry['expire_at' if stale else 'fresh_until'] <= time.time():
+            return None
+        return entry
+
+    @classmethod
+    def create_response(cls, response):
+        response = response.copy()
+        headers = response.pop('headers', {})
+
+        res_obj = HttpResponse(**response)
+        for key, val in headers.items():
+            res_obj[key] = val
+        return res_obj
+
+    def acquire_lock(self):
+        return redis.set(self.lock_key, 1, nx=True, ex=self.lock_timeout)
+
+    def lookup(self):
+        """
+        Look result up and return (state, response) tuple.
+        When state is MISS or REVALIDATE, fill lock is held and the caller is expected to run the script
+        (in background for REVALIDATE, serving stale response meanwhile) or to `abort` if it cannot.
+        """
+
+        entry = self.get_entry(self.key, self.field, stale=True)
+        if entry is not None and entry['fresh_until'] > time.time():
+            state = self.HIT
+        elif self.acquire_lock():
+            state = self.MISS if entry is None else self.REVALIDATE
+        elif entry is not None:
+            state = self.STALE
+        else:
+            state = self.WAIT
+
+        source = MinuteAggregate.SOURCES.ENDPOINT_CACHE_MISS if state == self.MISS else \
+            MinuteAggregate.SOURCES.ENDPOINT_CACHE_HIT
+        MinuteAggregate.increment_aggregate(source, instance=self.instance)
+        return state, entry['response'] if entry is not None else None
+
+    def get_spec(self):
+        return {
+            'key': self.key,
+            'field': self.field,
+            'lock': self.lock_key,
+            'channel': self.channel,
+            'ttl': self.ttl,
+        }
+
+    @classmethod
+    def get_result_response(cls, result_info):
+        result = result_info.get('result') or {}
+        if 'response' in result:
+            return result['response']
+        return {'content_type': 'application/json',
+                'content': json.dumps(result_info)}
+
+    @classmethod
+    def fill(cls, cache_spec, result_info):
+        """
+        Store successful result and pass it on to requests waiting for it.
+        """
+
+        response = cls.get_result_response(result_info)
+        serialized_response = json.dumps(response)
+
+        if result_info.get('status') == Trace.STATUS_CHOICES.SUCCESS and response.get('status', 200) < 400 \
+                and len(serialized_response) <= settings.SOCKETS_RESULT_CACHE_MAX_ENTRY_SIZE:
+            now = time.time()
+            ttl = cache_spec['ttl']
+            entry = json.dumps({'fresh_until': now + ttl,
+                                'expire_at': now + ttl + settings.SOCKETS_RESULT_CACHE_STALE_TIME,
+                                'response': response})
+            store_result_script(keys=(cache_spec['key'], cache_spec['lock']),
+                                args=(cache_spec['field'], entry,
+                                      int(math.ceil(ttl + settings.SOCKETS_RESULT_CACHE_STALE_TIME)),
+                                      settings.SOCKETS_RESULT_CACHE_MAX_ENTRIES))
+        else:
+            redis.delete(cache_spec['lock'])
+
+        redis.publish(cache_spec['channel'], serialized_response)
+
+    @classmethod
+    def abort(cls, cache_spec):
+        """
+        Release fill lock when script could not be run and let requests waiting for it know.
+        """
+
+        redis.delete(cache_spec['lock'])
+        redis.publish(cache_spec['channel'], json.dumps({
+            'status': 503,
+            'content_type': 'application/json',
+            'content': json.dumps({'detail': 'Endpoint result could not be computed.'}),
+        }))
+
+    @classmethod
+    def invalidate(cls, instance, endpoint, socket):
+        redis.delete(cls.get_key(instance, endpoint, socket))
@@ -1,14 +1,18 @@
 # coding=UTF8
 import logging
 import os
+import uuid
 from zipfile import ZIP_DEFLATED
 
 import rapidjson as json
 import requests
 import zipstream
 from django.http import StreamingHttpResponse
+from gevent.queue import Empty
 
-from apps.async_tasks.handlers import BasicHandler
+from apps.async_tasks.handlers import BasicHandler, RedisPubSubHandler
+from apps.core.exceptions import RequestTimeout
+from apps.sockets.cache import EndpointResultCache
 
 try:
     # try to import uwsgi first as that module is not be available outside of uwsgi context (e.g. during tests)
@@ -38,3 +42,33 @@ class SocketZipHandler(BasicHandler):
                 return self.create_zip(file_name, json.load(list_file))
         finally:
             os.unlink(list_file_name)
+
+
+class EndpointCacheHandler(RedisPubSubHandler):
+    """
+    Wait for endpoint result that is being computed by a concurrent request holding the cache fill lock.
+    """
+
+    def get_response(self, request):
+        cache_key = request.environ['CACHE_KEY']
+        cache_field = request.environ['CACHE_FIELD']
+        channel = request.environ['CACHE_CHANNEL']
+        timeout = int(request.environ['CACHE_TIMEOUT'])
+
+        # Channel is shared by all requests waiting for the same result so unsubscribe only our own client
+        client_uuid = uuid.uuid1()
+        queue = self.subscribe(channel, client_uuid=client_uuid)
+        try:
+            # Result might have been stored before we managed to subscribe
+            entry = EndpointResultCache.get_entry(cache_key, cache_field)
+            if entry is not None:
+                return EndpointResultCache.create_response(entry['response'])
+
+            try:
+                response = json.loads(queue.get(timeout=timeout))
+            except Empty:
+                logger.warning("Timeout while waiting for endpoint result on %s", channel)
+                raise RequestTimeout('Script took too much time.')
+            return EndpointResultCache.create_response(response)
+        finally:
+            self.unsubscribe(channel, client_uuid=client_uuid)
@@ -6,17 +6,20 @@ from collections import defaultdict
 from functools import partial
 from hashlib import md5
 
+import rapidjson as json
 from django.conf import settings
 from django.core.files import File
 from django.db import transaction
 from django.utils.encoding import force_text
 from requests import RequestException
-from settings.celeryconf import register_task
+from settings.celeryconf import app, register_task
 
 from apps.admins.models import Admin
-from apps.core.helpers import Cached, download_file
+from apps.codeboxes.tasks import GrpcRunnerMixin
+from apps.core.helpers import Cached, download_file, redis
 from apps.core.tasks import ObjectProcessorBaseTask as _ObjectProcessorBaseTask
 from apps.instances.helpers import get_current_instance, get_instance_db
+from apps.sockets.cache import EndpointResultCache
 from apps.sockets.exceptions import ObjectProcessingError
 from apps.sockets.importer import SocketImporter
 from apps.sockets.processor import default_processor
@@ -162,6 +165,31 @@ class AsyncScriptTask(ScriptBaseTask):
     serializer_class = SocketEndpointTraceSerializer
 
 
+@register_task
+class EndpointCacheRevalidateTask(GrpcRunnerMixin, app.Task):
+    """
+    Run socket endpoint script spec prepared for codebox broker in background to refresh its cached result.
+    Result is stored in endpoint cache when trace is saved.
+    """
+
+    def run(self, instance_pk, spec_key):
+        spec = redis.get(spec_key)
+        if spec is None:
+            self.get_logger().warning('Endpoint spec has expired. Nothing to do here.')
+            return
+
+        spec = json.loads(spec)
+        try:
+            self.run_grpc(self.create_grpc_request(instance_pk, spec, spec['files'], spec['source_hash'],
+                                                   spec['entrypoint'], spec.get('environment', ''),
+                                                   spec.get('environment_url', ''), spec['output_limit']))
+        except Exception:
+            EndpointResultCache.abort(spec['trace']['cache'])
+            raise
+        finally:
+            redis.delete(spec_key)
+
+
 @register_task
 class SocketEnvironmentProcessorTask(ObjectProcessorBaseTask):
     expected_status = SocketEnvironment.STATUSES.PROCESSING
@@ -4,7 +4,7 @@ from datetime import datetime
 from unittest import mock
 
 import pytz
-from django.test import tag
+from django.test import override_settings, tag
 from django.urls import reverse
 from django_dynamic_fixture import G
 from rest_framework import status
@@ -13,9 +13,11 @@ from apps.channels.models import Channel
 from apps.codeboxes.models import CodeBox
 from apps.core.helpers import redis
 from apps.core.tests.testcases import SyncanoAPITestBase
+from apps.metrics.models import MinuteAggregate
+from apps.sockets.cache import EndpointResultCache
 from apps.sockets.exceptions import SocketMissingFile
 from apps.sockets.models import Socket, SocketEndpoint, SocketEndpointTrace, SocketEnvironment
-from apps.sockets.tasks import AsyncScriptTask
+from apps.sockets.tasks import AsyncScriptTask, EndpointCacheRevalidateTask
 from apps.sockets.v2.views import ENDPOINT_CACHE_KEY_TEMPLATE
 from apps.users.models import User
 from apps.webhooks.mixins import METADATA_TEMPLATE, PAYLOAD_TEMPLATE
@@ -292,3 +294,166 @@ endpoints:
         response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(redis.exists(cache_key))
+
+
+@mock.patch('apps.webhooks.mixins.uwsgi', mock.Mock())
+class TestSocketEndpointResultCache(SyncanoAPITestBase):
+    def setUp(self):
+        super().setUp()
+        with mock.patch('apps.sockets.download_utils.ZipDownloadFileHandler.get_socket_spec') as download_mock:
+            download_mock.return_value = """
+endpoints:
+  cached:
+    cache: 60
+    source: console.log(ARGS)
+"""
+            self.socket = G(Socket, name='abc1')
+        self.socket.refresh_from_db()
+        self.socket.environment = G(SocketEnvironment, status=SocketEnvironment.STATUSES.OK)
+        self.socket.save()
+
+        self.endpoint = SocketEndpoint.objects.get(name='abc1/cached')
+        self.url = reverse('v2:socket-endpoint-endpoint', args=(self.instance.name, self.endpoint.name))
+        self.response_data = {'status': 200, 'content_type': 'text/plain', 'content': 'cached content',
+                              'headers': {'X-Custom': 'abc'}}
+
+    def get_cache_spec(self, trace_pk=1):
+        payload = json.loads(redis.get(PAYLOAD_TEMPLATE.format(instance_pk=self.instance.pk,
+                                                               trace_type='socket_endpoint',
+                                                               trace_pk=trace_pk)))
+        self.assertEqual(payload['cache'], 0)
+        return payload['trace']['cache']
+
+    def fill(self, cache_spec, status='success', response=None):
+        EndpointResultCache.fill(cache_spec, {'status': status,
+                                              'result': {'response': response or self.response_data}})
+
+    def get_trace_count(self):
+        return len(SocketEndpointTrace.list(socket_endpoint=self.endpoint))
+
+    def get_counters(self):
+        counters = {}
+        for key, value in redis.hgetall(MinuteAggregate.current_bucket_name()).items():
+            counters[key.decode().rsplit(':', 1)[1]] = int(value)
+        return counters
+
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_result_is_cached_after_first_run(self):
+        response = self.client.post(self.url, {'a': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        cache_spec = self.get_cache_spec()
+        self.assertTrue(redis.exists(cache_spec['lock']))
+
+        self.fill(cache_spec)
+        self.assertFalse(redis.exists(cache_spec['lock']))
+
+        response = self.client.post(self.url, {'a': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'cached content')
+        self.assertEqual(response['X-Custom'], 'abc')
+        self.assertEqual(self.get_trace_count(), 1)
+        counters = self.get_counters()
+        self.assertEqual(counters[MinuteAggregate.SOURCES.ENDPOINT_CACHE_MISS], 1)
+        self.assertEqual(counters[MinuteAggregate.SOURCES.ENDPOINT_CACHE_HIT], 1)
+
+        # Different args are cached separately
+        self.client.post(self.url, {'a': 2})
+        self.assertEqual(self.get_trace_count(), 2)
+
+    @mock.patch('apps.sockets.v2.views.uwsgi')
+    def test_concurrent_miss_waits_for_result(self, uwsgi_mock):
+        self.client.post(self.url)
+        cache_spec = self.get_cache_spec()
+
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        uwsgi_mock.add_var.assert_any_call('OFFLOAD_HANDLER', 'apps.sockets.handlers.EndpointCacheHandler')
+        uwsgi_mock.add_var.assert_any_call('CACHE_CHANNEL', cache_spec['channel'])
+        self.assertEqual(self.get_trace_count(), 1)
+
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_stale_result_is_served_during_revalidation(self):
+        self.client.post(self.url)
+        cache_spec = self.get_cache_spec()
+        self.fill(cache_spec)
+
+        # Make entry stale
+        entry = json.loads(redis.hget(cache_spec['key'], cache_spec['field']))
+        entry['fresh_until'] = 0
+        redis.hset(cache_spec['key'], cache_spec['field'], json.dumps(entry))
+
+        # First request revalidates in background, all of them get stale result
+        with mock.patch('apps.webhooks.mixins.EndpointCacheRevalidateTask.delay') as revalidate_mock:
+            response = self.client.post(self.url)
+            self.assertEqual(response.content, b'cached content')
+            self.assertEqual(self.get_trace_count(), 2)
+            self.assertEqual(revalidate_mock.call_args[1]['spec_key'],
+                             PAYLOAD_TEMPLATE.format(instance_pk=self.instance.pk, trace_type='socket_endpoint',
+                                                     trace_pk=2))
+            self.assertEqual(self.get_cache_spec(trace_pk=2), cache_spec)
+
+            response = self.client.post(self.url)
+            self.assertEqual(response.content, b'cached content')
+            self.assertEqual(self.get_trace_count(), 2)
+        self.assertEqual(revalidate_mock.call_count, 1)
+
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_failed_revalidation_releases_fill_lock(self):
+        self.client.post(self.url)
+        cache_spec = self.get_cache_spec()
+        spec_key = PAYLOAD_TEMPLATE.format(instance_pk=self.instance.pk, trace_type='socket_endpoint', trace_pk=1)
+
+        with mock.patch('apps.sockets.tasks.EndpointCacheRevalidateTask.run_grpc', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                EndpointCacheRevalidateTask.run(self.instance.pk, spec_key)
+        self.assertFalse(redis.exists(cache_spec['lock']))
+        self.assertFalse(redis.exists(spec_key))
+
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_fill_lock_is_released_on_error(self):
+        with mock.patch('apps.sockets.v2.views.SocketEndpointViewSet.run_view', side_effect=ValueError), \
+                mock.patch('apps.sockets.cache.redis.publish') as publish_mock:
+            with self.assertRaises(ValueError):
+                self.client.post(self.url)
+        self.assertTrue(publish_mock.called)
+
+        # Next request runs the script instead of waiting
+        self.client.post(self.url)
+        self.assertEqual(self.get_trace_count(), 1)
+        self.assertTrue(redis.exists(self.get_cache_spec()['lock']))
+
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_failed_result_is_not_cached(self):
+        self.client.post(self.url)
+        cache_spec = self.get_cache_spec()
+
+        with mock.patch('apps.sockets.cache.redis.publish') as publish_mock:
+            self.fill(cache_spec, status='failure')
+        self.assertTrue(publish_mock.called)
+        self.assertFalse(redis.exists(cache_spec['lock']))
+        self.assertFalse(redis.exists(cache_spec['key']))
+
+        self.client.post(self.url)
+        self.assertEqual(self.get_trace_count(), 2)
+
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_invalidating_result_cache(self):
+        self.client.post(self.url)
+        cache_spec = self.get_cache_spec()
+        self.fill(cache_spec)
+        self.assertTrue(redis.exists(cache_spec['key']))
+
+        url = reverse('v2:socket-endpoint-invalidate', args=(self.instance.name, self.endpoint.name))
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(redis.exists(cache_spec['key']))
+
+    @override_settings(SOCKETS_RESULT_CACHE=False)
+    @mock.patch('apps.sockets.v2.views.uwsgi', mock.Mock())
+    def test_result_cache_can_be_disabled(self):
+        self.client.post(self.url)
+        payload = json.loads(redis.get(PAYLOAD_TEMPLATE.format(instance_pk=self.instance.pk,
+                                                               trace_type='socket_endpoint',
+                                                               trace_pk=1)))
+        self.assertEqual(payload['cache'], 60)
+        self.assertNotIn('cache', payload['trace'])
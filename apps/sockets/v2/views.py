@@ -40,6 +40,7 @@ from apps.core.mixins.views import (
 from apps.instances.mixins import InstanceBasedMixin
 from apps.instances.models import Instance
 from apps.instances.throttling import InstanceRateThrottle
+from apps.sockets.cache import EndpointResultCache
 from apps.sockets.exceptions import (
     ChannelFormatKeyError,
     ChannelTooLong,
@@ -262,19 +263,7 @@ class SocketEndpointViewSet(CacheableObjectMixin,
             source='')
 
         if path in socket.file_list:
-            # Prepare spec.
-            script_files = socket.get_files()
-            entrypoint = socket.get_local_path(path)
-            spec = {
-                'files': script_files,
-                'source_hash': socket.get_hash(),
-                'entrypoint': entrypoint,
-                'output_limit': settings.SOCKETS_MAX_RESULT_SIZE,
-                'name': endpoint.name,
-                'cache': kwargs.get('cache', 0),
-            }
-
-            # Add environment
+            environment = None
             if socket.environment_id:
                 environment = Cached(SocketEnvironment, kwargs={'pk': socket.environment_id}).get()
                 if not environment.is_ready:
@@ -282,13 +271,88 @@ class SocketEndpointViewSet(CacheableObjectMixin,
                         raise SocketEnvironmentFailure()
                     raise SocketEnvironmentNotReady()
 
-                spec['environment'] = environment.get_hash()
-                spec['environment_url'] = environment.get_url()
+            # Serve cached result if possible, before spec and trace are prepared
+            result_cache, payload = self.get_result_cache(request, socket, endpoint, **kwargs)
+            if result_cache is None:
+                return self.run_endpoint_script(request, socket, endpoint, metadata, path, script, environment,
+                                                skip_payload, cache=kwargs.get('cache', 0))
+            return self.run_cached_endpoint_script(request, socket, endpoint, metadata, path, script, environment,
+                                                   skip_payload, result_cache, payload)
+
+    def run_cached_endpoint_script(self, request, socket, endpoint, metadata, path, script, environment,
+                                   skip_payload, result_cache, payload):
+        state, response = result_cache.lookup()
+        if state in (EndpointResultCache.HIT, EndpointResultCache.STALE):
+            return EndpointResultCache.create_response(response)
+        if state == EndpointResultCache.WAIT:
+            return self.create_result_wait_response(result_cache)
+
+        cache_spec = result_cache.get_spec()
+        stale_response = response if state == EndpointResultCache.REVALIDATE else None
+        try:
+            # Result cached on our side needs to be always run by codebox broker
+            return self.run_endpoint_script(request, socket, endpoint, metadata, path, script, environment,
+                                            skip_payload, cache=0, payload=payload, cache_spec=cache_spec,
+                                            stale_response=stale_response)
+        except Exception:
+            # Fill lock is held, do not let concurrent requests wait for a result that is not coming
+            EndpointResultCache.abort(cache_spec)
+            raise
+
+    def run_endpoint_script(self, request, socket, endpoint, metadata, path, script, environment, skip_payload,
+                            cache=0, **kwargs):
+        # Prepare spec.
+        script_files = socket.get_files()
+        entrypoint = socket.get_local_path(path)
+        spec = {
+            'files': script_files,
+            'source_hash': socket.get_hash(),
+            'entrypoint': entrypoint,
+            'output_limit': settings.SOCKETS_MAX_RESULT_SIZE,
+            'name': endpoint.name,
+            'cache': cache,
+        }
+
+        # Add environment
+        if environment is not None:
+            spec['environment'] = environment.get_hash()
+            spec['environment_url'] = environment.get_url()
+
+        return self.run_view(request, obj=endpoint, script=script, metadata=metadata, endpoint=endpoint,
+                             spec=spec,
+                             skip_payload=skip_payload, flat_args=True,
+                             uwsgi_handler=self.get_codebox_handler,
+                             **kwargs)
+
+    def get_result_cache(self, request, socket, endpoint, **kwargs):
+        cache_time = kwargs.get('cache', 0)
+        # Multipart payload is passed through unparsed so there is nothing to key the result with
+        if not settings.SOCKETS_RESULT_CACHE or not cache_time or request._empty_data:
+            return None, None
+
+        payload = self.get_payload(request, flat_args=True)
+        user = getattr(request, 'auth_user', None)
+        admin = request.user if request.user.is_authenticated else None
+        field = EndpointResultCache.get_field(request.method, payload[1],
+                                              user_id=user.id if user else None,
+                                              admin_id=admin.id if admin else None)
+
+        result_cache = EndpointResultCache(request.instance, endpoint, socket, field, ttl=cache_time,
+                                           timeout=kwargs.get('timeout', settings.SOCKETS_DEFAULT_TIMEOUT))
+        return result_cache, payload
+
+    def create_result_wait_response(self, result_cache):
+        try:
+            propagate_uwsgi_params(get_current_span_propagation())
 
-            return self.run_view(request, obj=endpoint, script=script, metadata=metadata, endpoint=endpoint,
-                                 spec=spec,
-                                 skip_payload=skip_payload, flat_args=True,
-                                 uwsgi_handler=self.get_codebox_handler)
+            uwsgi.add_var('OFFLOAD_HANDLER', 'apps.sockets.handlers.EndpointCacheHandler')
+            uwsgi.add_var('CACHE_KEY', result_cache.key)
+            uwsgi.add_var('CACHE_FIELD', result_cache.field)
+            uwsgi.add_var('CACHE_CHANNEL', result_cache.channel)
+            uwsgi.add_var('CACHE_TIMEOUT', str(result_cache.lock_timeout))
+        except ValueError:
+            raise UwsgiValueError()
+        return HttpResponse()
 
     def run_channel_view(self, request, endpoint, channel, viewname='channel-subscribe', **kwargs):
         request._request.GET = request.query_params.copy()
@@ -355,6 +419,7 @@ class SocketEndpointViewSet(CacheableObjectMixin,
             hash=socket.get_hash(),
         )
         redis.delete(cache_key)
+        EndpointResultCache.invalidate(request.instance, endpoint, socket)
         return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -25,6 +25,30 @@ def launch_trigger(instance, serializer_class, event, signal, changes=None, **co
                                                changes=list(changes) if changes else None)
 
 
+def launch_triggers(instances, serializer_class, event, signal, **context):
+    """
+    Launch trigger for a batch of instances of the same model with a single task.
+    Changes are taken from instances.
+    """
+    instance_pk = get_current_instance().pk
+
+    if instances and Trigger.match(instance_pk, event, signal):
+        batch = []
+        for instance in instances:
+            data = serializer_class(instance, excluded_fields=('links',), context=context).data
+            changes = getattr(instance, 'changes', None)
+            if changes is not None:
+                changes = changes.intersection(set(data.keys()))
+            batch.append({'data': data, 'changes': list(changes) if changes else None})
+
+        add_post_transaction_success_operation(HandleTriggerEventTask.delay,
+                                               using=router.db_for_write(instances[0].__class__),
+                                               instance_pk=instance_pk,
+                                               event=event,
+                                               signal=signal,
+                                               batch=batch)
+
+
 def launch_dataobject_trigger(instance, serializer_class, signal, data_serializer_class=None,
                               additional_changes=None, skip_user=False, **kwargs):
     additional_changes = additional_changes or set()
@@ -49,6 +73,21 @@ def launch_dataobject_trigger(instance, serializer_class, signal, data_serialize
                    **kwargs)
 
 
+def launch_dataobject_triggers(instances, klass, serializer_class, signal, **kwargs):
+    if klass.is_user_profile:
+        launch_triggers(instances,
+                        serializer_class=serializer_class,
+                        event={'source': 'user'},
+                        signal=signal,
+                        **kwargs)
+
+    launch_triggers(instances,
+                    serializer_class=serializer_class,
+                    event={'source': 'dataobject', 'class': klass.name},
+                    signal=signal,
+                    **kwargs)
+
+
 def launch_user_trigger(instance, serializer_class, signal, **kwargs):
     event = {'source': 'user'}
     launch_trigger(instance,
@@ -2,10 +2,10 @@
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from apps.core.signals import apiview_view_processed
+from apps.core.signals import apiview_bulk_processed, apiview_view_processed
 from apps.data.models import DataObject
 from apps.instances.helpers import get_current_instance
-from apps.triggers.helpers import launch_dataobject_trigger, launch_user_trigger
+from apps.triggers.helpers import launch_dataobject_trigger, launch_dataobject_triggers, launch_user_trigger
 from apps.triggers.models import Trigger
 from apps.users.models import User
 from apps.users.signals import social_user_created
@@ -31,6 +31,15 @@ def data_apiview_processed_handler(sender, view, instance, action, **kwargs):
                               additional_changes=changes)
 
 
+@receiver(apiview_bulk_processed, sender=DataObject, dispatch_uid='triggers_data_apiview_bulk_processed_handler')
+def data_apiview_bulk_processed_handler(sender, view, instances, action, **kwargs):
+    launch_dataobject_triggers(instances=instances,
+                               klass=view.klass,
+                               serializer_class=getattr(view, 'full_serializer_class', view.serializer_class),
+                               signal=action,
+                               view=view)
+
+
 @receiver(apiview_view_processed, sender=User, dispatch_uid='triggers_user_apiview_processed_handler')
 def user_apiview_processed_handler(sender, view, instance, action, **kwargs):
     """
@@ -11,16 +11,25 @@ from apps.triggers.v2.serializers import TriggerTraceSerializer
 
 @register_task
 class HandleTriggerEventTask(InstanceBasedTask):
-    def run(self, event, signal, data, **kwargs):
+    def run(self, event, signal, data=None, batch=None, **kwargs):
+        """
+        Handle single event with `data` and kwargs or a batch of them, each in form of {'data': data, **kwargs}.
+        """
         triggers = Trigger.match(self.instance.pk, event, signal)
         self.get_logger().info("TRIGGERS: %s %s %s", triggers, event, signal)
 
-        # add kwargs to meta
-        meta = {'event': event, 'signal': signal}
-        meta.update(kwargs)
+        if batch is None:
+            batch = [dict(kwargs, data=data)]
 
-        for trigger in triggers:
-            TriggerTask.delay(incentive_pk=trigger.id, instance_pk=self.instance.pk, additional_args=data, meta=meta)
+        for event_kwargs in batch:
+            data = event_kwargs.pop('data')
+            # add kwargs to meta
+            meta = {'event': event, 'signal': signal}
+            meta.update(event_kwargs)
+
+            for trigger in triggers:
+                TriggerTask.delay(incentive_pk=trigger.id, instance_pk=self.instance.pk, additional_args=data,
+                                  meta=meta)
 
 
 @register_task
@@ -4,7 +4,13 @@ from rest_framework.validators import UniqueValidator
 
 from apps.admins.mixins import PasswordSerializerMixin
 from apps.core.field_serializers import LowercaseCharField
-from apps.core.mixins.serializers import AugmentedPropertyMixin, DynamicFieldsMixin, HyperlinkedMixin, RevalidateMixin
+from apps.core.mixins.serializers import (
+    AugmentedPropertyMixin,
+    CSerializerMixin,
+    DynamicFieldsMixin,
+    HyperlinkedMixin,
+    RevalidateMixin
+)
 from apps.core.validators import DjangoValidator
 from apps.data.models import DataObject, Klass
 from apps.data.v1.serializers import DataObjectSerializer
@@ -40,7 +46,7 @@ class UserProfileSerializer(DataObjectSerializer):
 
 
 class UserSerializer(RevalidateMixin, PasswordSerializerMixin, DynamicFieldsMixin, HyperlinkedMixin,
-                     AugmentedPropertyMixin, serializers.ModelSerializer):
+                     AugmentedPropertyMixin, CSerializerMixin, serializers.ModelSerializer):
     hyperlinks = (
         ('self', 'user-detail', (
             'instance.name', 'id',
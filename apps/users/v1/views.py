@@ -113,6 +113,8 @@ class UserAccountView(AtomicMixin,
         OwnerInGoodStanding,
         HasUser,
     )
+    # User profile schema is loaded by serializer
+    batch_concurrent = False
 
     def get_object(self):
         return self.request.auth_user
@@ -129,6 +131,8 @@ class UserViewSet(AutocompleteMixin,
     user_serializer_class = UserFullSerializer
     data_serializer_class = DataObjectSerializer
     autocomplete_field = 'username'
+    # User profile schema is loaded in initial
+    batch_concurrent = False
     permission_classes = (
         Or(
             AdminHasPermissions,
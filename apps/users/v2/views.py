@@ -80,6 +80,9 @@ class UserViewSet(UserProfileViewMixin, ObjectViewSet):
         'channel': {'lookup': 'channel__name', 'type': str},
     }
 
+    # Users are not managed in bulk as they consist of both user and profile
+    bulk = None
+
     def get_queryset(self):
         base_query = super().get_queryset().filter(_klass=self.klass)
         return base_query.select_related('owner').prefetch_related('owner__groups')
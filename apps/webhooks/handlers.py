@@ -39,8 +39,14 @@ class WebhookHandler(RedisPubSubHandler):
         if script_pk:
             script_pk = int(script_pk)
 
+        # Spec prepared by request process that can be dispatched without touching the database
+        dispatch = None
+        if 'SPEC_KEY' in request.environ:
+            dispatch = (request.environ['RESULT_KEY'], request.environ['SPEC_KEY'],
+                        int(request.environ['CONCURRENCY_LIMIT']))
+
         content = self.process_task(task_class, object_pk, instance_pk, payload_key, meta_key,
-                                    trace_pk, template_name, script_pk=script_pk)
+                                    trace_pk, template_name, dispatch=dispatch, script_pk=script_pk)
         headers = {}
 
         if content[0] == '!':
@@ -61,12 +67,16 @@ class WebhookHandler(RedisPubSubHandler):
         return res_obj
 
     def process_task(self, task_class, object_pk, instance_pk, payload_key, meta_key,
-                     trace_pk, template_name=None, **kwargs):
+                     trace_pk, template_name=None, dispatch=None, **kwargs):
         """
         Process script task. Queue it, wait for subscription to go through and then wait for results.
+        If `dispatch` (result channel, spec key, concurrency limit) is passed, spec is pushed onto runner queue.
         """
 
-        result_channel = TASK_RESULT_KEY_TEMPLATE.format(key=generate_key())
+        if dispatch is not None:
+            result_channel, spec_key, concurrency_limit = dispatch
+        else:
+            result_channel = TASK_RESULT_KEY_TEMPLATE.format(key=generate_key())
         queue = self.subscribe(result_channel)
 
         try:
@@ -80,7 +90,11 @@ class WebhookHandler(RedisPubSubHandler):
                 'template_name': template_name,
             }
             task_kwargs.update(kwargs)
-            import_class(task_class).apply_async(args=[object_pk], kwargs=task_kwargs)
+            task = import_class(task_class)
+
+            # Dispatch directly to runner queue if possible, fallback to processing it through a task
+            if dispatch is None or not task.dispatch(instance_pk, payload_key, spec_key, concurrency_limit):
+                task.apply_async(args=[object_pk], kwargs=task_kwargs)
 
             try:
                 # Wait for script to finish
@@ -1,13 +1,16 @@
 # coding=UTF8
 import rapidjson as json
+from django.conf import settings
 from django.http import HttpResponse
 
 from apps.async_tasks.exceptions import UwsgiValueError
 from apps.batch.decorators import disallow_batching
-from apps.core.helpers import get_current_span_propagation, propagate_uwsgi_params, redis
+from apps.core.helpers import generate_key, get_current_span_propagation, import_class, propagate_uwsgi_params, redis
 from apps.core.mixins.views import ValidateRequestSizeMixin
-from apps.sockets.tasks import AsyncScriptTask
+from apps.sockets.cache import EndpointResultCache
+from apps.sockets.tasks import AsyncScriptTask, EndpointCacheRevalidateTask
 from apps.webhooks.exceptions import UnsupportedPayload
+from apps.webhooks.handlers import TASK_RESULT_KEY_TEMPLATE
 from apps.webhooks.helpers import prepare_payload_data, strip_meta_from_uwsgi_info
 from apps.webhooks.models import WebhookTrace
 from apps.webhooks.v1.serializers import WebhookRunSerializer
@@ -75,6 +78,9 @@ class AsyncScriptRunnerMixin(ValidateRequestSizeMixin):
 
         if kwargs.get('skip_payload', False):
             trace_args = request.query_params.dict()
+        elif 'payload' in kwargs:
+            # Payload was already processed by the caller
+            payload_data, trace_args = kwargs['payload']
         else:
             flat_args = kwargs.get('flat_args', False) or instance.created_at.year >= 2017 or \
                 (hasattr(obj, 'created_at') and obj.created_at.year >= 2017)
@@ -117,31 +123,67 @@ class AsyncScriptRunnerMixin(ValidateRequestSizeMixin):
             meta_key = METADATA_TEMPLATE.format(instance_pk=instance.pk,
                                                 trace_type=self.trace_type,
                                                 trace_pk=trace.pk)
-            redis.set(meta_key, json.dumps(meta), ex=PAYLOAD_TIMEOUT)
+            meta = json.dumps(meta)
+            redis.set(meta_key, meta, ex=PAYLOAD_TIMEOUT)
+
+            dispatch = None
+            if settings.SCRIPT_DIRECT_DISPATCH and uwsgi_handler is None:
+                dispatch = self.prepare_dispatch(request, obj, instance, trace, payload_data, meta,
+                                                 script=kwargs.get('script'))
             return self.create_uwsgi_response(request, obj, instance, trace, payload_key, meta_key,
                                               script=kwargs.get('script'),
                                               offload_handler_class=offload_handler_class,
-                                              uwsgi_handler=uwsgi_handler)
+                                              uwsgi_handler=uwsgi_handler,
+                                              dispatch=dispatch)
 
         # TODO: sockets only?
         meta.update({'executed_by': AsyncScriptTask.trace_type, 'executor': obj.name, 'instance': instance.name})
         trace_spec = AsyncScriptTask.create_trace_spec(instance, obj=obj, trace_pk=trace.pk)
+        if kwargs.get('cache_spec'):
+            trace_spec['cache'] = kwargs['cache_spec']
 
         task_spec = AsyncScriptTask.create_script_spec(instance, kwargs['script'], payload_data, meta, '', trace_spec,
                                                        obj.socket)
         spec.update(task_spec)
+        return self.create_spec_response(request, obj, instance, trace, spec,
+                                         stale_response=kwargs.get('stale_response'),
+                                         offload_handler_class=offload_handler_class,
+                                         uwsgi_handler=uwsgi_handler)
 
+    def create_spec_response(self, request, obj, instance, trace, spec, stale_response=None,
+                             offload_handler_class=None, uwsgi_handler=None):
         # Save spec to redis
         payload_key = PAYLOAD_TEMPLATE.format(instance_pk=instance.pk,
                                               trace_type=self.trace_type,
                                               trace_pk=trace.pk)
         redis.set(payload_key, json.dumps(spec), ex=PAYLOAD_TIMEOUT)
+
+        if stale_response is not None:
+            # Serve stale cached result and refresh it in background
+            EndpointCacheRevalidateTask.delay(instance_pk=instance.pk, spec_key=payload_key)
+            return EndpointResultCache.create_response(stale_response)
         return self.create_uwsgi_response(request, obj, instance, trace, payload_key,
                                           offload_handler_class=offload_handler_class,
                                           uwsgi_handler=uwsgi_handler)
 
+    def prepare_dispatch(self, request, obj, instance, trace, payload_data, meta, script=None):
+        """
+        Prepare spec for offload handler to dispatch directly onto runner queue.
+        Database work is done here as offload handler is not meant to do any.
+        Returns result key, spec key and concurrency limit or None if script has to be processed by a task.
+        """
+        response_template = getattr(request, 'response_template', None)
+        result_key = TASK_RESULT_KEY_TEMPLATE.format(key=generate_key())
+        prepared = import_class(self.script_task_class).prepare_dispatch(
+            instance, obj, payload_data, meta, trace.pk, result_key,
+            template_name=response_template.name if response_template else None,
+            script_pk=script.pk if script else None)
+
+        if prepared is not None:
+            return (result_key,) + prepared
+
     def create_uwsgi_response(self, request, obj, instance, trace, payload_key, meta_key=None, script=None,
-                              offload_handler_class=None, uwsgi_handler=None):
+                              offload_handler_class=None, uwsgi_handler=None, dispatch=None):
         try:
             propagate_uwsgi_params(get_current_span_propagation())
 
@@ -165,6 +207,12 @@ class AsyncScriptRunnerMixin(ValidateRequestSizeMixin):
 
             if script:
                 uwsgi.add_var('SCRIPT_PK', str(script.pk))
+
+            if dispatch is not None:
+                result_key, spec_key, concurrency_limit = dispatch
+                uwsgi.add_var('RESULT_KEY', result_key)
+                uwsgi.add_var('SPEC_KEY', spec_key)
+                uwsgi.add_var('CONCURRENCY_LIMIT', str(concurrency_limit))
         except ValueError:
             raise UwsgiValueError()
         return HttpResponse()
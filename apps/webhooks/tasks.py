@@ -66,18 +66,60 @@ class ScriptBaseTask(BaseIncentiveTask):
     def is_incentive_priority(self, instance, incentive):
         return True
 
+    def get_expire_at(self):
+        return (timezone.now() + timedelta(seconds=self.default_timeout)).isoformat()
+
     def apply_async(self, args=None, kwargs=None, task_id=None, producer=None,
                     link=None, link_error=None, **options):
         kwargs = kwargs or {}
         if 'expire_at' not in kwargs:
-            kwargs['expire_at'] = (timezone.now() + timedelta(seconds=self.default_timeout)).isoformat()
+            kwargs['expire_at'] = self.get_expire_at()
         return super().apply_async(args, kwargs, task_id, producer, link, link_error,
                                    **options)
 
+    def prepare_dispatch(self, instance, incentive, payload, meta, trace_pk, result_key,
+                         template_name=None, script_pk=None):
+        """
+        Create and publish spec in request process so that offload handler only has to push it onto runner queue
+        with `dispatch`. Returns spec key (empty if run was blocked) and concurrency limit or None if script
+        has to be processed by the task instead (e.g. it needs to run through gRPC broker).
+        """
+        if self.is_grpc_run(incentive):
+            return None
+
+        prepared = self.prepare_run(
+            instance_pk=instance.pk,
+            incentive_pk=incentive.pk,
+            script_pk=script_pk,
+            additional_args=payload,
+            result_key=result_key,
+            template_name=template_name,
+            trace_pk=trace_pk,
+            expire_at=self.get_expire_at(),
+            meta=meta
+        )
+        if prepared is None:
+            return '', 0
+
+        instance, incentive, spec = prepared
+        return self.publish_codebox_spec(instance.pk, incentive.pk, spec), spec['run']['concurrency_limit']
+
+    def dispatch(self, instance_pk, payload_key, spec_key, concurrency_limit):
+        """
+        Push spec published by `prepare_dispatch` directly onto runner queue, skipping a round trip through
+        the broker. Only uses redis so it is safe to call from offload handler.
+        Returns False if queue limit is exceeded and script has to be processed by the task instead.
+        """
+        if spec_key and not self.enqueue_spec(instance_pk, spec_key, concurrency_limit, priority=True):
+            return False
+
+        if payload_key:
+            redis.delete(payload_key)
+        return True
+
     def run(self, incentive_pk, instance_pk, payload_key, meta_key, trace_pk,
             expire_at=None, result_key=None, template_name=None, script_pk=None):
-        payload = redis.get(payload_key)
-        meta = redis.get(meta_key)
+        payload, meta = redis.mget(payload_key, meta_key)
 
         self.process(
             instance_pk=instance_pk,
@@ -1,13 +1,24 @@
 # coding=UTF8
+import time
 from unittest import mock
 
 from django.http.response import HttpResponse
-from django.test import TestCase
+from django.test import TestCase, override_settings, tag
+from django_dynamic_fixture import G
 from gevent import queue
 
+from apps.admins.models import Admin
+from apps.codeboxes.models import CodeBox
+from apps.codeboxes.runtimes import LATEST_PYTHON_RUNTIME
+from apps.codeboxes.tasks import QUEUE_PRIORITY_TEMPLATE
 from apps.core.exceptions import RequestTimeout
 from apps.core.helpers import redis
+from apps.core.tests.mixins import BenchmarkMixin, CleanupTestCaseMixin
+from apps.instances.helpers import set_current_instance
+from apps.instances.models import Instance
 from apps.webhooks.handlers import WebhookHandler
+from apps.webhooks.models import Webhook, WebhookTrace
+from apps.webhooks.tasks import WebhookTask
 
 
 class TestWebhookHandler(TestCase):
@@ -81,3 +92,105 @@ class TestWebhookHandler(TestCase):
         headers = response.serialize_headers()
         self.assertIn(b'Content-Type: text/plain', headers)
         self.assertIn(b'X-abc: 123', headers)
+
+
+class WebhookDispatchTestMixin(CleanupTestCaseMixin):
+    def setUp(self):
+        admin = G(Admin, is_active=True)
+        self.instance = G(Instance, name='testtest', owner=admin)
+        set_current_instance(self.instance)
+        codebox = CodeBox.objects.create(label='test', source='print 1', runtime_name=LATEST_PYTHON_RUNTIME)
+        self.webhook = G(Webhook, name='testhook', codebox=codebox)
+
+    def get_task_kwargs(self):
+        trace = WebhookTrace.create(webhook=self.webhook)
+        redis.set('payload_key', '{}')
+        redis.set('meta_key', '{}')
+        return {
+            'instance_pk': self.instance.pk,
+            'payload_key': 'payload_key',
+            'meta_key': 'meta_key',
+            'trace_pk': trace.pk,
+            'result_key': 'result_key',
+        }
+
+
+@override_settings(LEGACY_CODEBOX_ENABLED=True)
+class TestWebhookDirectDispatch(WebhookDispatchTestMixin, TestCase):
+    def prepare_dispatch(self, kwargs):
+        return WebhookTask.prepare_dispatch(self.instance, self.webhook, '{}', '{}', kwargs['trace_pk'],
+                                            kwargs['result_key'])
+
+    @mock.patch('apps.codeboxes.tasks.CodeBoxRunTask.delay')
+    def test_dispatch_pushes_prepared_spec_onto_runner_queue(self, delay_mock):
+        kwargs = self.get_task_kwargs()
+        spec_key, concurrency_limit = self.prepare_dispatch(kwargs)
+        self.assertEqual(redis.llen(QUEUE_PRIORITY_TEMPLATE.format(instance=self.instance.pk)), 0)
+
+        with mock.patch('apps.webhooks.tasks.WebhookTask.prepare_run', side_effect=AssertionError):
+            self.assertTrue(WebhookTask.dispatch(self.instance.pk, kwargs['payload_key'], spec_key,
+                                                 concurrency_limit))
+
+        self.assertTrue(delay_mock.called)
+        self.assertEqual(redis.lrange(QUEUE_PRIORITY_TEMPLATE.format(instance=self.instance.pk), 0, -1),
+                         [spec_key.encode()])
+        self.assertIsNone(redis.get('payload_key'))
+
+    @override_settings(CODEBOX_QUEUE_LIMIT_PER_RUNNER=0)
+    def test_dispatch_falls_back_to_task_if_queue_is_full(self):
+        kwargs = self.get_task_kwargs()
+        spec_key, concurrency_limit = self.prepare_dispatch(kwargs)
+        self.assertFalse(WebhookTask.dispatch(self.instance.pk, kwargs['payload_key'], spec_key, concurrency_limit))
+        self.assertIsNotNone(redis.get('payload_key'))
+
+    def test_grpc_run_is_not_prepared(self):
+        with mock.patch('apps.webhooks.tasks.WebhookTask.is_grpc_run', return_value=True), \
+                mock.patch('apps.webhooks.tasks.WebhookTask.prepare_run') as prepare_mock:
+            self.assertIsNone(self.prepare_dispatch(self.get_task_kwargs()))
+        self.assertFalse(prepare_mock.called)
+
+    @mock.patch('apps.webhooks.handlers.WebhookHandler.subscribe', mock.Mock(return_value=queue.Queue()))
+    @mock.patch('apps.webhooks.handlers.WebhookHandler.unsubscribe', mock.Mock())
+    def test_handler_dispatches_prepared_spec(self):
+        with mock.patch('apps.webhooks.tasks.WebhookTask.dispatch', return_value=True) as dispatch_mock, \
+                mock.patch('apps.webhooks.tasks.WebhookTask.apply_async') as apply_mock, \
+                override_settings(WEBHOOK_MAX_TIMEOUT=0):
+            for dispatch in (('result_key', 'spec_key', 1), None):
+                with self.assertRaises(RequestTimeout):
+                    WebhookHandler().process_task('apps.webhooks.tasks.WebhookTask', self.webhook.pk,
+                                                  self.instance.pk, 'payload_key', 'meta_key', 1, dispatch=dispatch)
+
+        dispatch_mock.assert_called_once_with(self.instance.pk, 'payload_key', 'spec_key', 1)
+        self.assertEqual(apply_mock.call_count, 1)
+        WebhookHandler.subscribe.assert_any_call('result_key')
+
+
+@tag('benchmark')
+@override_settings(LEGACY_CODEBOX_ENABLED=True)
+class BenchmarkWebhookDispatch(BenchmarkMixin, WebhookDispatchTestMixin, TestCase):
+    """
+    Compare latency from offload handler to runner for task based and direct dispatch.
+    Tasks run eagerly, runner is a stub that publishes empty result.
+    """
+    iterations = 200
+
+    def measure_latency(self, label, func):
+        latencies = []
+        for _ in range(self.iterations):
+            kwargs = self.get_task_kwargs()
+            start = time.perf_counter()
+            func(kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies.sort()
+        self.report(label, 'p50 %.2fms, p99 %.2fms', latencies[len(latencies) // 2],
+                    latencies[int(len(latencies) * 0.99)])
+
+    @mock.patch('apps.codeboxes.runner.CodeBoxRunner.run',
+                lambda runner, spec: redis.publish(spec['result_key'], '{}'))
+    def test_dispatch_latency(self):
+        self.measure_latency('task', lambda kwargs: WebhookTask.apply_async(args=[self.webhook.pk], kwargs=kwargs))
+        self.measure_latency('direct', lambda kwargs: WebhookTask.dispatch(
+            self.instance.pk, kwargs['payload_key'],
+            *WebhookTask.prepare_dispatch(self.instance, self.webhook, '{}', '{}', kwargs['trace_pk'],
+                                          kwargs['result_key'])))
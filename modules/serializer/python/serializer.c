@@ -9,8 +9,28 @@ const char *filefield_type = "FileField";
 const char *choicefield_type = "ChoiceField";
 const char *hyperlinkedfield_type = "HyperlinkedField";
 
+// Compiled field spec: (field_name, field, source, source_arg, converter, output, output_arg)
+#define SPEC_SIZE 7
+
+// How value is read from object
+#define SOURCE_FIELD 0   // field.get_attribute(obj) + field.to_representation(value)
+#define SOURCE_ATTR 1    // getattr(obj, source_arg)
+#define SOURCE_HSTORE 2  // raw value of obj.__dict__[source_arg[0]][source_arg[1]]
+
+// How value is formatted
+#define OUTPUT_VALUE 0     // as is
+#define OUTPUT_DATETIME 1  // ISO 8601, wrapped in a copy of output_arg dict as "value" unless output_arg is None
+#define OUTPUT_TYPED 2     // wrapped in a copy of output_arg dict as "value", None if value is falsy
+
+// Markers for compiled field processing
+static PyObject *fallback_marker = NULL;  // fast path does not apply, use field methods
+static PyObject *skip_marker = NULL;  // field is to be skipped (SkipField raised)
+
 static PyObject * _isoformat(PyObject *value);
 static PyObject * _serialize_value(PyObject *obj, PyObject *field_name, PyObject *field, char *type_name);
+static PyObject * _serialize_field(PyObject *obj, PyObject *field, PyObject *skip_exception);
+static PyObject * _read_value(PyObject *obj, long source, PyObject *source_arg, PyObject *converter);
+static PyObject * _format_value(PyObject *value, long output, PyObject *output_arg);
 
 
 static PyObject * serialize(PyObject *self, PyObject *args, PyObject *kwargs) {
@@ -124,6 +144,209 @@ static PyObject * _serialize_value(PyObject *obj, PyObject *field_name, PyObject
     return value;
 }
 
+static PyObject * serialize_compiled(PyObject *self, PyObject *args, PyObject *kwargs) {
+    PyObject *obj, *fields, *skip_exception = Py_None;
+
+    static char *kwlist[] = {"obj", "fields", "skip_exception", NULL};
+
+    // Process params
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|O", kwlist, &obj, &fields, &skip_exception))
+        return NULL;
+
+    PyObject *fields_seq = PySequence_Fast(fields, "Compiled fields must be a sequence");
+    if (fields_seq == NULL)
+        return NULL;
+
+    PyObject *dict = PyDict_New();
+    if (dict == NULL) {
+        Py_DECREF(fields_seq);
+        return NULL;
+    }
+
+    // Main loop per compiled field
+    Py_ssize_t fields_count = PySequence_Fast_GET_SIZE(fields_seq);
+    for (Py_ssize_t i = 0; i < fields_count; i++) {
+        PyObject *spec = PySequence_Fast_GET_ITEM(fields_seq, i);
+
+        if (!PyTuple_Check(spec) || PyTuple_GET_SIZE(spec) != SPEC_SIZE) {
+            PyErr_Format(PyExc_TypeError, "Invalid compiled field, expected tuple of %d items", SPEC_SIZE);
+            goto error;
+        }
+
+        PyObject *field_name = PyTuple_GET_ITEM(spec, 0);
+        PyObject *field = PyTuple_GET_ITEM(spec, 1);
+        long source = PyLong_AsLong(PyTuple_GET_ITEM(spec, 2));
+        long output = PyLong_AsLong(PyTuple_GET_ITEM(spec, 5));
+        if (PyErr_Occurred())
+            goto error;
+
+        PyObject *value = _read_value(obj, source, PyTuple_GET_ITEM(spec, 3), PyTuple_GET_ITEM(spec, 4));
+        if (value != NULL && value != fallback_marker && value != Py_None)
+            value = _format_value(value, output, PyTuple_GET_ITEM(spec, 6));
+
+        if (value == fallback_marker) {
+            Py_DECREF(value);
+            value = _serialize_field(obj, field, skip_exception);
+        }
+
+        if (value == NULL)
+            goto error;
+
+        if (value != skip_marker && PyDict_SetItem(dict, field_name, value) < 0) {
+            Py_DECREF(value);
+            goto error;
+        }
+        Py_DECREF(value);
+    }
+
+    Py_DECREF(fields_seq);
+    return dict;
+
+error:
+    Py_DECREF(fields_seq);
+    Py_DECREF(dict);
+    return NULL;
+}
+
+static PyObject * _fallback(void) {
+    // Errors in fast path are not final, field methods will either handle them or raise them again
+    PyErr_Clear();
+    Py_INCREF(fallback_marker);
+    return fallback_marker;
+}
+
+static PyObject * _convert_value(PyObject *value, long source, PyObject *converter) {
+    // Takes over value reference
+    if (converter == Py_None) {
+        // Raw hstore values are expected to be strings
+        if (source == SOURCE_HSTORE && !PyUnicode_CheckExact(value)) {
+            Py_DECREF(value);
+            return _fallback();
+        }
+        return value;
+    }
+
+    if (PyDict_Check(converter)) {
+        // Lookup of a representation
+        PyObject *converted = PyDict_GetItemWithError(converter, value);
+        Py_DECREF(value);
+        if (converted == NULL)
+            return _fallback();
+        Py_INCREF(converted);
+        return converted;
+    }
+
+    if (source == SOURCE_ATTR) {
+        // Attribute is already of expected type
+        if ((PyObject *)Py_TYPE(value) != converter) {
+            Py_DECREF(value);
+            return _fallback();
+        }
+        return value;
+    }
+
+    // Conversion of raw value, None is treated as value that cannot be converted
+    PyObject *converted = PyObject_CallFunctionObjArgs(converter, value, NULL);
+    Py_DECREF(value);
+    if (converted == NULL || converted == Py_None) {
+        Py_XDECREF(converted);
+        return _fallback();
+    }
+    return converted;
+}
+
+static PyObject * _read_value(PyObject *obj, long source, PyObject *source_arg, PyObject *converter) {
+    PyObject *value = NULL;
+
+    if (source == SOURCE_ATTR) {
+        value = PyObject_GetAttr(obj, source_arg);
+        if (value == NULL)
+            return _fallback();
+
+    } else if (source == SOURCE_HSTORE) {
+        // Read hstore dict directly from instance dict, skipping descriptors and typed lookups
+        PyObject *instance_dict = PyObject_GenericGetDict(obj, NULL);
+        if (instance_dict == NULL)
+            return _fallback();
+
+        PyObject *hstore = PyDict_GetItemWithError(instance_dict, PyTuple_GET_ITEM(source_arg, 0));
+        if (hstore != NULL && PyDict_Check(hstore))
+            value = PyDict_GetItemWithError(hstore, PyTuple_GET_ITEM(source_arg, 1));
+        Py_DECREF(instance_dict);
+
+        // Missing key is processed by field as it may have a default
+        if (value == NULL)
+            return _fallback();
+        Py_INCREF(value);
+
+    } else {
+        return _fallback();
+    }
+
+    if (value == Py_None)
+        return value;
+    return _convert_value(value, source, converter);
+}
+
+static PyObject * _format_value(PyObject *value, long output, PyObject *output_arg) {
+    // Takes over value reference
+    if (output == OUTPUT_VALUE)
+        return value;
+
+    if (output == OUTPUT_DATETIME) {
+        if (!PyDateTime_Check(value)) {
+            Py_DECREF(value);
+            return _fallback();
+        }
+
+        PyObject *iso_value = _isoformat(value);
+        Py_DECREF(value);
+        if (iso_value == NULL || output_arg == Py_None)
+            return iso_value;
+        value = iso_value;
+
+    } else if (output == OUTPUT_TYPED) {
+        int is_true = PyObject_IsTrue(value);
+        if (is_true <= 0) {
+            Py_DECREF(value);
+            if (is_true < 0)
+                return _fallback();
+            Py_RETURN_NONE;
+        }
+
+    } else {
+        Py_DECREF(value);
+        return _fallback();
+    }
+
+    // Serialize as dict structure
+    PyObject *value_dict = PyDict_Copy(output_arg);
+    if (value_dict != NULL && PyDict_SetItemString(value_dict, "value", value) < 0)
+        Py_CLEAR(value_dict);
+    Py_DECREF(value);
+    return value_dict;
+}
+
+static PyObject * _serialize_field(PyObject *obj, PyObject *field, PyObject *skip_exception) {
+    PyObject *value = PyObject_CallMethod(field, "get_attribute", "(O)", obj);
+
+    if (value == NULL) {
+        if (skip_exception != Py_None && PyErr_ExceptionMatches(skip_exception)) {
+            PyErr_Clear();
+            Py_INCREF(skip_marker);
+            return skip_marker;
+        }
+        return NULL;
+    }
+
+    if (value == Py_None)
+        return value;
+
+    PyObject *ret = PyObject_CallMethod(field, "to_representation", "(O)", value);
+    Py_DECREF(value);
+    return ret;
+}
+
 static PyObject * isoformat(PyObject *self, PyObject *args) {
     PyObject *value;
     
@@ -142,6 +365,8 @@ static PyObject * _isoformat(PyObject *value) {
 
 static PyMethodDef serializerMethods[] = {
     {"serialize",  (PyCFunction)serialize, METH_KEYWORDS|METH_VARARGS, "Serializes object to dict."},
+    {"serialize_compiled",  (PyCFunction)serialize_compiled, METH_KEYWORDS|METH_VARARGS,
+     "Serializes object to dict using compiled fields."},
     {"isoformat",  (PyCFunction)isoformat, METH_VARARGS, "Formats datetime object as ISO 8601."},
     {NULL, NULL}
 };
@@ -160,6 +385,23 @@ static struct PyModuleDef moduledef = {
 
 PyMODINIT_FUNC PyInit_serializer(void) {
     PyDateTime_IMPORT;
-    return PyModule_Create(&moduledef);
+
+    PyObject *module = PyModule_Create(&moduledef);
+    if (module == NULL)
+        return NULL;
+
+    fallback_marker = PyObject_CallObject((PyObject *)&PyBaseObject_Type, NULL);
+    skip_marker = PyObject_CallObject((PyObject *)&PyBaseObject_Type, NULL);
+    if (fallback_marker == NULL || skip_marker == NULL
+            || PyModule_AddIntConstant(module, "SOURCE_FIELD", SOURCE_FIELD) < 0
+            || PyModule_AddIntConstant(module, "SOURCE_ATTR", SOURCE_ATTR) < 0
+            || PyModule_AddIntConstant(module, "SOURCE_HSTORE", SOURCE_HSTORE) < 0
+            || PyModule_AddIntConstant(module, "OUTPUT_VALUE", OUTPUT_VALUE) < 0
+            || PyModule_AddIntConstant(module, "OUTPUT_DATETIME", OUTPUT_DATETIME) < 0
+            || PyModule_AddIntConstant(module, "OUTPUT_TYPED", OUTPUT_TYPED) < 0) {
+        Py_DECREF(module);
+        return NULL;
+    }
+    return module;
 }
 
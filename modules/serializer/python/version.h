@@ -1 +1 @@
-#define SERIALIZER_VERSION "1.2.3"
+#define SERIALIZER_VERSION "1.3.0"
@@ -102,6 +102,9 @@ USER_THROTTLE_RATE = os.environ.get('USER_THROTTLE_RATE', '60')
 INSTANCE_THROTTLE_RATE = os.environ.get('INSTANCE_THROTTLE_RATE', '60')
 
 MAX_PAGE_SIZE = 100
+STREAMING_LIST_MAX_PAGE_SIZE = 1000  # max page size of list endpoints able to stream response
+STREAMING_LIST_MIN_SIZE = 200  # smaller pages are rendered at once
+STREAMING_LIST_CHUNK_SIZE = 50  # objects encoded per streamed chunk
 MAX_RESPONSE_SIZE = 2 * 1024 * 1024
 RESPONSE_ENCODED = True
 
@@ -205,6 +208,8 @@ CACHES = {
 CACHE_VERSION = int(os.environ.get('CACHE_VERSION', 1))
 CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 24 * 60 * 60))  # 24 hours
 LOCAL_CACHE_TIMEOUT = int(os.environ.get('LOCAL_CACHE_TIMEOUT', 1 * 60 * 60))  # 1 hour
+# For how long (in seconds) local cache trusts a version without checking it in redis. 0 disables leases.
+LOCAL_CACHE_VERSION_LEASE = float(os.environ.get('LOCAL_CACHE_VERSION_LEASE', 0.25))
 LOCK_TIMEOUT = int(os.environ.get('LOCK_TIMEOUT', 15))
 
 TEMPLATES = [
@@ -320,6 +325,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.push_notifications.tasks.APNSFeedbackDispatcher',
         'schedule': crontab(minute=30, hour=2)
     },
+    'instances-refill-spare-schemas': {
+        'task': 'apps.instances.tasks.RefillSpareSchemasTask',
+        'schedule': timedelta(seconds=60)
+    },
 }
 
 if MAIN_LOCATION:
@@ -730,11 +739,22 @@ CODEBOX_IMAGE_TAG = os.environ.get('CODEBOX_IMAGE_TAG', os.environ.get('CIRCLE_B
 CODEBOX_MOUNTED_SOURCE_DIRECTORY = '/app/source'
 CODEBOX_MOUNTED_SOURCE_ENTRY_POINT = 'main'
 
+# Warm container pool, size can be overridden per runtime with `pool_size` key
+CODEBOX_CONTAINER_POOL_SIZE = int(os.environ.get('CODEBOX_CONTAINER_POOL_SIZE', 1))
+CODEBOX_CONTAINER_POOL_ASYNC = True
+CODEBOX_CONTAINER_POOL_CHECKOUT_TIMEOUT = float(os.environ.get('CODEBOX_CONTAINER_POOL_CHECKOUT_TIMEOUT', 5))
+CODEBOX_CONTAINER_POOL_HEALTH_CHECK_INTERVAL = int(os.environ.get('CODEBOX_CONTAINER_POOL_HEALTH_CHECK_INTERVAL', 30))
+
 CODEBOX_QUEUE_LIMIT_PER_RUNNER = 50
+CODEBOX_RUNNER_MAX_SPECS_PER_TASK = 100
+# Let offload handler push synchronous script runs directly onto runner queue instead of going through a task
+SCRIPT_DIRECT_DISPATCH = os.environ.get('SCRIPT_DIRECT_DISPATCH', 'true') == 'true'
 CODEBOX_PAYLOAD_SIZE_LIMIT = 512 * 1024
 CODEBOX_PAYLOAD_CUTOFF = 64 * 1024
 CODEBOX_RESULT_SIZE_LIMIT = 512 * 1024
 CODEBOX_RESULT_CUTOFF = 64 * 1024
+# Stream stdout/stderr over exec socket instead of collecting them from files in mounted tmp directory
+CODEBOX_RESULT_STREAMING = os.environ.get('CODEBOX_RESULT_STREAMING', 'true') == 'true'
 CODEBOX_SOURCE_CUTOFF = 64 * 1024
 CODEBOX_SOURCE_SIZE_LIMIT = 3 * 1024 * 1024  # 3MB
 TRIGGER_PAYLOAD_SIZE_LIMIT = 64 * 1024
@@ -775,10 +795,24 @@ METRICS_AGGREGATION_DELAY = {
 POST_TRANSACTION_SUCCESS_EAGER = False
 USER_GROUP_MAX_COUNT = 32
 BATCH_MAX_SIZE = 50
+BATCH_CONCURRENCY = 8  # read-only batch sub-requests processed concurrently per process
 USE_CSERIALIZER = os.environ.get('USE_CSERIALIZER', 'true') == 'true'
 DEFAULT_ENDPOINT_ACL = {'*': ['get', 'list', 'update', 'delete']}
 DEFAULT_SCRIPT_ENDPOINT_ACL = {'*': ['get', 'list']}
 
+# Response templates
+# Pre-forked render processes per uWSGI/celery process, 0 forks a new process for every render
+RESPONSE_TEMPLATE_POOL_SIZE = int(os.environ.get('RESPONSE_TEMPLATE_POOL_SIZE', 2))
+RESPONSE_TEMPLATE_POOL_MAX_RENDERS = 500  # renders after which render process is replaced
+RESPONSE_TEMPLATE_CACHE_SIZE = 128  # compiled templates kept per render process
+
+# Instances
+# Pre-migrated schemas kept in a pool by refill task and claimed on instance creation, 0 disables the pool
+INSTANCES_SPARE_SCHEMAS = int(os.environ.get('INSTANCES_SPARE_SCHEMAS', 10))
+# Clone new tenant schemas from a template schema instead of running migrations for each of them
+INSTANCES_TEMPLATE_SCHEMA = os.environ.get('INSTANCES_TEMPLATE_SCHEMA', 'true') == 'true'
+INSTANCES_TEMPLATE_SCHEMA_GRACE = 60 * 60  # seconds a stale template schema is kept for during rolling deploys
+
 # Class
 CLASS_MAX_INDEXES = 16
 CLASS_MAX_FIELDS = 32
@@ -791,6 +825,14 @@ DATA_OBJECT_INDEXING_RETRY = 10  # seconds
 DATA_OBJECT_NESTED_QUERIES_MAX = 4
 DATA_OBJECT_NESTED_QUERY_LIMIT = 1000
 DATA_OBJECT_RELATION_LIMIT = 1000
+DATA_OBJECT_SCHEMA_CACHE_SIZE = 512  # number of compiled class schemas kept per process
+DATA_OBJECT_QUERY_CACHE_SIZE = 1024  # number of parsed queries and query plans kept per process
+DATA_OBJECT_QUERY_CACHE_MAX_LENGTH = 4096  # characters
+DATA_OBJECT_BULK_MAX_SIZE = 1000  # objects per bulk request
+DATA_OBJECTS_COUNT_RECONCILE_INTERVAL = 5 * 60  # seconds
+DATA_OBJECTS_COUNT_RECONCILE_EXACT_LIMIT = 10000  # objects counted exactly, larger classes are estimated
+DATA_OBJECTS_COUNT_RECONCILE_TOLERANCE = 0.05  # allowed drift of estimated classes
+DATA_OBJECTS_COUNT_CACHE_TIMEOUT = 5  # seconds
 
 # Channels and changes
 CHANGES_TTL = 24 * 60 * 60
@@ -803,6 +845,9 @@ CHANNEL_LAST_ID_TIMEOUT = int(os.environ.get('CHANNEL_LAST_ID_TIMEOUT', 2 * 60 *
 # Hosting
 HOSTING_DOMAINS = os.environ.get('HOSTING_DOMAINS', '.syncano.ninja').split(',')
 HOSTING_SOCKETS_MAPPING_MAX = 20
+HOSTING_ROUTER_CACHE_SIZE = 512  # number of compiled hosting routers kept per process
+HOSTING_FILE_MAP_MAX_SIZE = 10000  # hostings with more files fall back to per path lookups
+HOSTING_FILE_MAP_TIMEOUT = 24 * 60 * 60  # 24 hours
 
 # Sockets
 SOCKETS_YAML = 'socket.yml'
@@ -820,6 +865,12 @@ SOCKETS_MAX_ENVIRONMENT_SIZE = 45 * 1024 * 1024  # 45MB
 SOCKETS_MAX_SIZE = 25 * 1024 * 1024  # 25MB
 SOCKETS_DEFAULT_VERSION = '0.1'
 SOCKETS_MAX_CACHE_TIME = 30 * 60  # 30 minutes
+# Serve cached endpoint results directly from platform instead of passing every request to codebox broker
+SOCKETS_RESULT_CACHE = os.environ.get('SOCKETS_RESULT_CACHE', 'true') == 'true'
+SOCKETS_RESULT_CACHE_STALE_TIME = 60  # seconds for which expired result is served while it's being refreshed
+SOCKETS_RESULT_CACHE_LOCK_MARGIN = 5  # seconds on top of script timeout for which cache fill lock is held
+SOCKETS_RESULT_CACHE_MAX_ENTRIES = 1000  # per endpoint and socket version
+SOCKETS_RESULT_CACHE_MAX_ENTRY_SIZE = 512 * 1024  # 512kB
 SOCKETS_DEFAULT_TIMEOUT = 30  # 30 seconds
 SOCKETS_MAX_TIMEOUT = 5 * 60  # 5 minutes
 SOCKETS_DEFAULT_ASYNC = 0
@@ -897,3 +948,12 @@ PUSH_NOTIFICATIONS = {
 
 BACKUPS_TEMPORARY_DIRECTORY = "/tmp/"
 BACKUPS_PER_ACCOUNT_LIMIT = 75
+# Number of threads copying files of a full backup
+BACKUPS_FILE_COPY_CONCURRENCY = 8
+# Minimum interval (in seconds) of reporting backup progress in status info
+BACKUPS_PROGRESS_INTERVAL = 10
+# Load full restores with COPY into tables without secondary indexes
+BACKUPS_RESTORE_WITH_COPY = True
+# Parallel workers and memory used by postgres to build each index after a full restore
+BACKUPS_RESTORE_INDEX_WORKERS = 4
+BACKUPS_RESTORE_MAINTENANCE_WORK_MEM = '256MB'
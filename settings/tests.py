@@ -36,9 +36,14 @@ ANALYTICS_ENABLED = False
 REDIS_DB = 1
 CACHES['default']['LOCATION'] = 'redis://{}:{}/{}'.format(REDIS_HOST, REDIS_PORT, REDIS_DB),
 CELERY_RESULT_BACKEND = 'redis://%s:%d/%d' % (REDIS_HOST, REDIS_PORT, REDIS_DB)
+# Disable local cache version leases so that cache is always consistent with redis state
+LOCAL_CACHE_VERSION_LEASE = 0
 
 LOGGING['handlers']['console']['level'] = os.environ.get('TEST_LOG_LEVEL', 'ERROR')
 LOGGING['handlers']['console_task']['level'] = os.environ.get('TEST_LOG_LEVEL', 'ERROR')
+# Results of benchmark tests (run with --tag=benchmark)
+LOGGING['handlers']['benchmark'] = {'class': 'logging.StreamHandler', 'formatter': 'simple'}
+LOGGING['loggers']['benchmark'] = {'handlers': ['benchmark'], 'level': 'INFO', 'propagate': False}
 
 # Metrics
 METRICS_AGGREGATION_DELAY = {
@@ -50,3 +55,5 @@ METRICS_AGGREGATION_DELAY = {
 # Codebox settings
 CODEBOX_RELEASE = date(2100, 1, 1)
 CODEBOX_BROKER_UWSGI = 'localhost:8080'
+# Process container pool cleanup and refills in place so that tests are deterministic
+CODEBOX_CONTAINER_POOL_ASYNC = False
@@ -2,13 +2,14 @@
 set -e
 
 usage() {
-    echo "* Usage: $0 [app_or_apps_to_test][--fast][--with-migrations][--skip-linter][--skip-coverage]" >&2
+    echo "* Usage: $0 [app_or_apps_to_test][--fast][--with-migrations][--with-benchmarks][--skip-linter][--skip-coverage]" >&2
     exit 1
 }
 
 LINTER=true
 COVERAGE=true
 SETUP=true
+BENCHMARKS=false
 POSITIONAL=()
 
 # Parse arguments.
@@ -22,6 +23,9 @@ for PARAM in "$@"; do
     --with-migrations)
         export TEST_MIGRATIONS=true
         ;;
+    --with-benchmarks)
+        BENCHMARKS=true
+        ;;
     --skip-linter)
         LINTER=false
         ;;
@@ -55,6 +59,9 @@ CMD="manage.py test --noinput --parallel ${PARALLEL_COUNT:-2} $*"
 if [ "${LEGACY_CODEBOX_ENABLED:-false}" != "true" ]; then
     CMD="${CMD} --exclude-tag legacy_codebox"
 fi
+if ! $BENCHMARKS; then
+    CMD="${CMD} --exclude-tag benchmark"
+fi
 
 if [ "$#" == 0 ]; then
     CMDS=("${CMD} -e response_templates" "${CMD} response_templates")